@@ -1,6 +1,8 @@
 from django.contrib import admin
 from django.contrib.auth.admin import UserAdmin
-from .models import User, UserProfile, EmailVerificationToken, EmailChangeRequest
+from django.db.models import Count
+from .models import Organization, User, UserProfile, EmailVerificationToken, EmailChangeRequest
+from subscriptions.admin import OrganizationQuotaInline
 
 
 @admin.register(User)
@@ -10,10 +12,11 @@ class CustomUserAdmin(UserAdmin):
     list_filter = ['role', 'is_verified', 'is_active', 'created_at']
     search_fields = ['email', 'username', 'company_name']
     ordering = ['-created_at']
+    raw_id_fields = ['organization']
 
     fieldsets = UserAdmin.fieldsets + (
         ('Ek Bilgiler', {
-            'fields': ('role', 'phone', 'company_name', 'tax_number', 'is_verified')
+            'fields': ('role', 'phone', 'company_name', 'tax_number', 'organization', 'is_verified')
         }),
     )
 
@@ -24,6 +27,21 @@ class CustomUserAdmin(UserAdmin):
     )
 
 
+@admin.register(Organization)
+class OrganizationAdmin(admin.ModelAdmin):
+    list_display = ['name', 'tax_number', 'member_count', 'is_active', 'created_at']
+    list_filter = ['is_active']
+    search_fields = ['name', 'tax_number']
+    inlines = [OrganizationQuotaInline]
+
+    def get_queryset(self, request):
+        return super().get_queryset(request).annotate(member_count=Count('members'))
+
+    @admin.display(description='Members', ordering='member_count')
+    def member_count(self, obj):
+        return obj.member_count
+
+
 @admin.register(UserProfile)
 class UserProfileAdmin(admin.ModelAdmin):
     list_display = ['user', 'city', 'country']
@@ -0,0 +1,172 @@
+from collections import OrderedDict
+from django.contrib.auth import get_user_model
+from django.core.serializers.json import DjangoJSONEncoder
+from django.conf import settings
+from django.utils.translation import gettext_lazy as _
+from redis.exceptions import RedisError
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.utils import get_md5_hash_password
+import json
+import logging
+import threading
+import uuid
+
+from core.redis_client import get_redis_connection
+
+logger = logging.getLogger(__name__)
+
+User = get_user_model()
+
+KEY_FORMAT = 'accounts:user:{user_id}'
+
+# What authentication and permission checks read on every request. Other
+# fields (password, profile and billing details) never reach Redis and load
+# lazily from the database if a view touches them.
+CACHED_FIELDS = [
+    'id', 'username', 'email', 'role', 'organization_id',
+    'is_active', 'is_staff', 'is_superuser', 'is_verified',
+]
+
+# Store the row only if the version is still the one it was read under, so a
+# save that lands while we read the database is never hidden by stale data.
+# Versions are random tokens: after the key expires a new one is minted, so a
+# process-local copy can never match a version it was not cached under.
+STORE_SCRIPT = """
+local version = redis.call('HGET', KEYS[1], 'version')
+if not version then
+    if ARGV[1] ~= '' then
+        return false
+    end
+    version = ARGV[4]
+    redis.call('HSET', KEYS[1], 'version', version)
+elseif version ~= ARGV[1] then
+    return false
+end
+redis.call('HSET', KEYS[1], 'data', ARGV[2])
+redis.call('EXPIRE', KEYS[1], ARGV[3])
+return version
+"""
+
+_script = None
+_local = OrderedDict()
+_local_lock = threading.Lock()
+
+
+def _get_script():
+    global _script
+    if _script is None:
+        _script = get_redis_connection().register_script(STORE_SCRIPT)
+    return _script
+
+
+def _dump_user(user):
+    values = {name: getattr(user, name) for name in CACHED_FIELDS}
+    # Enough to check a token's revocation claim without caching the hash itself
+    values['password_md5'] = get_md5_hash_password(user.password)
+    return json.dumps(values, cls=DjangoJSONEncoder)
+
+
+def _load_user(data):
+    values = json.loads(data)
+    # from_db takes values in model field order
+    fields = [field for field in User._meta.concrete_fields if field.attname in values]
+    user = User.from_db('default', [field.attname for field in fields], [
+        field.to_python(values[field.attname]) for field in fields
+    ])
+    user._password_md5 = values['password_md5']
+    return user
+
+
+def _remember(user_id, version, data):
+    with _local_lock:
+        _local[user_id] = (version, data)
+        _local.move_to_end(user_id)
+        while len(_local) > settings.AUTH_USER_CACHE_LOCAL_SIZE:
+            _local.popitem(last=False)
+
+
+def get_cached_user(user_id):
+    """
+    The User with `user_id`, or None if it does not exist. Served from the
+    process cache or Redis while the user's version is unchanged; costs one
+    Redis round trip per call and a query only after the user changed.
+    """
+    key = KEY_FORMAT.format(user_id=user_id)
+    try:
+        version, data = get_redis_connection().hmget(key, 'version', 'data')
+    except RedisError as e:
+        # Without the version there is no way to tell a cached copy is current
+        logger.warning(f"User cache unavailable, loading user from the database: {str(e)}")
+        return User.objects.filter(id=user_id).first()
+
+    version = version.decode() if version is not None else ''
+    if version:
+        with _local_lock:
+            cached = _local.get(user_id)
+        if cached is not None and cached[0] == version:
+            return _load_user(cached[1])
+
+    if data is None:
+        user = User.objects.filter(id=user_id).first()
+        if user is None:
+            return None
+        data = _dump_user(user)
+        try:
+            version = _get_script()(
+                keys=[key], args=[version, data, settings.AUTH_USER_CACHE_TTL, uuid.uuid4().hex]
+            )
+        except RedisError as e:
+            logger.warning(f"Could not cache user {user_id}: {str(e)}")
+            return user
+        if version is None:
+            # Changed while we read it; serve this copy once without caching it
+            return user
+        version = version.decode()
+    else:
+        data = data.decode()
+
+    _remember(user_id, version, data)
+    return _load_user(data)
+
+
+def invalidate_cached_user(user_id):
+    """
+    Drop the cached copy of a user. Runs on post_save and post_delete;
+    queryset .update() and raw SQL send no signals, so callers changing
+    users that way must call this themselves.
+    """
+    try:
+        pipe = get_redis_connection().pipeline()
+        key = KEY_FORMAT.format(user_id=user_id)
+        pipe.hset(key, 'version', uuid.uuid4().hex)
+        pipe.hdel(key, 'data')
+        pipe.expire(key, settings.AUTH_USER_CACHE_TTL)
+        pipe.execute()
+    except RedisError as e:
+        logger.warning(f"Could not invalidate cached user {user_id}: {str(e)}")
+
+
+class CachedJWTAuthentication(JWTAuthentication):
+    """JWTAuthentication that resolves the user through get_cached_user instead of a query per request."""
+
+    def get_user(self, validated_token):
+        try:
+            user_id = validated_token[api_settings.USER_ID_CLAIM]
+        except KeyError as e:
+            raise InvalidToken(_("Token contained no recognizable user identification")) from e
+
+        user = get_cached_user(user_id)
+        if user is None:
+            raise AuthenticationFailed(_("User not found"), code="user_not_found")
+
+        if api_settings.CHECK_USER_IS_ACTIVE and not user.is_active:
+            raise AuthenticationFailed(_("User is inactive"), code="user_inactive")
+
+        if api_settings.CHECK_REVOKE_TOKEN:
+            password_md5 = getattr(user, '_password_md5', None) or get_md5_hash_password(user.password)
+            if validated_token.get(api_settings.REVOKE_TOKEN_CLAIM) != password_md5:
+                raise AuthenticationFailed(_("The user's password has been changed."), code="password_changed")
+
+        return user
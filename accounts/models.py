@@ -11,6 +11,20 @@ class UserRole(models.TextChoices):
     CORPORATE = 'corporate', 'Kurumsal'
 
 
+class Organization(models.Model):
+    name = models.CharField(max_length=200)
+    tax_number = models.CharField(max_length=20, blank=True)
+    is_active = models.BooleanField(default=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        ordering = ['name']
+
+    def __str__(self):
+        return self.name
+
+
 class User(AbstractUser):
     email = models.EmailField(unique=True)
     role = models.CharField(
@@ -21,6 +35,13 @@ class User(AbstractUser):
     phone = models.CharField(max_length=20, blank=True)
     company_name = models.CharField(max_length=100, blank=True)
     tax_number = models.CharField(max_length=20, blank=True)
+    organization = models.ForeignKey(
+        Organization,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='members'
+    )
     is_verified = models.BooleanField(default=False)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
@@ -0,0 +1,31 @@
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save, pre_delete
+from django.dispatch import receiver
+
+from .authentication import invalidate_cached_user
+from .models import Organization
+
+User = get_user_model()
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def user_changed(sender, instance, **kwargs):
+    # Role changes, deactivation and password changes all go through save().
+    # User.objects.filter(...).update() bypasses this; call invalidate_cached_user after it.
+    # Read the id now: a deleted instance has its pk cleared before the commit.
+    user_id = instance.id
+    transaction.on_commit(lambda: invalidate_cached_user(user_id))
+
+
+@receiver(pre_delete, sender=Organization)
+def organization_deleted(sender, instance, **kwargs):
+    # Members are detached with a SET_NULL bulk update that sends no post_save
+    member_ids = list(instance.members.values_list('id', flat=True))
+
+    def invalidate_members():
+        for user_id in member_ids:
+            invalidate_cached_user(user_id)
+
+    transaction.on_commit(invalidate_members)
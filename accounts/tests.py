@@ -1,3 +1,102 @@
+from django.contrib.auth import get_user_model
 from django.test import TestCase
+from unittest import mock
+from rest_framework_simplejwt.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.tokens import AccessToken
+import fakeredis
 
-# Create your tests here.
+import core.redis_client
+from . import authentication
+from .authentication import KEY_FORMAT, CachedJWTAuthentication, get_cached_user
+from .models import Organization
+
+User = get_user_model()
+
+
+class CachedJWTAuthenticationTests(TestCase):
+    def setUp(self):
+        self.redis = fakeredis.FakeRedis()
+        core.redis_client._connection = self.redis
+        authentication._script = None
+        authentication._local.clear()
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.user = User.objects.create_user('member', 'member@example.com', 'secret-pass-1', is_active=True)
+        self.token = AccessToken.for_user(self.user)
+
+    def authenticate(self, token=None):
+        return CachedJWTAuthentication().get_user(token or self.token)
+
+    def save(self, user, **fields):
+        with self.captureOnCommitCallbacks(execute=True):
+            for name, value in fields.items():
+                setattr(user, name, value)
+            user.save()
+
+    def test_cached_user_needs_no_query(self):
+        self.authenticate()
+
+        with self.assertNumQueries(0):
+            user = self.authenticate()
+        self.assertEqual((user.id, user.email, user.role), (self.user.id, self.user.email, self.user.role))
+
+    def test_password_hash_is_not_cached(self):
+        self.authenticate()
+
+        data = self.redis.hget(KEY_FORMAT.format(user_id=self.user.id), 'data').decode()
+        self.assertNotIn(self.user.password, data)
+        self.assertNotIn('"password"', data)
+
+    def test_save_bumps_version(self):
+        self.authenticate()
+        version = self.redis.hget(KEY_FORMAT.format(user_id=self.user.id), 'version')
+
+        self.save(self.user, role='admin')
+
+        self.assertNotEqual(self.redis.hget(KEY_FORMAT.format(user_id=self.user.id), 'version'), version)
+        self.assertEqual(self.authenticate().role, 'admin')
+
+    def test_deactivated_user_is_rejected(self):
+        self.authenticate()
+        self.save(self.user, is_active=False)
+
+        with self.assertRaises(AuthenticationFailed):
+            self.authenticate()
+
+    def test_deleted_user_is_rejected(self):
+        self.authenticate()
+        with self.captureOnCommitCallbacks(execute=True):
+            User.objects.filter(id=self.user.id).delete()
+
+        with self.assertRaises(AuthenticationFailed):
+            self.authenticate()
+
+    def test_organization_delete_refreshes_members(self):
+        organization = Organization.objects.create(name='Acme')
+        self.save(self.user, organization=organization)
+        self.assertEqual(self.authenticate().organization_id, organization.id)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            organization.delete()
+
+        self.assertIsNone(self.authenticate().organization_id)
+
+    def test_uncached_fields_load_from_the_database(self):
+        self.save(self.user, phone='+905551112233')
+        self.authenticate()
+
+        self.assertEqual(get_cached_user(self.user.id).phone, '+905551112233')
+
+    # override_settings can't reach simplejwt's api_settings once imported
+    @mock.patch.object(authentication.api_settings, 'CHECK_REVOKE_TOKEN', True)
+    def test_password_change_revokes_tokens(self):
+        token = AccessToken.for_user(self.user)
+        self.authenticate(token)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.user.set_password('another-pass-2')
+            self.user.save()
+
+        with self.assertRaises(AuthenticationFailed):
+            self.authenticate(token)
+        self.assertEqual(self.authenticate(AccessToken.for_user(self.user)).id, self.user.id)
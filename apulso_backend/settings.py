@@ -14,6 +14,7 @@ from pathlib import Path
 import os
 from dotenv import load_dotenv
 from datetime import timedelta
+from celery.schedules import crontab
 
 env_file = os.getenv('ENV_FILE', '.env')
 load_dotenv(env_file)
@@ -57,6 +58,7 @@ INSTALLED_APPS = [
     'payments',
     'core',
     'tryon',
+    'workflows',
 ]
 
 MIDDLEWARE = [
@@ -111,7 +113,8 @@ else:
             'PASSWORD': os.getenv('DB_PASSWORD', ''),
             'HOST': os.getenv('DB_HOST', 'localhost'),
             'PORT': os.getenv('DB_PORT', '5432'),
-            'CONN_MAX_AGE': 600,  # Connection pooling
+            # Persistent connections do not work under ASGI; the events service sets 0
+            'CONN_MAX_AGE': int(os.getenv('DB_CONN_MAX_AGE', '600')),
             'OPTIONS': {
                 'connect_timeout': 10,
             }
@@ -164,7 +167,7 @@ SITE_ID = 1
 
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': [
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'accounts.authentication.CachedJWTAuthentication',
     ],
     'DEFAULT_PERMISSION_CLASSES': [
         'rest_framework.permissions.IsAuthenticated',
@@ -178,7 +181,18 @@ REST_FRAMEWORK = {
         'django_filters.rest_framework.DjangoFilterBackend',
     ],
     'DEFAULT_SCHEMA_CLASS': 'drf_spectacular.openapi.AutoSchema',
+    # Burst limits per service plan, enforced by subscriptions.throttling.ServicePlanRateThrottle
+    'DEFAULT_THROTTLE_RATES': {
+        'plan_default': os.getenv('THROTTLE_RATE_DEFAULT', '10/min'),
+        'plan_basic': os.getenv('THROTTLE_RATE_BASIC', '30/min'),
+        'plan_pro': os.getenv('THROTTLE_RATE_PRO', '120/min'),
+        'plan_enterprise': os.getenv('THROTTLE_RATE_ENTERPRISE', '600/min'),
+        'plan_corporate': os.getenv('THROTTLE_RATE_CORPORATE', '1200/min'),
+    },
 }
+# Seconds a user's plan type is cached for the burst throttle; subscription
+# saves clear it sooner, and it never outlives the subscription's end date
+THROTTLE_PLAN_CACHE_TTL = int(os.getenv('THROTTLE_PLAN_CACHE_TTL', '300'))
 
 SIMPLE_JWT = {
     'ACCESS_TOKEN_LIFETIME': timedelta(hours=1),
@@ -251,6 +265,24 @@ if not DEBUG:
 MEDIA_URL = '/media/'
 MEDIA_ROOT = BASE_DIR / 'media'
 
+# Invoices carry personal data: kept outside MEDIA_ROOT and only reachable
+# through expiring signed URLs
+PRIVATE_MEDIA_ROOT = BASE_DIR / 'private_media'
+INVOICE_URL_EXPIRE_SECONDS = int(os.getenv('INVOICE_URL_EXPIRE_SECONDS', '300'))
+
+STORAGES = {
+    'default': {
+        'BACKEND': 'django.core.files.storage.FileSystemStorage',
+    },
+    'staticfiles': {
+        'BACKEND': 'django.contrib.staticfiles.storage.StaticFilesStorage',
+    },
+    'invoices': {
+        'BACKEND': 'payments.storage.SignedFileSystemStorage',
+        'OPTIONS': {'location': PRIVATE_MEDIA_ROOT},
+    },
+}
+
 # AWS S3 Configuration for Production
 USE_S3 = not DEBUG and os.getenv('USE_S3', 'True') == 'True'
 
@@ -276,7 +308,20 @@ if USE_S3:
     # AWS_AUTO_CREATE_BUCKET = False  # Bucket zaten var
 
     # Use S3 for media files
-    DEFAULT_FILE_STORAGE = 'storages.backends.s3boto3.S3Boto3Storage'
+    STORAGES['default'] = {
+        'BACKEND': 'storages.backends.s3boto3.S3Boto3Storage',
+    }
+    # Private objects; custom_domain is cleared because it disables URL signing
+    STORAGES['invoices'] = {
+        'BACKEND': 'storages.backends.s3boto3.S3Boto3Storage',
+        'OPTIONS': {
+            'default_acl': 'private',
+            'querystring_auth': True,
+            'querystring_expire': INVOICE_URL_EXPIRE_SECONDS,
+            'custom_domain': None,
+            'object_parameters': {'CacheControl': 'private, no-store'},
+        },
+    }
     MEDIA_URL = f'https://{AWS_S3_CUSTOM_DOMAIN}/'
 
 # External API Keys
@@ -362,11 +407,198 @@ LOGGING = {
     },
 }
 
+# Redis (Celery broker, rate limiting, counters)
+REDIS_URL = os.getenv('REDIS_URL', 'redis://localhost:6379/0')
+REDIS_SOCKET_TIMEOUT = float(os.getenv('REDIS_SOCKET_TIMEOUT', '1.0'))
+
+# Service/plan catalog: how often workers compare their snapshot against the
+# Redis version key, and how long a snapshot may live while Redis is unreachable
+SERVICE_CATALOG_CHECK_INTERVAL = float(os.getenv('SERVICE_CATALOG_CHECK_INTERVAL', '5'))
+SERVICE_CATALOG_MAX_AGE = float(os.getenv('SERVICE_CATALOG_MAX_AGE', '300'))
+
 # Celery Configuration (for async tasks)
-CELERY_BROKER_URL = os.getenv('REDIS_URL', 'redis://localhost:6379/0')
-CELERY_RESULT_BACKEND = os.getenv('REDIS_URL', 'redis://localhost:6379/0')
+CELERY_BROKER_URL = REDIS_URL
+CELERY_RESULT_BACKEND = REDIS_URL
 CELERY_ACCEPT_CONTENT = ['json']
 CELERY_TASK_SERIALIZER = 'json'
 CELERY_RESULT_SERIALIZER = 'json'
 CELERY_TIMEZONE = TIME_ZONE
+# Provider refund calls run on their own queue; its worker's concurrency bounds the parallelism
+CELERY_TASK_ROUTES = {
+    'payments.tasks.process_refund_chunk': {'queue': 'refunds'},
+    'workflows.tasks.execute_workflow': {'queue': 'executions'},
+}
+
+# Seconds between workflow counter flushes and trending score refreshes
+WORKFLOW_COUNTER_FLUSH_INTERVAL = int(os.getenv('WORKFLOW_COUNTER_FLUSH_INTERVAL', '60'))
+WORKFLOW_TRENDING_REFRESH_INTERVAL = int(os.getenv('WORKFLOW_TRENDING_REFRESH_INTERVAL', '900'))
+
+CELERY_BEAT_SCHEDULE = {
+    'persist-organization-usage': {
+        'task': 'subscriptions.tasks.persist_organization_usage',
+        'schedule': 60.0,
+    },
+    'process-pending-webhooks': {
+        'task': 'payments.tasks.process_pending_webhook_events',
+        'schedule': 60.0,
+    },
+    'run-auto-renewals': {
+        'task': 'subscriptions.tasks.run_auto_renewals',
+        'schedule': crontab(hour=3, minute=0),
+    },
+    'reconcile-pending-payments': {
+        'task': 'payments.tasks.reconcile_pending_payments',
+        'schedule': crontab(minute='*/15'),
+    },
+    'sweep-processing-refunds': {
+        'task': 'payments.tasks.sweep_processing_refunds',
+        'schedule': crontab(minute='*/10'),
+    },
+    'refresh-payment-analytics': {
+        'task': 'payments.tasks.refresh_payment_analytics',
+        'schedule': 300.0,
+    },
+    'flush-workflow-counters': {
+        'task': 'workflows.tasks.flush_workflow_counters',
+        'schedule': float(WORKFLOW_COUNTER_FLUSH_INTERVAL),
+    },
+    'refresh-trending-workflows': {
+        'task': 'workflows.tasks.refresh_trending_workflows',
+        'schedule': float(WORKFLOW_TRENDING_REFRESH_INTERVAL),
+    },
+    'sweep-workflow-executions': {
+        'task': 'workflows.tasks.sweep_workflow_executions',
+        'schedule': 300.0,
+    },
+    'refresh-workflow-recommendations': {
+        'task': 'workflows.tasks.refresh_workflow_recommendations',
+        'schedule': crontab(hour=4, minute=30),
+    },
+    'delete-orphaned-workflow-definitions': {
+        'task': 'workflows.tasks.delete_orphaned_workflow_definitions',
+        'schedule': crontab(hour=5, minute=0),
+    },
+}
+
+# Payments
+# Route every provider through payments.providers.FakeProvider (development and load runs)
+PAYMENTS_FAKE_PROVIDER = os.getenv('PAYMENTS_FAKE_PROVIDER', str(DEBUG)) == 'True'
+# Base URL of `manage.py run_fake_payment_provider`; empty approves in-process
+PAYMENTS_FAKE_PROVIDER_URL = os.getenv('PAYMENTS_FAKE_PROVIDER_URL', '')
+
+PAYMENT_PROVIDERS = {
+    'stripe': {
+        'base_url': os.getenv('STRIPE_API_URL', 'https://api.stripe.com'),
+        'api_key': os.getenv('STRIPE_SECRET_KEY', ''),
+        'webhook_secret': os.getenv('STRIPE_WEBHOOK_SECRET', ''),
+        'success_url': f'{FRONTEND_URL}/payment/success',
+        'cancel_url': f'{FRONTEND_URL}/payment/cancel',
+    },
+    'iyzico': {
+        'base_url': os.getenv('IYZICO_API_URL', 'https://sandbox-api.iyzipay.com'),
+        'api_key': os.getenv('IYZICO_API_KEY', ''),
+        'secret_key': os.getenv('IYZICO_SECRET_KEY', ''),
+        'callback_url': f'{FRONTEND_URL}/payment/callback',
+    },
+    'paytr': {
+        'base_url': os.getenv('PAYTR_API_URL', 'https://www.paytr.com'),
+        'merchant_id': os.getenv('PAYTR_MERCHANT_ID', ''),
+        'merchant_key': os.getenv('PAYTR_MERCHANT_KEY', ''),
+        'merchant_salt': os.getenv('PAYTR_MERCHANT_SALT', ''),
+        'test_mode': os.getenv('PAYTR_TEST_MODE', 'False') == 'True',
+        'ok_url': f'{FRONTEND_URL}/payment/success',
+        'fail_url': f'{FRONTEND_URL}/payment/cancel',
+    },
+}
+# (connect, read) seconds; retries apply to connection errors and 429/5xx responses
+PAYMENT_PROVIDER_TIMEOUT = (
+    float(os.getenv('PAYMENT_PROVIDER_CONNECT_TIMEOUT', '3.05')),
+    float(os.getenv('PAYMENT_PROVIDER_READ_TIMEOUT', '15')),
+)
+PAYMENT_PROVIDER_RETRIES = int(os.getenv('PAYMENT_PROVIDER_RETRIES', '2'))
+PAYMENT_PROVIDER_POOL_SIZE = int(os.getenv('PAYMENT_PROVIDER_POOL_SIZE', '20'))
+
+# Webhook inbox processing
+WEBHOOK_MAX_RETRIES = int(os.getenv('WEBHOOK_MAX_RETRIES', '5'))
+WEBHOOK_SWEEP_AFTER_SECONDS = int(os.getenv('WEBHOOK_SWEEP_AFTER_SECONDS', '60'))
+
+# Reconciliation of pending payments whose webhook never arrived
+RECONCILIATION_STALE_MINUTES = int(os.getenv('RECONCILIATION_STALE_MINUTES', '30'))
+RECONCILIATION_LOOKBACK_DAYS = int(os.getenv('RECONCILIATION_LOOKBACK_DAYS', '7'))
+RECONCILIATION_PAGE_SIZE = int(os.getenv('RECONCILIATION_PAGE_SIZE', '200'))
+RECONCILIATION_MAX_WORKERS = int(os.getenv('RECONCILIATION_MAX_WORKERS', '4'))
+# Provider status lookups per second, per provider and process
+RECONCILIATION_RATE_LIMIT = float(os.getenv('RECONCILIATION_RATE_LIMIT', '20'))
+
+# Payment status push (served by the ASGI `events` service)
+PAYMENT_STATUS_STREAM_TIMEOUT = int(os.getenv('PAYMENT_STATUS_STREAM_TIMEOUT', '55'))
+PAYMENT_STATUS_LONG_POLL_TIMEOUT = int(os.getenv('PAYMENT_STATUS_LONG_POLL_TIMEOUT', '25'))
+PAYMENT_STATUS_HEARTBEAT_INTERVAL = int(os.getenv('PAYMENT_STATUS_HEARTBEAT_INTERVAL', '15'))
+# Used only while Redis pub/sub is unavailable
+PAYMENT_STATUS_POLL_INTERVAL = int(os.getenv('PAYMENT_STATUS_POLL_INTERVAL', '2'))
+PAYMENT_STATUS_RETRY_MS = int(os.getenv('PAYMENT_STATUS_RETRY_MS', '3000'))
+# Lifetime of the ?ticket= that EventSource clients pass instead of their access token
+PAYMENT_STATUS_TICKET_TTL = int(os.getenv('PAYMENT_STATUS_TICKET_TTL', '60'))
+
+# Refunds per Celery task in a refund batch
+REFUND_CHUNK_SIZE = int(os.getenv('REFUND_CHUNK_SIZE', '50'))
+# Refunds left processing this long are reconciled with their provider
+REFUND_PROCESSING_STALE_SECONDS = int(os.getenv('REFUND_PROCESSING_STALE_SECONDS', '600'))
+
+# Invoice numbers reserved per worker at a time; unused ones appear as audit gaps
+INVOICE_NUMBER_BLOCK_SIZE = int(os.getenv('INVOICE_NUMBER_BLOCK_SIZE', '50'))
+
+# Daily payment aggregates; re-read payments updated this long before the last run
+PAYMENT_AGGREGATE_LAG_SECONDS = int(os.getenv('PAYMENT_AGGREGATE_LAG_SECONDS', '300'))
+
+# Subscription auto-renewal
+RENEWAL_WINDOW_HOURS = int(os.getenv('RENEWAL_WINDOW_HOURS', '24'))
+RENEWAL_CHUNK_SIZE = int(os.getenv('RENEWAL_CHUNK_SIZE', '500'))
+RENEWAL_MAX_WORKERS = int(os.getenv('RENEWAL_MAX_WORKERS', '8'))
+RENEWAL_DEFAULT_PROVIDER = os.getenv('RENEWAL_DEFAULT_PROVIDER', 'stripe')
+
+
+# Workflow view/purchase counters are buffered in Redis and written to the
+# database every WORKFLOW_COUNTER_FLUSH_INTERVAL seconds; the in-process
+# fallback buffer flushes at this size
+WORKFLOW_COUNTER_LOCAL_FLUSH_SIZE = int(os.getenv('WORKFLOW_COUNTER_LOCAL_FLUSH_SIZE', '500'))
+
+# Trending workflows: recent views, purchases and ratings, halving in weight every half-life
+WORKFLOW_TRENDING_HALF_LIFE_HOURS = float(os.getenv('WORKFLOW_TRENDING_HALF_LIFE_HOURS', '48'))
+WORKFLOW_TRENDING_WINDOW_DAYS = int(os.getenv('WORKFLOW_TRENDING_WINDOW_DAYS', '14'))
+
+# Workflow executions, dispatched to n8n from the 'executions' Celery queue.
+# An empty N8N_URL completes executions with an in-process stub (development)
+N8N_URL = os.getenv('N8N_URL', '')
+N8N_API_KEY = os.getenv('N8N_API_KEY', '')
+N8N_EXECUTE_PATH = os.getenv('N8N_EXECUTE_PATH', '/rest/workflows/run')
+N8N_POOL_SIZE = int(os.getenv('N8N_POOL_SIZE', '20'))
+# Seconds n8n may take to answer; slower executions fail and are not retried
+WORKFLOW_EXECUTION_TIMEOUT = int(os.getenv('WORKFLOW_EXECUTION_TIMEOUT', '120'))
+# Retries for connection errors and 429/5xx answers, with exponential backoff
+WORKFLOW_EXECUTION_MAX_RETRIES = int(os.getenv('WORKFLOW_EXECUTION_MAX_RETRIES', '3'))
+WORKFLOW_EXECUTION_RETRY_BACKOFF = int(os.getenv('WORKFLOW_EXECUTION_RETRY_BACKOFF', '5'))
+# Pending or running executions allowed per user at once
+WORKFLOW_EXECUTION_MAX_CONCURRENT_PER_USER = int(os.getenv('WORKFLOW_EXECUTION_MAX_CONCURRENT_PER_USER', '3'))
+
+# "Customers also bought": neighbors kept per workflow, and the shared buyers
+# a pair needs before it counts (filters out one-off coincidences)
+WORKFLOW_RECOMMENDATIONS_TOP_K = int(os.getenv('WORKFLOW_RECOMMENDATIONS_TOP_K', '10'))
+WORKFLOW_RECOMMENDATIONS_MIN_COPURCHASES = int(os.getenv('WORKFLOW_RECOMMENDATIONS_MIN_COPURCHASES', '2'))
+
+# Catalog facet counts: upper bounds of the price buckets, and how long a
+# cached result may be served (changes to workflows invalidate it sooner)
+WORKFLOW_FACET_PRICE_BUCKETS = [
+    int(bound) for bound in os.getenv('WORKFLOW_FACET_PRICE_BUCKETS', '50,100,250,500').split(',')
+]
+WORKFLOW_FACET_TAG_LIMIT = int(os.getenv('WORKFLOW_FACET_TAG_LIMIT', '50'))
+WORKFLOW_FACETS_CACHE_TTL = int(os.getenv('WORKFLOW_FACETS_CACHE_TTL', '300'))
+
+# Workflow definitions no workflow points at are deleted once this old; the
+# grace period covers definitions stored by saves that have not committed yet
+WORKFLOW_DEFINITION_ORPHAN_HOURS = int(os.getenv('WORKFLOW_DEFINITION_ORPHAN_HOURS', '24'))
 
+# JWT user resolution: users are cached in process and in Redis, keyed by a
+# per-user version that every User save bumps
+AUTH_USER_CACHE_TTL = int(os.getenv('AUTH_USER_CACHE_TTL', '300'))
+AUTH_USER_CACHE_LOCAL_SIZE = int(os.getenv('AUTH_USER_CACHE_LOCAL_SIZE', '1024'))
@@ -28,6 +28,7 @@ urlpatterns = [
     path('api/v1/payments/', include('payments.urls')),
     path('api/v1/core/', include('core.urls')),
     path('api/v1/tryon/', include('tryon.urls')),
+    path('api/v1/workflows/', include('workflows.urls')),
 
     path('api/schema/', SpectacularAPIView.as_view(), name='schema'),
     path('api/docs/', SpectacularSwaggerView.as_view(url_name='schema'), name='swagger-ui'),
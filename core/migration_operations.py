@@ -0,0 +1,26 @@
+from django.contrib.postgres.indexes import PostgresIndex
+from django.contrib.postgres.operations import AddIndexConcurrently
+from django.db.migrations.operations import AddIndex
+
+
+class AddIndexConcurrentlyIfSupported(AddIndexConcurrently):
+    """
+    CREATE INDEX CONCURRENTLY on PostgreSQL so large tables stay writable,
+    a plain CREATE INDEX on other backends (SQLite in development).
+    PostgreSQL-only index types (GIN, GiST, ...) are skipped elsewhere.
+    Migrations using it must set `atomic = False`.
+    """
+
+    def database_forwards(self, app_label, schema_editor, from_state, to_state):
+        if schema_editor.connection.vendor == 'postgresql':
+            return super().database_forwards(app_label, schema_editor, from_state, to_state)
+        if isinstance(self.index, PostgresIndex):
+            return
+        return AddIndex.database_forwards(self, app_label, schema_editor, from_state, to_state)
+
+    def database_backwards(self, app_label, schema_editor, from_state, to_state):
+        if schema_editor.connection.vendor == 'postgresql':
+            return super().database_backwards(app_label, schema_editor, from_state, to_state)
+        if isinstance(self.index, PostgresIndex):
+            return
+        return AddIndex.database_backwards(self, app_label, schema_editor, from_state, to_state)
@@ -0,0 +1,25 @@
+import redis
+import redis.asyncio
+from django.conf import settings
+
+_connection = None
+
+
+def get_redis_connection() -> redis.Redis:
+    global _connection
+    if _connection is None:
+        _connection = redis.Redis.from_url(
+            settings.REDIS_URL,
+            socket_timeout=settings.REDIS_SOCKET_TIMEOUT,
+            socket_connect_timeout=settings.REDIS_SOCKET_TIMEOUT,
+        )
+    return _connection
+
+
+def create_async_redis_connection() -> redis.asyncio.Redis:
+    # Async clients are bound to the event loop that created them, so each
+    # caller (e.g. one streaming response) gets its own and closes it
+    return redis.asyncio.Redis.from_url(
+        settings.REDIS_URL,
+        socket_connect_timeout=settings.REDIS_SOCKET_TIMEOUT,
+    )
@@ -1,5 +1,10 @@
 from django.contrib import admin
-from .models import Payment, PaymentMethod, Invoice, Refund
+from .models import (
+    Payment, PaymentMethod, Invoice, Refund, RefundBatch, RefundBatchStatus, WebhookEvent, ReconciliationRun,
+    PaymentDailyAggregate, InvoiceNumberBlock
+)
+from .refunds import create_refund_batch, reset_failed_refunds
+from .tasks import process_webhook_event, start_refund_batch
 
 
 @admin.register(Payment)
@@ -9,6 +14,13 @@ class PaymentAdmin(admin.ModelAdmin):
     search_fields = ['user__email', 'payment_id', 'provider_payment_id']
     raw_id_fields = ['user']
     readonly_fields = ['payment_id', 'provider_payment_id', 'created_at', 'updated_at']
+    actions = ['refund_payments']
+
+    @admin.action(description='Refund selected payments')
+    def refund_payments(self, request, queryset):
+        batch = create_refund_batch(queryset, reason=f'Bulk refund by {request.user.email}', created_by=request.user)
+        start_refund_batch(batch)
+        self.message_user(request, f'Refund batch {batch.id} started for {batch.total} payments')
 
 
 @admin.register(PaymentMethod)
@@ -24,13 +36,88 @@ class InvoiceAdmin(admin.ModelAdmin):
     list_display = ['invoice_number', 'billing_name', 'total_amount', 'issued_at']
     list_filter = ['issued_at']
     search_fields = ['invoice_number', 'billing_name', 'billing_email']
-    readonly_fields = ['invoice_number', 'issued_at']
+    readonly_fields = ['invoice_number', 'issued_at', 'pdf_file', 'pdf_hash', 'pdf_generated_at']
 
 
 @admin.register(Refund)
 class RefundAdmin(admin.ModelAdmin):
-    list_display = ['refund_id', 'payment', 'amount', 'status', 'created_at']
+    list_display = ['refund_id', 'payment', 'amount', 'status', 'batch', 'created_at']
     list_filter = ['status', 'created_at']
     search_fields = ['refund_id', 'payment__payment_id']
-    raw_id_fields = ['payment']
-    readonly_fields = ['refund_id', 'created_at']
+    raw_id_fields = ['payment', 'batch']
+    readonly_fields = ['refund_id', 'error_message', 'created_at']
+
+
+@admin.register(RefundBatch)
+class RefundBatchAdmin(admin.ModelAdmin):
+    list_display = ['id', 'status', 'total', 'succeeded', 'failed', 'progress', 'created_by', 'created_at', 'finished_at']
+    list_filter = ['status', 'created_at']
+    readonly_fields = [
+        'status', 'total', 'succeeded', 'failed', 'progress', 'created_by',
+        'created_at', 'started_at', 'finished_at'
+    ]
+    actions = ['retry_failed_refunds']
+
+    def has_add_permission(self, request):
+        return False
+
+    @admin.display(description='Progress')
+    def progress(self, obj):
+        return f'{obj.progress}%'
+
+    @admin.action(description='Retry failed refunds')
+    def retry_failed_refunds(self, request, queryset):
+        count = 0
+        for batch in queryset.exclude(status=RefundBatchStatus.PROCESSING):
+            count += reset_failed_refunds(batch)
+            start_refund_batch(batch)
+        self.message_user(request, f'{count} failed refunds queued again')
+
+
+@admin.register(WebhookEvent)
+class WebhookEventAdmin(admin.ModelAdmin):
+    list_display = ['event_id', 'provider', 'event_type', 'status', 'attempts', 'received_at', 'processed_at']
+    list_filter = ['provider', 'status', 'received_at']
+    search_fields = ['event_id', 'event_type']
+    readonly_fields = ['provider', 'event_id', 'event_type', 'payload', 'attempts', 'last_error', 'received_at', 'processed_at']
+    actions = ['reprocess_events']
+
+    @admin.action(description='Reprocess selected events')
+    def reprocess_events(self, request, queryset):
+        events = list(queryset.exclude(status='processed').values_list('provider', 'event_id'))
+        for provider, event_id in events:
+            process_webhook_event.delay(provider, event_id)
+        self.message_user(request, f'{len(events)} events queued for processing')
+
+
+@admin.register(ReconciliationRun)
+class ReconciliationRunAdmin(admin.ModelAdmin):
+    list_display = ['id', 'status', 'scanned', 'completed', 'failed', 'unchanged', 'errors', 'throughput', 'started_at', 'finished_at']
+    list_filter = ['status', 'started_at']
+    readonly_fields = [
+        'status', 'scanned', 'completed', 'failed', 'unchanged', 'errors', 'fixed',
+        'duration_seconds', 'throughput', 'error_message', 'started_at', 'finished_at'
+    ]
+
+
+@admin.register(PaymentDailyAggregate)
+class PaymentDailyAggregateAdmin(admin.ModelAdmin):
+    list_display = ['date', 'provider', 'payment_type', 'currency', 'status', 'payment_count', 'total_amount']
+    list_filter = ['provider', 'payment_type', 'currency', 'status']
+    date_hierarchy = 'date'
+    readonly_fields = [
+        'date', 'provider', 'payment_type', 'currency', 'status', 'payment_count', 'total_amount', 'updated_at'
+    ]
+
+    def has_add_permission(self, request):
+        return False
+
+
+@admin.register(InvoiceNumberBlock)
+class InvoiceNumberBlockAdmin(admin.ModelAdmin):
+    list_display = ['year', 'first_value', 'last_value', 'worker', 'allocated_at']
+    list_filter = ['year']
+    readonly_fields = ['year', 'first_value', 'last_value', 'worker', 'allocated_at']
+
+    def has_add_permission(self, request):
+        return False
@@ -0,0 +1,127 @@
+from collections import defaultdict
+from datetime import datetime, time, timedelta
+from decimal import Decimal
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count, Sum
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+import logging
+
+from .models import Payment, PaymentStatus, PaymentDailyAggregate, PaymentAggregateWatermark
+
+logger = logging.getLogger(__name__)
+
+# Refunded payments were paid first, so they count as successful attempts
+SUCCESSFUL_STATUSES = [PaymentStatus.COMPLETED, PaymentStatus.REFUNDED]
+# Declined by the provider; cancelled checkouts were abandoned by the customer and stay out of the rate
+FAILED_STATUSES = [PaymentStatus.FAILED]
+
+
+def _day_range(day):
+    start = timezone.make_aware(datetime.combine(day, time.min))
+    end = timezone.make_aware(datetime.combine(day + timedelta(days=1), time.min))
+    return start, end
+
+
+def recompute_day(day):
+    start, end = _day_range(day)
+    rows = Payment.objects.filter(
+        created_at__gte=start,
+        created_at__lt=end
+    ).order_by().values('provider', 'payment_type', 'currency', 'status').annotate(
+        payment_count=Count('id'),
+        total_amount=Sum('amount')
+    )
+
+    PaymentDailyAggregate.objects.filter(date=day).delete()
+    PaymentDailyAggregate.objects.bulk_create([PaymentDailyAggregate(date=day, **row) for row in rows])
+
+
+def _all_days():
+    first = Payment.objects.order_by('created_at').values_list('created_at', flat=True).first()
+    if first is None:
+        return []
+    day, today = timezone.localdate(first), timezone.localdate()
+    return [day + timedelta(days=offset) for offset in range((today - day).days + 1)]
+
+
+def _affected_days(updated_since):
+    return set(
+        Payment.objects.filter(updated_at__gt=updated_since).order_by().annotate(
+            day=TruncDate('created_at')
+        ).values_list('day', flat=True).distinct()
+    )
+
+
+def refresh_payment_aggregates():
+    """
+    Recompute the daily aggregates of every day that has a payment created
+    or updated since the last run. Relies on every payment write, including
+    queryset updates, setting `updated_at`. Returns the number of days rebuilt.
+    """
+    started = timezone.now()
+
+    # The row lock keeps overlapping runs from rebuilding the same day twice
+    with transaction.atomic():
+        watermark = PaymentAggregateWatermark.objects.select_for_update().filter(id=1).first()
+        if watermark is None:
+            watermark = PaymentAggregateWatermark(id=1)
+            days = _all_days()
+        else:
+            days = _affected_days(watermark.updated_until)
+
+        for day in sorted(days):
+            recompute_day(day)
+
+        # Writes committing up to this lag after their updated_at are still picked up next run
+        watermark.updated_until = started - timedelta(seconds=settings.PAYMENT_AGGREGATE_LAG_SECONDS)
+        watermark.save()
+
+    if days:
+        logger.info(f"Rebuilt payment aggregates for {len(days)} days")
+    return len(days)
+
+
+def revenue_report(start, end, provider=None, currency=None):
+    """Revenue time series and provider success rates from the daily aggregates."""
+    queryset = PaymentDailyAggregate.objects.filter(date__gte=start, date__lte=end)
+    if provider:
+        queryset = queryset.filter(provider=provider)
+    if currency:
+        queryset = queryset.filter(currency=currency)
+
+    rows = queryset.order_by().values('date', 'provider', 'currency', 'status').annotate(
+        count=Sum('payment_count'),
+        amount=Sum('total_amount')
+    )
+
+    series = defaultdict(lambda: {'revenue': Decimal('0'), 'successful_count': 0, 'payment_count': 0})
+    providers = defaultdict(lambda: {'successful': 0, 'failed': 0, 'pending': 0, 'total': 0})
+
+    for row in rows:
+        point = series[(row['date'], row['currency'])]
+        stats = providers[row['provider']]
+
+        point['payment_count'] += row['count']
+        stats['total'] += row['count']
+        if row['status'] in SUCCESSFUL_STATUSES:
+            point['revenue'] += row['amount']
+            point['successful_count'] += row['count']
+            stats['successful'] += row['count']
+        elif row['status'] == PaymentStatus.PENDING:
+            stats['pending'] += row['count']
+        elif row['status'] in FAILED_STATUSES:
+            stats['failed'] += row['count']
+
+    for stats in providers.values():
+        settled = stats['successful'] + stats['failed']
+        stats['success_rate'] = round(stats['successful'] / settled, 4) if settled else None
+
+    return {
+        'series': [
+            {'date': day, 'currency': currency_code, **point}
+            for (day, currency_code), point in sorted(series.items())
+        ],
+        'providers': [{'provider': name, **stats} for name, stats in sorted(providers.items())],
+    }
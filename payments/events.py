@@ -0,0 +1,102 @@
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core import signing
+from django.db import transaction
+from redis.exceptions import RedisError
+import asyncio
+import json
+import logging
+
+from core.redis_client import create_async_redis_connection, get_redis_connection
+from .models import Payment, PaymentStatus
+
+logger = logging.getLogger(__name__)
+
+CHANNEL_FORMAT = 'payments:status:{payment_id}'
+TICKET_SALT = 'payments.status-stream'
+
+
+def issue_stream_ticket(user_id, payment_id):
+    """A short-lived ticket that only opens the status stream of one payment."""
+    return signing.dumps({'user': user_id, 'payment': payment_id}, salt=TICKET_SALT, compress=True)
+
+
+def read_stream_ticket(ticket, payment_id):
+    """The user id a ticket was issued to, or None if it is invalid, expired or for another payment."""
+    try:
+        data = signing.loads(ticket, salt=TICKET_SALT, max_age=settings.PAYMENT_STATUS_TICKET_TTL)
+    except signing.BadSignature:
+        return None
+    return data['user'] if data.get('payment') == payment_id else None
+
+
+def publish_payment_status(payment_id, status):
+    """Notify status listeners of `payment_id` once the current transaction commits."""
+    def publish():
+        try:
+            get_redis_connection().publish(
+                CHANNEL_FORMAT.format(payment_id=payment_id),
+                json.dumps({'payment_id': payment_id, 'status': status})
+            )
+        except RedisError as e:
+            logger.warning(f"Could not publish status of payment {payment_id}: {str(e)}")
+
+    transaction.on_commit(publish)
+
+
+@sync_to_async
+def _current_status(payment_id):
+    return Payment.objects.filter(payment_id=payment_id).values_list('status', flat=True).first()
+
+
+async def payment_status_changes(payment_id, timeout):
+    """
+    Yield the payment's status now and after every change until it leaves
+    `pending` or `timeout` seconds pass. Yields None as a heartbeat while
+    nothing happens. Notifications only trigger a re-read, so the database
+    stays the source of truth; without Redis it falls back to polling.
+    """
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + timeout
+    client = create_async_redis_connection()
+    pubsub = client.pubsub()
+
+    try:
+        try:
+            await pubsub.subscribe(CHANNEL_FORMAT.format(payment_id=payment_id))
+        except (RedisError, OSError) as e:
+            logger.warning(f"Payment status stream falling back to polling: {str(e)}")
+            pubsub = None
+
+        # Read after subscribing so a change in between is not missed
+        status = await _current_status(payment_id)
+        yield status
+
+        while status == PaymentStatus.PENDING:
+            remaining = deadline - loop.time()
+            if remaining <= 0:
+                return
+
+            if pubsub is None:
+                await asyncio.sleep(min(remaining, settings.PAYMENT_STATUS_POLL_INTERVAL))
+                message = True
+            else:
+                message = await pubsub.get_message(
+                    ignore_subscribe_messages=True,
+                    timeout=min(remaining, settings.PAYMENT_STATUS_HEARTBEAT_INTERVAL)
+                )
+
+            if message is None:
+                yield None
+                continue
+
+            new_status = await _current_status(payment_id)
+            if new_status != status:
+                status = new_status
+                yield status
+            elif pubsub is None:
+                yield None
+    finally:
+        if pubsub is not None:
+            await pubsub.aclose()
+        await client.aclose()
@@ -0,0 +1,157 @@
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, IntegrityError, connections
+from django.utils import timezone
+import os
+import socket
+import threading
+
+from .models import Invoice, InvoiceSequence, InvoiceNumberBlock
+
+PREFIX = 'INV'
+
+
+def format_invoice_number(year, value):
+    return f'{PREFIX}-{year}-{value:06d}'
+
+
+def parse_invoice_number(invoice_number):
+    try:
+        prefix, year, value = invoice_number.split('-')
+    except ValueError:
+        return None
+    if prefix != PREFIX or not year.isdigit() or not value.isdigit():
+        return None
+    return int(year), int(value)
+
+
+def allocate_block(year, size, worker=''):
+    """
+    Reserve `size` consecutive numbers for `year` and return (start, end),
+    inclusive. Runs on its own short-lived connection and commits at once,
+    so a caller's transaction neither holds the sequence lock nor can roll
+    back a block that is already cached in memory.
+    """
+    connection = connections.create_connection(DEFAULT_DB_ALIAS)
+    quote = connection.ops.quote_name
+    sequence_table = quote(InvoiceSequence._meta.db_table)
+    block_table = quote(InvoiceNumberBlock._meta.db_table)
+
+    try:
+        with connection.cursor() as cursor:
+            cursor.execute(f'SELECT 1 FROM {sequence_table} WHERE year = %s', [year])
+            if cursor.fetchone() is None:
+                try:
+                    cursor.execute(f'INSERT INTO {sequence_table} (year, next_value) VALUES (%s, 1)', [year])
+                except IntegrityError:
+                    pass
+
+        connection.set_autocommit(False)
+        try:
+            with connection.cursor() as cursor:
+                # The UPDATE's row lock is held until the commit below, once per block
+                cursor.execute(
+                    f'UPDATE {sequence_table} SET next_value = next_value + %s WHERE year = %s', [size, year]
+                )
+                cursor.execute(f'SELECT next_value FROM {sequence_table} WHERE year = %s', [year])
+                end = cursor.fetchone()[0] - 1
+                start = end - size + 1
+                cursor.execute(
+                    f'INSERT INTO {block_table} (year, first_value, last_value, worker, allocated_at) '
+                    f'VALUES (%s, %s, %s, %s, %s)',
+                    [year, start, end, worker, connection.ops.adapt_datetimefield_value(timezone.now())]
+                )
+            connection.commit()
+        except Exception:
+            connection.rollback()
+            raise
+    finally:
+        connection.close()
+    return start, end
+
+
+class InvoiceNumberAllocator:
+    """
+    Hands out invoice numbers from a block cached in this worker, so the
+    sequence row is touched once per block instead of once per invoice.
+    Numbers are strictly unique and increase per worker, not globally.
+    Numbers left in a block when a worker exits, or taken by an invoice
+    whose transaction rolled back, show up in audit_invoice_numbers.
+    """
+
+    def __init__(self, block_size=None, year=None):
+        self.block_size = block_size
+        self.fixed_year = year
+        self.lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        self.year = None
+        self.next_value = 0
+        self.end = -1
+
+    def next(self):
+        year = self.fixed_year or timezone.localdate().year
+        with self.lock:
+            if year != self.year or self.next_value > self.end:
+                self.next_value, self.end = allocate_block(
+                    year,
+                    self.block_size or settings.INVOICE_NUMBER_BLOCK_SIZE,
+                    worker=f'{socket.gethostname()}:{os.getpid()}'
+                )
+                self.year = year
+            value = self.next_value
+            self.next_value += 1
+        return format_invoice_number(year, value)
+
+
+_allocator = InvoiceNumberAllocator()
+
+# A forked worker must not reuse the block its parent had cached
+os.register_at_fork(after_in_child=_allocator.reset)
+
+
+def next_invoice_number():
+    return _allocator.next()
+
+
+def audit_invoice_numbers(year):
+    """
+    Compare allocated blocks with issued invoice numbers for `year`. Returns
+    counts, the unused ranges inside blocks and numbers issued outside any
+    block (e.g. typed in by hand).
+    """
+    blocks = list(InvoiceNumberBlock.objects.filter(year=year).values_list('first_value', 'last_value'))
+
+    issued = set()
+    for invoice_number in Invoice.objects.filter(
+        invoice_number__startswith=f'{PREFIX}-{year}-'
+    ).values_list('invoice_number', flat=True).iterator():
+        parsed = parse_invoice_number(invoice_number)
+        if parsed is not None:
+            issued.add(parsed[1])
+
+    gaps = []
+    allocated = 0
+    covered = set()
+    for start, end in blocks:
+        allocated += end - start + 1
+        gap_start = None
+        for value in range(start, end + 1):
+            if value in issued:
+                covered.add(value)
+                if gap_start is not None:
+                    gaps.append((gap_start, value - 1))
+                    gap_start = None
+            elif gap_start is None:
+                gap_start = value
+        if gap_start is not None:
+            gaps.append((gap_start, end))
+
+    return {
+        'year': year,
+        'allocated': allocated,
+        'issued': len(issued),
+        'unused': allocated - len(covered),
+        'gaps': gaps,
+        'outside_blocks': [format_invoice_number(year, value) for value in sorted(issued - covered)],
+    }
@@ -0,0 +1,57 @@
+from django.core.files.base import ContentFile
+from django.template.loader import render_to_string
+from django.utils import timezone
+from io import BytesIO
+from xhtml2pdf import pisa
+import hashlib
+import logging
+
+from .models import Invoice
+from .storage import invoice_storage
+
+logger = logging.getLogger(__name__)
+
+TEMPLATE_NAME = 'invoices/invoice.html'
+
+
+def render_invoice_html(invoice):
+    return render_to_string(TEMPLATE_NAME, {'invoice': invoice, 'payment': invoice.payment})
+
+
+def html_to_pdf(html):
+    output = BytesIO()
+    result = pisa.CreatePDF(html, dest=output, encoding='utf-8')
+    if result.err:
+        raise ValueError(f'PDF rendering failed with {result.err} errors')
+    return output.getvalue()
+
+
+def generate_invoice_pdf(invoice_id):
+    """
+    Render an invoice to PDF and store it under the hash of its HTML.
+    Unchanged invoices, and invoices whose content was already rendered
+    once, are never converted again. Returns the storage path.
+    """
+    invoice = Invoice.objects.select_related('payment').get(id=invoice_id)
+
+    html = render_invoice_html(invoice)
+    content_hash = hashlib.sha256(html.encode()).hexdigest()
+    path = f'invoices/{content_hash}.pdf'
+
+    if invoice.pdf_hash == content_hash and invoice.pdf_file:
+        return invoice.pdf_file.name
+
+    storage = invoice_storage()
+    if not storage.exists(path):
+        saved_path = storage.save(path, ContentFile(html_to_pdf(html)))
+        if saved_path != path:
+            # Lost a race against an identical render; keep the canonical object
+            storage.delete(saved_path)
+        logger.info(f"Rendered invoice {invoice.invoice_number} to {path}")
+
+    Invoice.objects.filter(id=invoice.id).update(
+        pdf_file=path,
+        pdf_hash=content_hash,
+        pdf_generated_at=timezone.now()
+    )
+    return path
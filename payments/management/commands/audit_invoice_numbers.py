@@ -0,0 +1,23 @@
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from payments.invoice_numbers import audit_invoice_numbers
+
+
+class Command(BaseCommand):
+    help = 'Report allocated but unused invoice numbers for a year'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--year', type=int, default=None)
+
+    def handle(self, *args, **options):
+        report = audit_invoice_numbers(options['year'] or timezone.localdate().year)
+
+        self.stdout.write(
+            f"{report['year']}: {report['allocated']} allocated, {report['issued']} issued, "
+            f"{report['unused']} unused"
+        )
+        for first, last in report['gaps']:
+            self.stdout.write(f"  gap {first}-{last}" if first != last else f"  gap {first}")
+        for invoice_number in report['outside_blocks']:
+            self.stdout.write(self.style.WARNING(f"  issued outside any block: {invoice_number}"))
@@ -0,0 +1,61 @@
+from concurrent.futures import ThreadPoolExecutor
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+import time
+
+from payments.invoice_numbers import InvoiceNumberAllocator, parse_invoice_number
+from payments.models import InvoiceSequence, InvoiceNumberBlock
+
+
+class Command(BaseCommand):
+    help = 'Allocate invoice numbers from parallel workers and verify they are unique and block-covered'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=8)
+        parser.add_argument('--per-worker', type=int, default=1000)
+        parser.add_argument('--block-size', type=int, default=50)
+        parser.add_argument('--year', type=int, default=9999, help='Scratch year, so real sequences are untouched')
+        parser.add_argument('--keep', action='store_true', help='Keep the scratch sequence and blocks')
+
+    def handle(self, *args, **options):
+        year = options['year']
+        if InvoiceSequence.objects.filter(year=year).exists():
+            raise CommandError(f'Year {year} already has a sequence; pick another --year')
+
+        def worker(_):
+            # One allocator per thread stands in for one worker process
+            allocator = InvoiceNumberAllocator(block_size=options['block_size'], year=year)
+            try:
+                return [allocator.next() for _ in range(options['per_worker'])]
+            finally:
+                connections.close_all()
+
+        started = time.monotonic()
+        with ThreadPoolExecutor(max_workers=options['workers']) as pool:
+            results = list(pool.map(worker, range(options['workers'])))
+        elapsed = time.monotonic() - started
+
+        numbers = [parse_invoice_number(number)[1] for batch in results for number in batch]
+        blocks = list(InvoiceNumberBlock.objects.filter(year=year).values_list('first_value', 'last_value'))
+        covered = {value for first, last in blocks for value in range(first, last + 1)}
+
+        duplicates = len(numbers) - len(set(numbers))
+        outside = len(set(numbers) - covered)
+        overlapping = len(covered) != sum(last - first + 1 for first, last in blocks)
+
+        self.stdout.write(
+            f"{len(numbers)} numbers from {options['workers']} workers in {elapsed:.2f}s "
+            f"({len(numbers) / elapsed:.0f}/s), {len(blocks)} blocks of {options['block_size']}"
+        )
+        self.stdout.write(f"Unused numbers in blocks: {len(covered) - len(set(numbers))}")
+
+        if not options['keep']:
+            InvoiceNumberBlock.objects.filter(year=year).delete()
+            InvoiceSequence.objects.filter(year=year).delete()
+
+        if duplicates or outside or overlapping:
+            raise CommandError(
+                f'Allocation is broken: {duplicates} duplicates, {outside} outside blocks, '
+                f'overlapping blocks: {overlapping}'
+            )
+        self.stdout.write(self.style.SUCCESS('All numbers unique and covered by non-overlapping blocks'))
@@ -0,0 +1,22 @@
+from django.core.management.base import BaseCommand
+
+from payments.refunds import create_refund_batch_from_csv
+from payments.tasks import start_refund_batch
+
+
+class Command(BaseCommand):
+    help = 'Create a refund batch from a CSV file with a payment_id column'
+
+    def add_arguments(self, parser):
+        parser.add_argument('csv_path')
+        parser.add_argument('--reason', required=True)
+        parser.add_argument('--start', action='store_true', help='Start processing right away')
+
+    def handle(self, *args, **options):
+        with open(options['csv_path'], newline='') as file:
+            batch = create_refund_batch_from_csv(file, options['reason'])
+
+        self.stdout.write(self.style.SUCCESS(f'Created refund batch {batch.id} with {batch.total} refunds'))
+        if options['start']:
+            start_refund_batch(batch)
+            self.stdout.write(f'Refund batch {batch.id} started')
@@ -0,0 +1,80 @@
+from django.core.management.base import BaseCommand
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import json
+import random
+import time
+import uuid
+
+
+class FakeProviderHandler(BaseHTTPRequestHandler):
+    latency = 0.0
+    failure_rate = 0.0
+
+    def do_GET(self):
+        time.sleep(self.latency)
+
+        if random.random() < self.failure_rate:
+            return self._send(503, {'error': 'Simulated outage'})
+
+        # Every checkout the fake hands out is eventually paid, every refund goes through
+        if self.path.startswith(('/payments/', '/refunds/')):
+            return self._send(200, {'id': f'fake_{uuid.uuid4().hex}', 'status': 'succeeded'})
+        return self._send(404, {'error': 'Not found'})
+
+    def do_POST(self):
+        time.sleep(self.latency)
+
+        try:
+            body = json.loads(self.rfile.read(int(self.headers.get('Content-Length', 0))) or b'{}')
+        except json.JSONDecodeError:
+            return self._send(400, {'error': 'Invalid JSON'})
+
+        if random.random() < self.failure_rate:
+            return self._send(503, {'error': 'Simulated outage'})
+
+        provider_payment_id = f'fake_{uuid.uuid4().hex}'
+        if self.path == '/checkout':
+            return self._send(200, {
+                'id': provider_payment_id,
+                'url': f'http://{self.headers.get("Host")}/pay/{body.get("payment_id")}',
+                'status': 'open'
+            })
+        if self.path in ('/charges', '/refunds'):
+            return self._send(200, {'id': provider_payment_id, 'status': 'succeeded'})
+        return self._send(404, {'error': 'Not found'})
+
+    def _send(self, status_code, data):
+        content = json.dumps(data).encode()
+        self.send_response(status_code)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(content)))
+        self.end_headers()
+        self.wfile.write(content)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class Command(BaseCommand):
+    help = 'Run a local fake payment provider for development and load tests'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--host', default='127.0.0.1')
+        parser.add_argument('--port', type=int, default=8099)
+        parser.add_argument('--latency-ms', type=int, default=0, help='Delay added to every response')
+        parser.add_argument('--failure-rate', type=float, default=0.0, help='Share of requests answered with 503')
+
+    def handle(self, *args, **options):
+        FakeProviderHandler.latency = options['latency_ms'] / 1000
+        FakeProviderHandler.failure_rate = options['failure_rate']
+
+        server = ThreadingHTTPServer((options['host'], options['port']), FakeProviderHandler)
+        self.stdout.write(self.style.SUCCESS(
+            f"Fake payment provider listening on http://{options['host']}:{options['port']}"
+        ))
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            server.server_close()
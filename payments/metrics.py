@@ -0,0 +1,42 @@
+from redis.exceptions import RedisError
+import logging
+
+from core.redis_client import get_redis_connection
+
+logger = logging.getLogger(__name__)
+
+KEY_FORMAT = 'payments:provider_metrics:{provider}'
+
+
+def record_provider_call(provider, operation, duration_ms, error=None):
+    if error:
+        logger.warning(f"{provider} {operation} error after {duration_ms:.0f}ms: {error}")
+    else:
+        logger.info(f"{provider} {operation} took {duration_ms:.0f}ms")
+
+    try:
+        pipe = get_redis_connection().pipeline(transaction=False)
+        key = KEY_FORMAT.format(provider=provider)
+        pipe.hincrby(key, f'{operation}:count', 1)
+        pipe.hincrbyfloat(key, f'{operation}:total_ms', round(duration_ms, 3))
+        if error:
+            pipe.hincrby(key, f'{operation}:errors', 1)
+        pipe.execute()
+    except RedisError as e:
+        logger.debug(f"Could not record provider metrics: {str(e)}")
+
+
+def get_provider_metrics(provider):
+    """Per-operation call count, error count and average latency for a provider."""
+    raw = get_redis_connection().hgetall(KEY_FORMAT.format(provider=provider))
+
+    metrics = {}
+    for field, value in raw.items():
+        operation, name = field.decode().rsplit(':', 1)
+        metrics.setdefault(operation, {'count': 0, 'errors': 0, 'total_ms': 0.0})[name] = float(value)
+
+    for values in metrics.values():
+        values['count'] = int(values['count'])
+        values['errors'] = int(values['errors'])
+        values['avg_ms'] = round(values['total_ms'] / values['count'], 2) if values['count'] else 0
+    return metrics
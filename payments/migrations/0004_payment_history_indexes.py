@@ -0,0 +1,27 @@
+# Generated by Django 5.2.18 on 2026-10-19 14:26
+
+from django.conf import settings
+from django.db import migrations, models
+
+from core.migration_operations import AddIndexConcurrentlyIfSupported
+
+
+class Migration(migrations.Migration):
+    atomic = False
+
+    dependencies = [
+        ('payments', '0003_webhookevent'),
+        ('subscriptions', '0005_renewalrun_subscription_status_end_date_index'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        AddIndexConcurrentlyIfSupported(
+            model_name='payment',
+            index=models.Index(fields=['user', '-created_at', '-id'], name='payments_pa_user_id_2473a7_idx'),
+        ),
+        AddIndexConcurrentlyIfSupported(
+            model_name='payment',
+            index=models.Index(fields=['provider_payment_id'], name='payments_pa_provide_adf74c_idx'),
+        ),
+    ]
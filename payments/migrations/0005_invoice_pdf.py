@@ -0,0 +1,28 @@
+# Generated by Django 5.2.18 on 2026-10-19 14:28
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('payments', '0004_payment_history_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='invoice',
+            name='pdf_file',
+            field=models.FileField(blank=True, upload_to='invoices/'),
+        ),
+        migrations.AddField(
+            model_name='invoice',
+            name='pdf_generated_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='invoice',
+            name='pdf_hash',
+            field=models.CharField(blank=True, max_length=64),
+        ),
+    ]
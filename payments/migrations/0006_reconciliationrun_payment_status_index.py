@@ -0,0 +1,42 @@
+# Generated by Django 5.2.18 on 2026-10-19 14:30
+
+from django.conf import settings
+from django.db import migrations, models
+
+from core.migration_operations import AddIndexConcurrentlyIfSupported
+
+
+class Migration(migrations.Migration):
+    atomic = False
+
+    dependencies = [
+        ('payments', '0005_invoice_pdf'),
+        ('subscriptions', '0005_renewalrun_subscription_status_end_date_index'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ReconciliationRun',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('status', models.CharField(choices=[('running', 'Running'), ('completed', 'Completed'), ('failed', 'Failed')], default='running', max_length=20)),
+                ('scanned', models.IntegerField(default=0)),
+                ('completed', models.IntegerField(default=0, help_text='Pending payments the provider reported as paid')),
+                ('failed', models.IntegerField(default=0, help_text='Pending payments the provider reported as failed or expired')),
+                ('unchanged', models.IntegerField(default=0)),
+                ('errors', models.IntegerField(default=0, help_text='Payments whose provider lookup failed')),
+                ('duration_seconds', models.FloatField(default=0)),
+                ('error_message', models.TextField(blank=True)),
+                ('started_at', models.DateTimeField(auto_now_add=True)),
+                ('finished_at', models.DateTimeField(blank=True, null=True)),
+            ],
+            options={
+                'ordering': ['-started_at'],
+            },
+        ),
+        AddIndexConcurrentlyIfSupported(
+            model_name='payment',
+            index=models.Index(fields=['status', 'created_at', 'id'], name='payments_pa_status_8d2518_idx'),
+        ),
+    ]
@@ -0,0 +1,56 @@
+# Generated by Django 5.2.18 on 2026-10-19 14:31
+
+from decimal import Decimal
+from django.conf import settings
+from django.db import migrations, models
+
+from core.migration_operations import AddIndexConcurrentlyIfSupported
+
+
+class Migration(migrations.Migration):
+    atomic = False
+
+    dependencies = [
+        ('payments', '0006_reconciliationrun_payment_status_index'),
+        ('subscriptions', '0005_renewalrun_subscription_status_end_date_index'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PaymentAggregateWatermark',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('updated_until', models.DateTimeField()),
+            ],
+        ),
+        migrations.CreateModel(
+            name='PaymentDailyAggregate',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField()),
+                ('provider', models.CharField(choices=[('stripe', 'Stripe'), ('iyzico', 'iyzico'), ('paytr', 'PayTR')], max_length=20)),
+                ('payment_type', models.CharField(choices=[('subscription', 'Subscription'), ('workflow_purchase', 'Workflow Purchase'), ('one_time', 'One Time Payment')], max_length=30)),
+                ('currency', models.CharField(max_length=3)),
+                ('status', models.CharField(choices=[('pending', 'Pending'), ('completed', 'Completed'), ('failed', 'Failed'), ('cancelled', 'Cancelled'), ('refunded', 'Refunded')], max_length=20)),
+                ('payment_count', models.IntegerField(default=0)),
+                ('total_amount', models.DecimalField(decimal_places=2, default=Decimal('0'), max_digits=16)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'ordering': ['-date'],
+            },
+        ),
+        AddIndexConcurrentlyIfSupported(
+            model_name='payment',
+            index=models.Index(fields=['created_at'], name='payments_pa_created_b8a300_idx'),
+        ),
+        AddIndexConcurrentlyIfSupported(
+            model_name='payment',
+            index=models.Index(fields=['updated_at'], name='payments_pa_updated_e44ec3_idx'),
+        ),
+        migrations.AlterUniqueTogether(
+            name='paymentdailyaggregate',
+            unique_together={('date', 'provider', 'payment_type', 'currency', 'status')},
+        ),
+    ]
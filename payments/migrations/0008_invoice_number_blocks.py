@@ -0,0 +1,36 @@
+# Generated by Django 5.2.18 on 2026-10-19 14:33
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('payments', '0007_payment_daily_aggregates'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='InvoiceSequence',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('year', models.PositiveIntegerField(unique=True)),
+                ('next_value', models.BigIntegerField(default=1)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='InvoiceNumberBlock',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('year', models.PositiveIntegerField()),
+                ('first_value', models.BigIntegerField()),
+                ('last_value', models.BigIntegerField()),
+                ('worker', models.CharField(blank=True, max_length=100)),
+                ('allocated_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'ordering': ['year', 'first_value'],
+                'unique_together': {('year', 'first_value')},
+            },
+        ),
+    ]
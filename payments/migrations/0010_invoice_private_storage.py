@@ -0,0 +1,27 @@
+# Generated by Django 5.2.18 on 2026-10-19 15:06
+
+import payments.storage
+from django.db import migrations, models
+
+
+def forget_public_pdfs(apps, schema_editor):
+    # PDFs rendered so far live in the public default storage. Dropping the
+    # pointers makes the next invoice view re-render them privately.
+    Invoice = apps.get_model('payments', 'Invoice')
+    Invoice.objects.exclude(pdf_file='').update(pdf_file='', pdf_hash='', pdf_generated_at=None)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('payments', '0009_refund_batches'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='invoice',
+            name='pdf_file',
+            field=models.FileField(blank=True, storage=payments.storage.invoice_storage, upload_to='invoices/'),
+        ),
+        migrations.RunPython(forget_public_pdfs, migrations.RunPython.noop),
+    ]
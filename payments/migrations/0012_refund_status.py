@@ -0,0 +1,38 @@
+# Generated by Django 5.2.18 on 2026-10-19 15:19
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('payments', '0011_refund_processing_status'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='refund',
+            name='claimed_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AlterField(
+            model_name='payment',
+            name='status',
+            field=models.CharField(choices=[('pending', 'Pending'), ('completed', 'Completed'), ('failed', 'Failed'), ('cancelled', 'Cancelled'), ('refunded', 'Refunded')], default='pending', max_length=20),
+        ),
+        migrations.AlterField(
+            model_name='paymentdailyaggregate',
+            name='status',
+            field=models.CharField(choices=[('pending', 'Pending'), ('completed', 'Completed'), ('failed', 'Failed'), ('cancelled', 'Cancelled'), ('refunded', 'Refunded')], max_length=20),
+        ),
+        migrations.AlterField(
+            model_name='refund',
+            name='refund_id',
+            field=models.CharField(max_length=120, unique=True),
+        ),
+        migrations.AlterField(
+            model_name='refund',
+            name='status',
+            field=models.CharField(choices=[('pending', 'Pending'), ('processing', 'Processing'), ('completed', 'Completed'), ('failed', 'Failed')], max_length=20),
+        ),
+    ]
@@ -2,6 +2,8 @@ from django.db import models
 from django.contrib.auth import get_user_model
 from decimal import Decimal
 
+from .storage import invoice_storage
+
 User = get_user_model()
 
 
@@ -53,6 +55,13 @@ class Payment(models.Model):
 
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['user', '-created_at', '-id']),
+            models.Index(fields=['provider_payment_id']),
+            models.Index(fields=['status', 'created_at', 'id']),
+            models.Index(fields=['created_at']),
+            models.Index(fields=['updated_at']),
+        ]
 
     def __str__(self):
         return f"{self.user.email} - {self.amount} {self.currency} - {self.status}"
@@ -96,19 +105,199 @@ class Invoice(models.Model):
 
     issued_at = models.DateTimeField(auto_now_add=True)
 
+    # Content-addressed: the file name is the sha256 of the rendered HTML
+    pdf_file = models.FileField(upload_to='invoices/', storage=invoice_storage, blank=True)
+    pdf_hash = models.CharField(max_length=64, blank=True)
+    pdf_generated_at = models.DateTimeField(null=True, blank=True)
+
+    def save(self, *args, **kwargs):
+        if not self.invoice_number:
+            from .invoice_numbers import next_invoice_number
+            self.invoice_number = next_invoice_number()
+        super().save(*args, **kwargs)
+
     def __str__(self):
         return f"Invoice {self.invoice_number} - {self.total_amount}"
 
 
+class RefundStatus(models.TextChoices):
+    PENDING = 'pending', 'Pending'
+    # Sent to the provider, outcome not recorded yet
+    PROCESSING = 'processing', 'Processing'
+    COMPLETED = 'completed', 'Completed'
+    FAILED = 'failed', 'Failed'
+
+
+class RefundBatchStatus(models.TextChoices):
+    PENDING = 'pending', 'Pending'
+    PROCESSING = 'processing', 'Processing'
+    COMPLETED = 'completed', 'Completed'
+
+
+class RefundBatch(models.Model):
+    reason = models.TextField()
+    status = models.CharField(max_length=20, choices=RefundBatchStatus.choices, default=RefundBatchStatus.PENDING)
+    total = models.IntegerField(default=0)
+    succeeded = models.IntegerField(default=0)
+    failed = models.IntegerField(default=0)
+    created_by = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True, related_name='+')
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    def __str__(self):
+        return f"Refund batch {self.id} - {self.status}"
+
+    @property
+    def processed(self):
+        return self.succeeded + self.failed
+
+    @property
+    def progress(self):
+        if not self.total:
+            return 0
+        return round(self.processed * 100 / self.total, 1)
+
+    class Meta:
+        ordering = ['-created_at']
+        verbose_name_plural = 'refund batches'
+
+
 class Refund(models.Model):
     payment = models.ForeignKey(Payment, on_delete=models.CASCADE, related_name='refunds')
-    refund_id = models.CharField(max_length=100, unique=True)
+    batch = models.ForeignKey(RefundBatch, on_delete=models.SET_NULL, null=True, blank=True, related_name='refunds')
+    refund_id = models.CharField(max_length=120, unique=True)
     amount = models.DecimalField(max_digits=10, decimal_places=2)
     reason = models.TextField()
-    status = models.CharField(max_length=20, choices=PaymentStatus.choices)
+    status = models.CharField(max_length=20, choices=RefundStatus.choices)
     provider_refund_id = models.CharField(max_length=200, blank=True)
+    error_message = models.TextField(blank=True)
+    claimed_at = models.DateTimeField(null=True, blank=True)
     processed_at = models.DateTimeField(null=True, blank=True)
     created_at = models.DateTimeField(auto_now_add=True)
 
     def __str__(self):
         return f"Refund {self.refund_id} - {self.amount}"
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['batch', 'status']),
+        ]
+
+
+class WebhookEventStatus(models.TextChoices):
+    PENDING = 'pending', 'Pending'
+    PROCESSED = 'processed', 'Processed'
+    FAILED = 'failed', 'Failed'
+
+
+class WebhookEvent(models.Model):
+    provider = models.CharField(max_length=20, choices=PaymentProvider.choices)
+    event_id = models.CharField(max_length=200)
+    event_type = models.CharField(max_length=100, blank=True)
+    payload = models.JSONField(default=dict)
+    status = models.CharField(max_length=20, choices=WebhookEventStatus.choices, default=WebhookEventStatus.PENDING)
+    attempts = models.IntegerField(default=0)
+    last_error = models.TextField(blank=True)
+    received_at = models.DateTimeField(auto_now_add=True)
+    processed_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ['-received_at']
+        unique_together = ['provider', 'event_id']
+        indexes = [
+            models.Index(fields=['status', 'received_at']),
+        ]
+
+    def __str__(self):
+        return f"{self.provider} {self.event_type or 'event'} {self.event_id} - {self.status}"
+
+
+class InvoiceSequence(models.Model):
+    """Next unallocated invoice number per year; advanced a whole block at a time."""
+    year = models.PositiveIntegerField(unique=True)
+    next_value = models.BigIntegerField(default=1)
+
+    def __str__(self):
+        return f"Invoice sequence {self.year} at {self.next_value}"
+
+
+class InvoiceNumberBlock(models.Model):
+    """A range of invoice numbers handed to one worker, kept for gap audits."""
+    year = models.PositiveIntegerField()
+    first_value = models.BigIntegerField()
+    last_value = models.BigIntegerField()
+    worker = models.CharField(max_length=100, blank=True)
+    allocated_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f"{self.year}: {self.first_value}-{self.last_value}"
+
+    class Meta:
+        ordering = ['year', 'first_value']
+        unique_together = ['year', 'first_value']
+
+
+class ReconciliationRunStatus(models.TextChoices):
+    RUNNING = 'running', 'Running'
+    COMPLETED = 'completed', 'Completed'
+    FAILED = 'failed', 'Failed'
+
+
+class ReconciliationRun(models.Model):
+    status = models.CharField(
+        max_length=20, choices=ReconciliationRunStatus.choices, default=ReconciliationRunStatus.RUNNING
+    )
+    scanned = models.IntegerField(default=0)
+    completed = models.IntegerField(default=0, help_text="Pending payments the provider reported as paid")
+    failed = models.IntegerField(default=0, help_text="Pending payments the provider reported as failed or expired")
+    unchanged = models.IntegerField(default=0)
+    errors = models.IntegerField(default=0, help_text="Payments whose provider lookup failed")
+    duration_seconds = models.FloatField(default=0)
+    error_message = models.TextField(blank=True)
+    started_at = models.DateTimeField(auto_now_add=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    def __str__(self):
+        return f"Reconciliation run {self.id} - {self.status}"
+
+    @property
+    def fixed(self):
+        return self.completed + self.failed
+
+    @property
+    def throughput(self):
+        if not self.duration_seconds:
+            return 0
+        return round(self.scanned / self.duration_seconds, 2)
+
+    class Meta:
+        ordering = ['-started_at']
+
+
+class PaymentDailyAggregate(models.Model):
+    """Payments per local day, maintained by payments.analytics.refresh_payment_aggregates."""
+    date = models.DateField()
+    provider = models.CharField(max_length=20, choices=PaymentProvider.choices)
+    payment_type = models.CharField(max_length=30, choices=PaymentType.choices)
+    currency = models.CharField(max_length=3)
+    status = models.CharField(max_length=20, choices=PaymentStatus.choices)
+    payment_count = models.IntegerField(default=0)
+    total_amount = models.DecimalField(max_digits=16, decimal_places=2, default=Decimal('0'))
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.date} {self.provider} {self.payment_type} {self.status}: {self.payment_count}"
+
+    class Meta:
+        ordering = ['-date']
+        # Also serves date range scans, date being the leading column
+        unique_together = ['date', 'provider', 'payment_type', 'currency', 'status']
+
+
+class PaymentAggregateWatermark(models.Model):
+    """Single row: payments updated before `updated_until` are reflected in the aggregates."""
+    updated_until = models.DateTimeField()
+
+    def __str__(self):
+        return f"Payment aggregates up to {self.updated_until}"
@@ -0,0 +1,62 @@
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import CursorPagination, Cursor
+from django.db.models import Q
+from django.utils.dateparse import parse_datetime
+
+
+class PaymentHistoryPagination(CursorPagination):
+    """
+    Keyset pagination on (created_at, id). The cursor carries the last row's
+    key, so every page is a single index range scan regardless of depth.
+    """
+    ordering = ('-created_at', '-id')
+    page_size = 20
+    page_size_query_param = 'page_size'
+    max_page_size = 100
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.page_size = self.get_page_size(request)
+        self.base_url = request.build_absolute_uri()
+        self.cursor = self.decode_cursor(request)
+
+        reverse = bool(self.cursor and self.cursor.reverse)
+        if self.cursor and self.cursor.position:
+            created_at, pk = self._decode_position(self.cursor.position)
+            if reverse:
+                queryset = queryset.filter(Q(created_at__gt=created_at) | Q(created_at=created_at, id__gt=pk))
+            else:
+                queryset = queryset.filter(Q(created_at__lt=created_at) | Q(created_at=created_at, id__lt=pk))
+
+        order = ('created_at', 'id') if reverse else self.ordering
+        results = list(queryset.order_by(*order)[:self.page_size + 1])
+        has_more = len(results) > self.page_size
+        self.page = results[:self.page_size]
+
+        if reverse:
+            self.page.reverse()
+            self.has_next, self.has_previous = True, has_more
+        else:
+            self.has_next, self.has_previous = has_more, bool(self.cursor and self.cursor.position)
+
+        return self.page
+
+    def get_next_link(self):
+        if not self.has_next or not self.page:
+            return None
+        return self.encode_cursor(Cursor(offset=0, reverse=False, position=self._encode_position(self.page[-1])))
+
+    def get_previous_link(self):
+        if not self.has_previous or not self.page:
+            return None
+        return self.encode_cursor(Cursor(offset=0, reverse=True, position=self._encode_position(self.page[0])))
+
+    def _encode_position(self, instance):
+        return f'{instance.created_at.isoformat()}|{instance.id}'
+
+    def _decode_position(self, position):
+        created_at, _, pk = position.rpartition('|')
+        created_at = parse_datetime(created_at)
+        if created_at is None or not pk.isdigit():
+            raise NotFound(self.invalid_cursor_message)
+        return created_at, int(pk)
@@ -0,0 +1,45 @@
+from django.conf import settings
+import threading
+
+from .base import (
+    PaymentProviderAdapter, ChargeResult, CheckoutSession, PaymentEvent, ProviderError, RefundResult
+)
+from .fake import FakeProvider
+from .iyzico import IyzicoProvider
+from .paytr import PaytrProvider
+from .stripe import StripeProvider
+
+ADAPTERS = {
+    'stripe': StripeProvider,
+    'iyzico': IyzicoProvider,
+    'paytr': PaytrProvider,
+}
+
+_adapters = {}
+_lock = threading.Lock()
+
+
+def get_provider(name) -> PaymentProviderAdapter:
+    adapter = _adapters.get(name)
+    if adapter is not None:
+        return adapter
+
+    with _lock:
+        if name in _adapters:
+            return _adapters[name]
+
+        if settings.PAYMENTS_FAKE_PROVIDER:
+            adapter = FakeProvider(name, settings.PAYMENTS_FAKE_PROVIDER_URL)
+        elif name in ADAPTERS:
+            adapter = ADAPTERS[name](settings.PAYMENT_PROVIDERS.get(name, {}))
+        else:
+            raise ProviderError(f"No payment adapter configured for provider '{name}'")
+
+        _adapters[name] = adapter
+    return adapter
+
+
+__all__ = [
+    'get_provider', 'PaymentProviderAdapter', 'ChargeResult', 'CheckoutSession',
+    'PaymentEvent', 'ProviderError', 'RefundResult', 'FakeProvider',
+]
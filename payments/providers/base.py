@@ -0,0 +1,82 @@
+from dataclasses import dataclass, field
+from decimal import Decimal
+from typing import List, Optional
+
+
+def to_minor_units(amount):
+    return int((Decimal(amount) * 100).quantize(Decimal('1')))
+
+
+class ProviderError(Exception):
+    pass
+
+
+@dataclass
+class ChargeResult:
+    success: bool
+    provider_payment_id: str = ''
+    response: dict = field(default_factory=dict)
+    error: str = ''
+
+
+@dataclass
+class RefundResult:
+    success: bool
+    provider_refund_id: str = ''
+    response: dict = field(default_factory=dict)
+    error: str = ''
+
+
+@dataclass
+class CheckoutSession:
+    url: str
+    provider_payment_id: str = ''
+    response: dict = field(default_factory=dict)
+
+
+@dataclass
+class PaymentEvent:
+    payment_id: str
+    status: str
+    provider_payment_id: str = ''
+
+
+class PaymentProviderAdapter:
+    name = None
+
+    def create_checkout(self, payment, data) -> CheckoutSession:
+        """Start a hosted checkout for `payment` and return where to send the customer."""
+        raise NotImplementedError
+
+    def charge(self, payment) -> ChargeResult:
+        """Charge the customer's stored payment method for `payment`."""
+        raise NotImplementedError
+
+    def refund(self, refund) -> RefundResult:
+        """Return `refund.amount` of `refund.payment` to the customer."""
+        raise NotImplementedError
+
+    def fetch_refund_status(self, refund) -> Optional[RefundResult]:
+        """Ask the provider whether a refund whose outcome was lost went through; None while unknown."""
+        raise NotImplementedError
+
+    def verify_webhook(self, body, payload, headers) -> bool:
+        """Check a callback's signature (raw `body`, parsed `payload`, request `headers`) before it is stored."""
+        return True
+
+    def parse_event(self, payload) -> Optional[PaymentEvent]:
+        """Translate a stored webhook payload into a payment status change, if any."""
+        return None
+
+    def fetch_payment_status(self, payment) -> Optional[PaymentEvent]:
+        """Ask the provider for `payment`'s final state; None while it is still open."""
+        raise NotImplementedError
+
+    def fetch_payment_statuses(self, payments) -> List[PaymentEvent]:
+        """Batch status lookup. Providers without a batch API make one call per payment."""
+        events = []
+        for payment in payments:
+            event = self.fetch_payment_status(payment)
+            if event is not None:
+                events.append(event)
+        return events
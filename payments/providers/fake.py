@@ -0,0 +1,88 @@
+from ..models import PaymentStatus
+from .base import ChargeResult, CheckoutSession, PaymentEvent, RefundResult
+from .http import HttpProviderAdapter
+
+
+class FakeProvider(HttpProviderAdapter):
+    """
+    Stand-in for every provider during development and load runs. Talks to
+    the `run_fake_payment_provider` server when a base URL is configured,
+    otherwise approves everything in-process.
+    """
+
+    def __init__(self, name='fake', base_url=''):
+        super().__init__({'base_url': base_url})
+        self.name = name
+
+    def create_checkout(self, payment, data) -> CheckoutSession:
+        if not self.base_url:
+            return CheckoutSession(
+                url=f'http://localhost/fake-checkout/{payment.payment_id}',
+                provider_payment_id=f'fake_{payment.payment_id}'
+            )
+
+        response = self.request('create_checkout', 'POST', '/checkout', json={
+            'payment_id': payment.payment_id,
+            'amount': str(payment.amount),
+            'currency': payment.currency,
+        }).json()
+        return CheckoutSession(url=response['url'], provider_payment_id=response['id'], response=response)
+
+    def charge(self, payment) -> ChargeResult:
+        if not self.base_url:
+            provider_payment_id = f'fake_{payment.payment_id}'
+            return ChargeResult(
+                success=True,
+                provider_payment_id=provider_payment_id,
+                response={'id': provider_payment_id, 'status': 'succeeded'}
+            )
+
+        response = self.request('charge', 'POST', '/charges', json={
+            'payment_id': payment.payment_id,
+            'amount': str(payment.amount),
+            'currency': payment.currency,
+        }).json()
+        return ChargeResult(
+            success=response['status'] == 'succeeded',
+            provider_payment_id=response['id'],
+            response=response,
+            error=response.get('error', '')
+        )
+
+    def refund(self, refund) -> RefundResult:
+        if not self.base_url:
+            return RefundResult(success=True, provider_refund_id=f'fake_{refund.refund_id}')
+
+        response = self.request('refund', 'POST', '/refunds', json={
+            'refund_id': refund.refund_id,
+            'payment_id': refund.payment.payment_id,
+            'amount': str(refund.amount),
+        }).json()
+        return RefundResult(success=response['status'] == 'succeeded', provider_refund_id=response['id'], response=response)
+
+    def fetch_refund_status(self, refund):
+        if not self.base_url:
+            return RefundResult(success=True, provider_refund_id=f'fake_{refund.refund_id}')
+
+        response = self.request('fetch_refund_status', 'GET', f'/refunds/{refund.refund_id}').json()
+        return RefundResult(success=response['status'] == 'succeeded', provider_refund_id=response['id'], response=response)
+
+    def parse_event(self, payload):
+        # Fake server events: {"id", "type": "payment.updated", "data": {"payment_id", "status", "id"}}
+        if payload.get('type') != 'payment.updated':
+            return None
+
+        data = payload.get('data', {})
+        status = PaymentStatus.COMPLETED if data.get('status') == 'succeeded' else PaymentStatus.FAILED
+        return PaymentEvent(payment_id=data['payment_id'], status=status, provider_payment_id=data.get('id', ''))
+
+    def fetch_payment_status(self, payment):
+        if not self.base_url:
+            return None
+
+        response = self.request('fetch_status', 'GET', f'/payments/{payment.payment_id}').json()
+        if response['status'] == 'open':
+            return None
+
+        status = PaymentStatus.COMPLETED if response['status'] == 'succeeded' else PaymentStatus.FAILED
+        return PaymentEvent(payment_id=payment.payment_id, status=status, provider_payment_id=response.get('id', ''))
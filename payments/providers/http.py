@@ -0,0 +1,74 @@
+from django.conf import settings
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+import requests
+import threading
+import time
+
+from ..metrics import record_provider_call
+from .base import PaymentProviderAdapter, ProviderError
+
+_sessions = {}
+_sessions_lock = threading.Lock()
+
+
+def get_session(provider, retry_post=False):
+    """
+    One pooled, retrying requests.Session per provider and process. POSTs are
+    only retried when `retry_post` says the provider dedupes them.
+    """
+    key = (provider, retry_post)
+    session = _sessions.get(key)
+    if session is not None:
+        return session
+
+    with _sessions_lock:
+        session = _sessions.get(key)
+        if session is None:
+            retry = Retry(
+                total=settings.PAYMENT_PROVIDER_RETRIES,
+                backoff_factor=0.3,
+                status_forcelist=[429, 502, 503, 504],
+                allowed_methods=['GET', 'POST'] if retry_post else ['GET'],
+                respect_retry_after_header=True,
+                raise_on_status=False,
+            )
+            adapter = HTTPAdapter(
+                pool_connections=1,
+                pool_maxsize=settings.PAYMENT_PROVIDER_POOL_SIZE,
+                max_retries=retry,
+            )
+            session = requests.Session()
+            session.mount('https://', adapter)
+            session.mount('http://', adapter)
+            _sessions[key] = session
+    return session
+
+
+class HttpProviderAdapter(PaymentProviderAdapter):
+    # Only set for providers whose POSTs carry an idempotency key
+    idempotent_posts = False
+
+    def __init__(self, config):
+        self.config = config
+        self.base_url = config.get('base_url', '').rstrip('/')
+
+    @property
+    def session(self):
+        return get_session(self.name, self.idempotent_posts)
+
+    def request(self, operation, method, path, **kwargs):
+        kwargs.setdefault('timeout', settings.PAYMENT_PROVIDER_TIMEOUT)
+        started = time.monotonic()
+        error = None
+        try:
+            response = self.session.request(method, f'{self.base_url}{path}', **kwargs)
+            if response.status_code >= 400:
+                error = f'HTTP {response.status_code}'
+                raise ProviderError(f'{self.name} {operation} failed with {error}: {response.text[:500]}')
+            return response
+        except requests.RequestException as e:
+            error = e.__class__.__name__
+            raise ProviderError(f'{self.name} {operation} failed: {str(e)}') from e
+        finally:
+            record_provider_call(self.name, operation, (time.monotonic() - started) * 1000, error)
@@ -0,0 +1,153 @@
+import base64
+import hashlib
+import hmac
+import json
+import secrets
+
+from ..models import Payment, PaymentStatus, PaymentType
+from .base import CheckoutSession, PaymentEvent, ProviderError, RefundResult
+from .http import HttpProviderAdapter
+
+
+class IyzicoProvider(HttpProviderAdapter):
+    name = 'iyzico'
+    CHECKOUT_PATH = '/payment/iyzipos/checkoutform/initialize/auth/ecom'
+    DETAIL_PATH = '/payment/iyzipos/checkoutform/auth/ecom/detail'
+    REFUND_PATH = '/v2/payment/refund'
+
+    def _headers(self, path, body):
+        # IYZWSv2: HMAC-SHA256 over random key + request path + body
+        random_key = secrets.token_hex(8)
+        signature = hmac.new(
+            self.config.get('secret_key', '').encode(),
+            f'{random_key}{path}{body}'.encode(),
+            hashlib.sha256
+        ).hexdigest()
+        authorization = base64.b64encode(
+            f"apiKey:{self.config.get('api_key', '')}&randomKey:{random_key}&signature:{signature}".encode()
+        ).decode()
+        return {
+            'Authorization': f'IYZWSv2 {authorization}',
+            'x-iyzi-rnd': random_key,
+            'Content-Type': 'application/json',
+        }
+
+    def create_checkout(self, payment, data) -> CheckoutSession:
+        user = payment.user
+        price = str(payment.amount)
+        body = json.dumps({
+            'locale': 'tr',
+            'conversationId': payment.payment_id,
+            'price': price,
+            'paidPrice': price,
+            'currency': payment.currency,
+            'basketId': payment.payment_id,
+            'paymentGroup': 'SUBSCRIPTION' if payment.payment_type == PaymentType.SUBSCRIPTION else 'PRODUCT',
+            'callbackUrl': data.get('return_url') or self.config.get('callback_url', ''),
+            'buyer': {
+                'id': str(user.id),
+                'name': user.first_name or user.username,
+                'surname': user.last_name or user.username,
+                'email': user.email,
+                'identityNumber': user.tax_number or '11111111111',
+                'registrationAddress': 'N/A',
+                'city': 'Istanbul',
+                'country': 'Turkey',
+                'ip': data.get('client_ip', ''),
+            },
+            'billingAddress': {
+                'contactName': user.full_name or user.username,
+                'city': 'Istanbul',
+                'country': 'Turkey',
+                'address': 'N/A',
+            },
+            'basketItems': [{
+                'id': payment.payment_id,
+                'name': payment.description or payment.payment_type,
+                'category1': payment.payment_type,
+                'itemType': 'VIRTUAL',
+                'price': price,
+            }],
+        }, separators=(',', ':'))
+
+        response = self.request(
+            'create_checkout', 'POST', self.CHECKOUT_PATH,
+            headers=self._headers(self.CHECKOUT_PATH, body), data=body
+        ).json()
+        if response.get('status') != 'success':
+            raise ProviderError(f"iyzico checkout failed: {response.get('errorMessage', 'unknown error')}")
+
+        return CheckoutSession(url=response['paymentPageUrl'], provider_payment_id=response['token'], response=response)
+
+    def charge(self, payment):
+        raise ProviderError('iyzico stored-card charges are not supported')
+
+    def refund(self, refund) -> RefundResult:
+        body = json.dumps({
+            'locale': 'tr',
+            'conversationId': refund.refund_id,
+            'paymentId': refund.payment.provider_payment_id,
+            'price': str(refund.amount),
+            'currency': refund.payment.currency,
+        }, separators=(',', ':'))
+        try:
+            response = self.request(
+                'refund', 'POST', self.REFUND_PATH,
+                headers=self._headers(self.REFUND_PATH, body), data=body
+            ).json()
+        except ProviderError as e:
+            return RefundResult(success=False, error=str(e))
+
+        return RefundResult(
+            success=response.get('status') == 'success',
+            provider_refund_id=str(response.get('paymentId', '')),
+            response=response,
+            error=response.get('errorMessage', '')
+        )
+
+    def verify_webhook(self, body, payload, headers):
+        # X-IYZ-SIGNATURE-V3: hex HMAC-SHA256 keyed with the secret key. Checkout
+        # form (HPP) notifications also sign the form token.
+        secret_key = self.config.get('secret_key', '')
+        if 'token' in payload:
+            fields = ('iyziEventType', 'iyziPaymentId', 'token', 'paymentConversationId', 'status')
+        else:
+            fields = ('iyziEventType', 'paymentId', 'paymentConversationId', 'status')
+        message = secret_key + ''.join(str(payload.get(name, '')) for name in fields)
+        expected = hmac.new(secret_key.encode(), message.encode(), hashlib.sha256).hexdigest()
+        return bool(secret_key) and hmac.compare_digest(expected, headers.get('X-IYZ-SIGNATURE-V3', ''))
+
+    def parse_event(self, payload):
+        payment_id = payload.get('paymentConversationId')
+        if not payment_id:
+            return None
+
+        # The notification is only a hint; the detail API decides the outcome
+        payment = Payment.objects.filter(payment_id=payment_id, provider=self.name).first()
+        if payment is None:
+            return None
+        return self.fetch_payment_status(payment)
+
+    def fetch_payment_status(self, payment):
+        if not payment.provider_payment_id:
+            return None
+
+        body = json.dumps({
+            'locale': 'tr',
+            'conversationId': payment.payment_id,
+            'token': payment.provider_payment_id,
+        }, separators=(',', ':'))
+        response = self.request(
+            'fetch_status', 'POST', self.DETAIL_PATH,
+            headers=self._headers(self.DETAIL_PATH, body), data=body
+        ).json()
+
+        if response.get('paymentStatus') == 'SUCCESS':
+            return PaymentEvent(
+                payment_id=payment.payment_id,
+                status=PaymentStatus.COMPLETED,
+                provider_payment_id=str(response.get('paymentId', ''))
+            )
+        if response.get('paymentStatus') == 'FAILURE':
+            return PaymentEvent(payment_id=payment.payment_id, status=PaymentStatus.FAILED)
+        return None
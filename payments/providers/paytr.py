@@ -0,0 +1,133 @@
+import base64
+import hashlib
+import hmac
+import json
+import uuid
+
+from ..models import PaymentStatus
+from .base import CheckoutSession, PaymentEvent, ProviderError, RefundResult, to_minor_units
+from .http import HttpProviderAdapter
+
+
+class PaytrProvider(HttpProviderAdapter):
+    name = 'paytr'
+
+    def _sign(self, value):
+        digest = hmac.new(self.config.get('merchant_key', '').encode(), value.encode(), hashlib.sha256).digest()
+        return base64.b64encode(digest).decode()
+
+    @staticmethod
+    def merchant_oid(payment_id):
+        # PayTR only accepts alphanumeric order ids
+        return payment_id.replace('-', '')
+
+    def create_checkout(self, payment, data) -> CheckoutSession:
+        merchant_id = self.config.get('merchant_id', '')
+        merchant_oid = self.merchant_oid(payment.payment_id)
+        amount = str(to_minor_units(payment.amount))
+        basket = base64.b64encode(json.dumps([
+            [payment.description or payment.payment_type, str(payment.amount), 1]
+        ]).encode()).decode()
+        user_ip = data.get('client_ip', '')
+        test_mode = '1' if self.config.get('test_mode') else '0'
+        currency = 'TL' if payment.currency == 'TRY' else payment.currency
+
+        token = self._sign(
+            f"{merchant_id}{user_ip}{merchant_oid}{payment.user.email}{amount}{basket}00{currency}{test_mode}"
+            f"{self.config.get('merchant_salt', '')}"
+        )
+
+        response = self.request('create_checkout', 'POST', '/odeme/api/get-token', data={
+            'merchant_id': merchant_id,
+            'user_ip': user_ip,
+            'merchant_oid': merchant_oid,
+            'email': payment.user.email,
+            'payment_amount': amount,
+            'paytr_token': token,
+            'user_basket': basket,
+            'no_installment': '0',
+            'max_installment': '0',
+            'currency': currency,
+            'test_mode': test_mode,
+            'user_name': payment.user.full_name or payment.user.username,
+            'user_address': 'N/A',
+            'user_phone': payment.user.phone or '0000000000',
+            'merchant_ok_url': data.get('return_url') or self.config.get('ok_url', ''),
+            'merchant_fail_url': data.get('cancel_url') or self.config.get('fail_url', ''),
+            'timeout_limit': '30',
+            'debug_on': '0',
+            'lang': 'tr',
+        }).json()
+        if response.get('status') != 'success':
+            raise ProviderError(f"PayTR checkout failed: {response.get('reason', 'unknown error')}")
+
+        return CheckoutSession(
+            url=f"{self.base_url}/odeme/guvenli/{response['token']}",
+            provider_payment_id=merchant_oid,
+            response=response
+        )
+
+    def charge(self, payment):
+        raise ProviderError('PayTR stored-card charges are not supported')
+
+    def refund(self, refund) -> RefundResult:
+        merchant_id = self.config.get('merchant_id', '')
+        merchant_oid = self.merchant_oid(refund.payment.payment_id)
+        return_amount = str(refund.amount)
+        try:
+            response = self.request('refund', 'POST', '/odeme/iade', data={
+                'merchant_id': merchant_id,
+                'merchant_oid': merchant_oid,
+                'return_amount': return_amount,
+                'reference_no': refund.refund_id.replace('-', '')[:64],
+                'paytr_token': self._sign(
+                    f"{merchant_id}{merchant_oid}{return_amount}{self.config.get('merchant_salt', '')}"
+                ),
+            }).json()
+        except ProviderError as e:
+            return RefundResult(success=False, error=str(e))
+
+        return RefundResult(
+            success=response.get('status') == 'success',
+            provider_refund_id=merchant_oid,
+            response=response,
+            error=response.get('err_msg', '')
+        )
+
+    def verify_webhook(self, body, payload, headers):
+        expected = self._sign(
+            f"{payload.get('merchant_oid', '')}{self.config.get('merchant_salt', '')}"
+            f"{payload.get('status', '')}{payload.get('total_amount', '')}"
+        )
+        return hmac.compare_digest(expected, payload.get('hash', ''))
+
+    def parse_event(self, payload):
+        merchant_oid = payload.get('merchant_oid', '')
+        if not self.verify_webhook(None, payload, {}):
+            raise ProviderError(f'Invalid PayTR callback hash for {merchant_oid}')
+
+        try:
+            payment_id = str(uuid.UUID(merchant_oid))
+        except ValueError:
+            payment_id = merchant_oid
+
+        status = PaymentStatus.COMPLETED if payload.get('status') == 'success' else PaymentStatus.FAILED
+        return PaymentEvent(payment_id=payment_id, status=status, provider_payment_id=merchant_oid)
+
+    def fetch_payment_status(self, payment):
+        merchant_id = self.config.get('merchant_id', '')
+        merchant_oid = self.merchant_oid(payment.payment_id)
+        response = self.request('fetch_status', 'POST', '/odeme/durum-sorgu', data={
+            'merchant_id': merchant_id,
+            'merchant_oid': merchant_oid,
+            'paytr_token': self._sign(f"{merchant_id}{merchant_oid}{self.config.get('merchant_salt', '')}"),
+        }).json()
+
+        # PayTR answers "error" for orders that were never paid; those stay pending
+        if response.get('status') == 'success':
+            return PaymentEvent(
+                payment_id=payment.payment_id,
+                status=PaymentStatus.COMPLETED,
+                provider_payment_id=merchant_oid
+            )
+        return None
@@ -0,0 +1,159 @@
+import hashlib
+import hmac
+import time
+
+from ..models import PaymentMethod, PaymentStatus
+from .base import ChargeResult, CheckoutSession, PaymentEvent, ProviderError, RefundResult, to_minor_units
+from .http import HttpProviderAdapter
+
+
+class StripeProvider(HttpProviderAdapter):
+    name = 'stripe'
+    idempotent_posts = True
+    WEBHOOK_TOLERANCE = 300
+
+    def _headers(self, idempotency_key):
+        return {
+            'Authorization': f"Bearer {self.config.get('api_key', '')}",
+            'Idempotency-Key': idempotency_key,
+        }
+
+    def create_checkout(self, payment, data) -> CheckoutSession:
+        response = self.request('create_checkout', 'POST', '/v1/checkout/sessions', headers=self._headers(
+            f'checkout-{payment.payment_id}'
+        ), data={
+            'mode': 'payment',
+            'success_url': data.get('return_url') or self.config.get('success_url', ''),
+            'cancel_url': data.get('cancel_url') or self.config.get('cancel_url', ''),
+            'client_reference_id': payment.payment_id,
+            'line_items[0][quantity]': 1,
+            'line_items[0][price_data][currency]': payment.currency.lower(),
+            'line_items[0][price_data][unit_amount]': to_minor_units(payment.amount),
+            'line_items[0][price_data][product_data][name]': payment.description or payment.payment_type,
+            'metadata[payment_id]': payment.payment_id,
+            'payment_intent_data[metadata][payment_id]': payment.payment_id,
+        }).json()
+
+        return CheckoutSession(url=response['url'], provider_payment_id=response['id'], response=response)
+
+    def charge(self, payment) -> ChargeResult:
+        method = PaymentMethod.objects.filter(
+            user_id=payment.user_id,
+            provider=self.name,
+            is_active=True
+        ).order_by('-is_default', '-created_at').first()
+        if method is None:
+            return ChargeResult(success=False, error='No stored Stripe payment method')
+
+        try:
+            response = self.request('charge', 'POST', '/v1/payment_intents', headers=self._headers(
+                f'charge-{payment.payment_id}'
+            ), data={
+                'amount': to_minor_units(payment.amount),
+                'currency': payment.currency.lower(),
+                'payment_method': method.provider_method_id,
+                'confirm': 'true',
+                'off_session': 'true',
+                'metadata[payment_id]': payment.payment_id,
+            }).json()
+        except ProviderError as e:
+            return ChargeResult(success=False, error=str(e))
+
+        return ChargeResult(
+            success=response.get('status') == 'succeeded',
+            provider_payment_id=response.get('id', ''),
+            response=response,
+            error=(response.get('last_payment_error') or {}).get('message', '')
+        )
+
+    def refund(self, refund) -> RefundResult:
+        try:
+            response = self.request('refund', 'POST', '/v1/refunds', headers=self._headers(
+                f'refund-{refund.refund_id}'
+            ), data={
+                'payment_intent': refund.payment.provider_payment_id,
+                'amount': to_minor_units(refund.amount),
+                'metadata[refund_id]': refund.refund_id,
+            }).json()
+        except ProviderError as e:
+            return RefundResult(success=False, error=str(e))
+
+        return RefundResult(
+            success=response.get('status') in ('succeeded', 'pending'),
+            provider_refund_id=response.get('id', ''),
+            response=response,
+            error=response.get('failure_reason') or ''
+        )
+
+    def fetch_refund_status(self, refund):
+        response = self.request(
+            'fetch_refund_status', 'GET', '/v1/refunds',
+            headers={'Authorization': f"Bearer {self.config.get('api_key', '')}"},
+            params={'payment_intent': refund.payment.provider_payment_id, 'limit': 100}
+        ).json()
+
+        for item in response.get('data', []):
+            if item.get('metadata', {}).get('refund_id') == refund.refund_id:
+                return RefundResult(
+                    success=item.get('status') in ('succeeded', 'pending'),
+                    provider_refund_id=item.get('id', ''),
+                    response=item,
+                    error=item.get('failure_reason') or ''
+                )
+        # The create call never reached Stripe; safe to retry
+        return RefundResult(success=False, error='Refund was not created at the provider')
+
+    def verify_webhook(self, body, payload, headers):
+        # Stripe-Signature: t=<timestamp>,v1=<hex HMAC-SHA256 of "t.body">[,v1=...]
+        secret = self.config.get('webhook_secret', '')
+        timestamp, signatures = None, []
+        for item in headers.get('Stripe-Signature', '').split(','):
+            key, _, value = item.strip().partition('=')
+            if key == 't':
+                timestamp = value
+            elif key == 'v1':
+                signatures.append(value)
+
+        if not secret or not timestamp or not signatures:
+            return False
+        try:
+            # Old signed payloads must not be replayable
+            if abs(time.time() - int(timestamp)) > self.WEBHOOK_TOLERANCE:
+                return False
+        except ValueError:
+            return False
+
+        expected = hmac.new(secret.encode(), f'{timestamp}.'.encode() + body, hashlib.sha256).hexdigest()
+        return any(hmac.compare_digest(expected, signature) for signature in signatures)
+
+    def parse_event(self, payload):
+        event_type = payload.get('type')
+        if event_type not in ('payment_intent.succeeded', 'payment_intent.payment_failed'):
+            return None
+
+        intent = payload['data']['object']
+        payment_id = intent.get('metadata', {}).get('payment_id')
+        if not payment_id:
+            return None
+
+        status = PaymentStatus.COMPLETED if event_type == 'payment_intent.succeeded' else PaymentStatus.FAILED
+        return PaymentEvent(payment_id=payment_id, status=status, provider_payment_id=intent['id'])
+
+    def fetch_payment_status(self, payment):
+        if not payment.provider_payment_id.startswith('cs_'):
+            return None
+
+        session = self.request(
+            'fetch_status', 'GET', f'/v1/checkout/sessions/{payment.provider_payment_id}',
+            headers={'Authorization': f"Bearer {self.config.get('api_key', '')}"}
+        ).json()
+
+        if session.get('payment_status') == 'paid':
+            return PaymentEvent(
+                payment_id=payment.payment_id,
+                status=PaymentStatus.COMPLETED,
+                provider_payment_id=session.get('payment_intent') or session['id']
+            )
+        if session.get('status') == 'expired':
+            return PaymentEvent(payment_id=payment.payment_id, status=PaymentStatus.FAILED)
+        return None
@@ -0,0 +1,202 @@
+from collections import Counter, defaultdict, deque
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+from django.conf import settings
+from django.db import connections, transaction
+from django.db.models import Q
+from django.utils import timezone
+import logging
+import threading
+import time
+
+from .events import publish_payment_status
+from .models import Payment, PaymentProvider, PaymentStatus, ReconciliationRun, ReconciliationRunStatus
+from .providers import get_provider, ProviderError
+from .webhooks import handle_successful_payment
+
+logger = logging.getLogger(__name__)
+
+COMPLETED = 'completed'
+FAILED = 'failed'
+UNCHANGED = 'unchanged'
+ERRORS = 'errors'
+
+# Payments per adapter call
+BATCH_SIZE = 20
+
+
+class RateLimiter:
+    """Spaces calls `1 / rate` seconds apart across all threads of the process."""
+
+    def __init__(self, rate):
+        self.interval = 1 / rate
+        self.next_slot = time.monotonic()
+        self.lock = threading.Lock()
+
+    def acquire(self, tokens=1):
+        with self.lock:
+            now = time.monotonic()
+            self.next_slot = max(self.next_slot, now)
+            wait = self.next_slot - now
+            self.next_slot += tokens * self.interval
+        if wait > 0:
+            time.sleep(wait)
+
+
+def stale_pending_payments(now=None):
+    now = now or timezone.now()
+    return Payment.objects.filter(
+        status=PaymentStatus.PENDING,
+        created_at__lte=now - timedelta(minutes=settings.RECONCILIATION_STALE_MINUTES),
+        created_at__gte=now - timedelta(days=settings.RECONCILIATION_LOOKBACK_DAYS)
+    )
+
+
+def _iter_pages(queryset, page_size):
+    created_at, last_id = None, 0
+    while True:
+        page = queryset
+        if created_at is not None:
+            page = page.filter(Q(created_at__gt=created_at) | Q(created_at=created_at, id__gt=last_id))
+
+        page = list(page.order_by('created_at', 'id')[:page_size])
+        if not page:
+            return
+        yield page
+        created_at, last_id = page[-1].created_at, page[-1].id
+
+
+def apply_completed(events):
+    """
+    Complete the still-pending payments among `events` with one bulk update.
+    Rows are locked first, so a webhook completing the same payment
+    concurrently finds it completed and skips the side effects.
+    """
+    events = {event.payment_id: event for event in events}
+    now = timezone.now()
+
+    with transaction.atomic():
+        payments = list(Payment.objects.select_for_update(skip_locked=True).select_related(
+            'subscription_id'
+        ).filter(payment_id__in=events, status=PaymentStatus.PENDING))
+
+        for payment in payments:
+            payment.status = PaymentStatus.COMPLETED
+            payment.provider_payment_id = events[payment.payment_id].provider_payment_id or payment.provider_payment_id
+            payment.paid_at = now
+            payment.updated_at = now
+        Payment.objects.bulk_update(payments, ['status', 'provider_payment_id', 'paid_at', 'updated_at'])
+
+        for payment in payments:
+            handle_successful_payment(payment)
+            publish_payment_status(payment.payment_id, PaymentStatus.COMPLETED)
+    return len(payments)
+
+
+def apply_failed(events):
+    payment_ids = [event.payment_id for event in events]
+    updated = Payment.objects.filter(
+        payment_id__in=payment_ids,
+        status=PaymentStatus.PENDING
+    ).update(status=PaymentStatus.FAILED, updated_at=timezone.now())
+
+    # Listeners re-read the status, so notifying a payment that was settled elsewhere is harmless
+    if updated:
+        for payment_id in payment_ids:
+            publish_payment_status(payment_id, PaymentStatus.FAILED)
+    return updated
+
+
+def _process_page(payments, limiters):
+    outcomes = Counter()
+    try:
+        by_provider = defaultdict(list)
+        for payment in payments:
+            by_provider[payment.provider].append(payment)
+
+        events = []
+        for provider, provider_payments in by_provider.items():
+            for start in range(0, len(provider_payments), BATCH_SIZE):
+                batch = provider_payments[start:start + BATCH_SIZE]
+                limiters[provider].acquire(len(batch))
+                try:
+                    events.extend(get_provider(provider).fetch_payment_statuses(batch))
+                except (ProviderError, NotImplementedError) as e:
+                    logger.warning(f"Status lookup for {len(batch)} {provider} payments failed: {str(e)}")
+                    outcomes[ERRORS] += len(batch)
+
+        outcomes[COMPLETED] = apply_completed([e for e in events if e.status == PaymentStatus.COMPLETED])
+        outcomes[FAILED] = apply_failed([e for e in events if e.status == PaymentStatus.FAILED])
+        outcomes[UNCHANGED] = len(payments) - outcomes[COMPLETED] - outcomes[FAILED] - outcomes[ERRORS]
+    finally:
+        connections.close_all()
+    return outcomes
+
+
+def _collect(run, pending, elapsed, block):
+    while pending and (block or pending[0].done()):
+        outcomes = pending.popleft().result()
+        block = False
+
+        run.completed += outcomes[COMPLETED]
+        run.failed += outcomes[FAILED]
+        run.unchanged += outcomes[UNCHANGED]
+        run.errors += outcomes[ERRORS]
+        run.scanned += sum(outcomes.values())
+        run.duration_seconds = elapsed()
+        run.save(update_fields=['completed', 'failed', 'unchanged', 'errors', 'scanned', 'duration_seconds'])
+
+
+def run_reconciliation(page_size=None, max_workers=None):
+    """
+    Ask providers about pending payments older than the stale threshold and
+    settle the ones they report as paid or failed. Returns the run, or None
+    if another run is still in progress.
+    """
+    page_size = page_size or settings.RECONCILIATION_PAGE_SIZE
+    max_workers = max_workers or settings.RECONCILIATION_MAX_WORKERS
+
+    # A run that has been RUNNING for an hour died with its worker
+    ReconciliationRun.objects.filter(
+        status=ReconciliationRunStatus.RUNNING,
+        started_at__lt=timezone.now() - timedelta(hours=1)
+    ).update(status=ReconciliationRunStatus.FAILED, error_message='Interrupted')
+    if ReconciliationRun.objects.filter(status=ReconciliationRunStatus.RUNNING).exists():
+        logger.info("Reconciliation already running, skipping")
+        return None
+
+    run = ReconciliationRun.objects.create()
+    started = time.monotonic()
+
+    def elapsed():
+        return time.monotonic() - started
+
+    limiters = {provider: RateLimiter(settings.RECONCILIATION_RATE_LIMIT) for provider in PaymentProvider.values}
+    pending = deque()
+
+    try:
+        with ThreadPoolExecutor(max_workers=max_workers) as pool:
+            for page in _iter_pages(stale_pending_payments(), page_size):
+                pending.append(pool.submit(_process_page, page, limiters))
+                _collect(run, pending, elapsed, block=len(pending) >= max_workers * 2)
+
+            while pending:
+                _collect(run, pending, elapsed, block=True)
+    except Exception as e:
+        run.status = ReconciliationRunStatus.FAILED
+        run.error_message = str(e)
+        run.finished_at = timezone.now()
+        run.save(update_fields=['status', 'error_message', 'finished_at'])
+        raise
+
+    run.status = ReconciliationRunStatus.COMPLETED
+    run.duration_seconds = elapsed()
+    run.finished_at = timezone.now()
+    run.save(update_fields=['status', 'duration_seconds', 'finished_at'])
+
+    logger.info(
+        f"Reconciliation run {run.id} scanned {run.scanned} payments "
+        f"(completed {run.completed}, failed {run.failed}, errors {run.errors}) "
+        f"in {run.duration_seconds:.1f}s, {run.throughput}/s"
+    )
+    return run
@@ -0,0 +1,183 @@
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count, F, Q
+from django.utils import timezone
+import csv
+import logging
+from datetime import timedelta
+
+from .models import Payment, PaymentStatus, Refund, RefundBatch, RefundBatchStatus, RefundStatus
+from .providers import get_provider, ProviderError, RefundResult
+
+logger = logging.getLogger(__name__)
+
+ID_CHUNK_SIZE = 1000
+
+
+def _add_refunds(batch, payments):
+    # One refund per payment per batch: re-submitting within a batch is a no-op,
+    # a payment whose earlier refund failed can be refunded again in a new batch
+    eligible = payments.filter(status=PaymentStatus.COMPLETED).exclude(
+        refunds__status__in=[RefundStatus.PENDING, RefundStatus.PROCESSING, RefundStatus.COMPLETED]
+    ).values_list('id', 'payment_id', 'amount')
+
+    Refund.objects.bulk_create([
+        Refund(
+            payment_id=payment_pk,
+            batch=batch,
+            refund_id=f'refund-{batch.id}-{payment_id}',
+            amount=amount,
+            reason=batch.reason,
+            status=RefundStatus.PENDING
+        )
+        for payment_pk, payment_id, amount in eligible.iterator(chunk_size=ID_CHUNK_SIZE)
+    ], batch_size=ID_CHUNK_SIZE, ignore_conflicts=True)
+
+
+def create_refund_batch(payments, reason, created_by=None):
+    """Queue a full refund of every completed, not yet refunded payment in `payments`."""
+    batch = RefundBatch.objects.create(reason=reason, created_by=created_by)
+    _add_refunds(batch, payments)
+    batch.total = batch.refunds.count()
+    batch.save(update_fields=['total'])
+    return batch
+
+
+def create_refund_batch_from_csv(file, reason, created_by=None):
+    """Same as create_refund_batch for the payment_id column of a CSV file."""
+    batch = RefundBatch.objects.create(reason=reason, created_by=created_by)
+
+    payment_ids = [row['payment_id'].strip() for row in csv.DictReader(file) if row.get('payment_id')]
+    for start in range(0, len(payment_ids), ID_CHUNK_SIZE):
+        _add_refunds(batch, Payment.objects.filter(payment_id__in=payment_ids[start:start + ID_CHUNK_SIZE]))
+
+    batch.total = batch.refunds.count()
+    batch.save(update_fields=['total'])
+    return batch
+
+
+def _record_refund_result(batch_id, refund, result):
+    status = RefundStatus.COMPLETED if result.success else RefundStatus.FAILED
+    with transaction.atomic():
+        # Only the holder of the PROCESSING claim records an outcome, so a
+        # worker and the reconciliation sweep can't both count the same refund
+        recorded = Refund.objects.filter(id=refund.id, status=RefundStatus.PROCESSING).update(
+            status=status,
+            provider_refund_id=result.provider_refund_id,
+            error_message=result.error,
+            processed_at=timezone.now()
+        )
+        if not recorded:
+            return False
+        if result.success:
+            Payment.objects.filter(id=refund.payment_id).update(
+                status=PaymentStatus.REFUNDED,
+                updated_at=timezone.now()
+            )
+        RefundBatch.objects.filter(id=batch_id).update(
+            succeeded=F('succeeded') + (1 if result.success else 0),
+            failed=F('failed') + (0 if result.success else 1)
+        )
+    return True
+
+
+def process_refunds(batch_id, refund_ids):
+    """
+    Send the still-pending refunds among `refund_ids` to their providers.
+    Each refund is claimed (PENDING -> PROCESSING) before its provider call
+    and its outcome is written right after, so a retried chunk only sends
+    refunds that were never attempted. A refund left PROCESSING by a crash
+    mid-call is not re-sent; not every provider dedupes on our refund id.
+    reconcile_processing_refunds settles those with the provider instead.
+    """
+    refunds = list(Refund.objects.select_related('payment').filter(id__in=refund_ids, status=RefundStatus.PENDING))
+
+    succeeded = failed = 0
+    for refund in refunds:
+        claimed = Refund.objects.filter(id=refund.id, status=RefundStatus.PENDING).update(
+            status=RefundStatus.PROCESSING,
+            claimed_at=timezone.now()
+        )
+        if not claimed:
+            continue
+
+        try:
+            result = get_provider(refund.payment.provider).refund(refund)
+        except (ProviderError, NotImplementedError) as e:
+            result = RefundResult(success=False, error=str(e) or 'Refunds are not supported by this provider')
+
+        if not _record_refund_result(batch_id, refund, result):
+            continue
+        if result.success:
+            succeeded += 1
+        else:
+            failed += 1
+            logger.warning(f"Refund {refund.refund_id} failed: {result.error}")
+
+    return {'succeeded': succeeded, 'failed': failed}
+
+
+def reconcile_processing_refunds(batch_id=None, stale_after=None):
+    """
+    Settle refunds stuck in PROCESSING (a worker died between the provider
+    call and recording its outcome) by asking the provider what happened.
+    Refunds the provider can't report on stay PROCESSING for manual review.
+    """
+    if stale_after is None:
+        stale_after = settings.REFUND_PROCESSING_STALE_SECONDS
+    refunds = Refund.objects.select_related('payment').filter(
+        status=RefundStatus.PROCESSING,
+        claimed_at__lt=timezone.now() - timedelta(seconds=stale_after)
+    )
+    if batch_id is not None:
+        refunds = refunds.filter(batch_id=batch_id)
+
+    reconciled = 0
+    for refund in refunds:
+        try:
+            result = get_provider(refund.payment.provider).fetch_refund_status(refund)
+        except NotImplementedError:
+            logger.warning(f"Refund {refund.refund_id} is stuck processing and needs manual review")
+            continue
+        except ProviderError as e:
+            logger.warning(f"Could not reconcile refund {refund.refund_id}: {str(e)}")
+            continue
+
+        if result is not None and _record_refund_result(refund.batch_id, refund, result):
+            reconciled += 1
+
+    return reconciled
+
+
+def finish_refund_batch(batch_id, stale_after=None):
+    """
+    Recount a batch from its refunds and close it. A batch with refunds whose
+    outcome is still unknown stays PROCESSING; the periodic sweep retries it.
+    """
+    reconcile_processing_refunds(batch_id, stale_after=stale_after)
+
+    # Recount from the refunds themselves; chunk counters are only for live progress
+    counts = Refund.objects.filter(batch_id=batch_id).aggregate(
+        total=Count('id'),
+        succeeded=Count('id', filter=Q(status=RefundStatus.COMPLETED)),
+        failed=Count('id', filter=Q(status=RefundStatus.FAILED)),
+        unresolved=Count('id', filter=Q(status__in=[RefundStatus.PENDING, RefundStatus.PROCESSING]))
+    )
+    unresolved = counts.pop('unresolved')
+    if unresolved:
+        RefundBatch.objects.filter(id=batch_id).update(**counts)
+        return {**counts, 'unresolved': unresolved}
+
+    RefundBatch.objects.filter(id=batch_id).update(
+        status=RefundBatchStatus.COMPLETED,
+        finished_at=timezone.now(),
+        **counts
+    )
+    return {**counts, 'unresolved': 0}
+
+
+def reset_failed_refunds(batch):
+    return batch.refunds.filter(status=RefundStatus.FAILED).update(
+        status=RefundStatus.PENDING,
+        error_message=''
+    )
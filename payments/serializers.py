@@ -57,8 +57,16 @@ class CreatePaymentSerializer(serializers.Serializer):
 
 class InvoiceSerializer(serializers.ModelSerializer):
     payment = PaymentSerializer(read_only=True)
+    download_url = serializers.SerializerMethodField()
 
     class Meta:
         model = Invoice
-        fields = '__all__'
-        read_only_fields = ['invoice_number', 'issued_at']
\ No newline at end of file
+        exclude = ['pdf_file', 'pdf_hash']
+        read_only_fields = ['invoice_number', 'issued_at', 'pdf_generated_at']
+
+    def get_download_url(self, obj):
+        if not obj.pdf_file:
+            return None
+        url = obj.pdf_file.url
+        request = self.context.get('request')
+        return request.build_absolute_uri(url) if request else url
\ No newline at end of file
@@ -0,0 +1,11 @@
+from django.db.models.signals import post_save
+from django.dispatch import receiver
+
+from .models import Invoice
+from .tasks import request_invoice_pdf
+
+
+@receiver(post_save, sender=Invoice)
+def invoice_saved(sender, instance, **kwargs):
+    # Edited invoices hash differently and get a fresh PDF; unchanged ones are skipped
+    request_invoice_pdf(instance.id)
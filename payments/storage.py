@@ -0,0 +1,26 @@
+from django.conf import settings
+from django.core import signing
+from django.core.files.storage import FileSystemStorage, storages
+from django.urls import reverse
+
+SIGNING_SALT = 'payments.invoice-pdf'
+
+
+def invoice_storage():
+    return storages['invoices']
+
+
+class SignedFileSystemStorage(FileSystemStorage):
+    """
+    Local counterpart of the private invoice bucket. Files are never served
+    from MEDIA_URL; url() returns an expiring signed link to
+    invoice_pdf_download_view instead.
+    """
+
+    def url(self, name):
+        return reverse('payments:invoice_pdf', args=[signing.dumps(name, salt=SIGNING_SALT)])
+
+
+def load_signed_name(token):
+    """Storage name from a download token. Raises signing.BadSignature once it has expired."""
+    return signing.loads(token, salt=SIGNING_SALT, max_age=settings.INVOICE_URL_EXPIRE_SECONDS)
@@ -0,0 +1,160 @@
+from celery import chord, shared_task
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count, Q
+from django.utils import timezone
+from datetime import timedelta
+from redis.exceptions import RedisError
+import logging
+
+from core.redis_client import get_redis_connection
+from .analytics import refresh_payment_aggregates
+from .invoices import generate_invoice_pdf
+from .models import PaymentStatus, RefundBatch, RefundBatchStatus, RefundStatus, WebhookEvent, WebhookEventStatus
+from .reconciliation import run_reconciliation
+from .refunds import finish_refund_batch, process_refunds, reconcile_processing_refunds
+from .webhooks import apply_webhook_event
+
+logger = logging.getLogger(__name__)
+
+
+@shared_task(bind=True, max_retries=settings.WEBHOOK_MAX_RETRIES)
+def process_webhook_event(self, provider, event_id):
+    error = None
+
+    with transaction.atomic():
+        event = WebhookEvent.objects.select_for_update(skip_locked=True).filter(
+            provider=provider,
+            event_id=event_id
+        ).first()
+
+        # Already handled, or another worker holds it
+        if event is None or event.status == WebhookEventStatus.PROCESSED:
+            return
+
+        event.attempts += 1
+        try:
+            with transaction.atomic():
+                apply_webhook_event(event)
+        except Exception as e:
+            error = e
+            event.status = WebhookEventStatus.FAILED
+            event.last_error = str(e)
+        else:
+            event.status = WebhookEventStatus.PROCESSED
+            event.processed_at = timezone.now()
+            event.last_error = ''
+        event.save(update_fields=['status', 'attempts', 'last_error', 'processed_at'])
+
+    if error is not None:
+        logger.error(f"Webhook event {provider}/{event_id} failed (attempt {event.attempts}): {str(error)}")
+        raise self.retry(exc=error, countdown=2 ** self.request.retries * 10)
+
+
+@shared_task
+def process_pending_webhook_events():
+    # Safety net for events whose enqueue was lost (broker outage, worker crash)
+    cutoff = timezone.now() - timedelta(seconds=settings.WEBHOOK_SWEEP_AFTER_SECONDS)
+    events = WebhookEvent.objects.filter(
+        status=WebhookEventStatus.PENDING,
+        received_at__lte=cutoff
+    ).values_list('provider', 'event_id')[:1000]
+
+    count = 0
+    for provider, event_id in events:
+        process_webhook_event.delay(provider, event_id)
+        count += 1
+    return count
+
+
+@shared_task
+def reconcile_pending_payments():
+    run = run_reconciliation()
+    if run is None:
+        return None
+    return {
+        'run_id': run.id,
+        'scanned': run.scanned,
+        'fixed': run.fixed,
+        'errors': run.errors,
+        'throughput': run.throughput
+    }
+
+
+@shared_task
+def refresh_payment_analytics():
+    return refresh_payment_aggregates()
+
+
+@shared_task(bind=True, max_retries=3)
+def render_invoice_pdf(self, invoice_id):
+    try:
+        return generate_invoice_pdf(invoice_id)
+    except Exception as e:
+        logger.error(f"Invoice PDF generation failed for invoice {invoice_id}: {str(e)}")
+        raise self.retry(exc=e, countdown=2 ** self.request.retries * 30)
+
+
+def request_invoice_pdf(invoice_id, dedupe=False):
+    # With dedupe, repeated requests within a minute share one queued render
+    if dedupe:
+        try:
+            if not get_redis_connection().set(f'invoices:pdf_requested:{invoice_id}', 1, nx=True, ex=60):
+                return
+        except RedisError as e:
+            logger.warning(f"Could not dedupe invoice PDF request: {str(e)}")
+
+    transaction.on_commit(lambda: render_invoice_pdf.delay(invoice_id))
+
+
+@shared_task(bind=True, max_retries=3)
+def process_refund_chunk(self, batch_id, refund_ids):
+    try:
+        return process_refunds(batch_id, refund_ids)
+    except Exception as e:
+        logger.error(f"Refund chunk of batch {batch_id} failed: {str(e)}")
+        raise self.retry(exc=e, countdown=2 ** self.request.retries * 30)
+
+
+@shared_task
+def complete_refund_batch(results, batch_id):
+    return finish_refund_batch(batch_id)
+
+
+@shared_task
+def sweep_processing_refunds():
+    """Reconcile stuck refunds and close the batches they were holding open."""
+    reconciled = reconcile_processing_refunds()
+
+    closed = 0
+    open_batches = RefundBatch.objects.filter(status=RefundBatchStatus.PROCESSING).exclude(
+        refunds__status__in=[RefundStatus.PENDING, RefundStatus.PROCESSING]
+    ).values_list('id', flat=True)
+    for batch_id in open_batches:
+        finish_refund_batch(batch_id)
+        closed += 1
+
+    return {'reconciled': reconciled, 'closed': closed}
+
+
+def start_refund_batch(batch):
+    """Fan the batch's pending refunds out in chunks; the chord callback closes the batch."""
+    refund_ids = list(batch.refunds.filter(status=RefundStatus.PENDING).order_by('id').values_list('id', flat=True))
+
+    counts = batch.refunds.aggregate(
+        succeeded=Count('id', filter=Q(status=RefundStatus.COMPLETED)),
+        failed=Count('id', filter=Q(status=RefundStatus.FAILED))
+    )
+    RefundBatch.objects.filter(id=batch.id).update(
+        status=RefundBatchStatus.PROCESSING,
+        started_at=timezone.now(),
+        finished_at=None,
+        **counts
+    )
+
+    if not refund_ids:
+        return complete_refund_batch.delay([], batch.id)
+
+    chunk_size = settings.REFUND_CHUNK_SIZE
+    chunks = [refund_ids[start:start + chunk_size] for start in range(0, len(refund_ids), chunk_size)]
+    return chord(process_refund_chunk.s(batch.id, chunk) for chunk in chunks)(complete_refund_batch.s(batch.id))
@@ -1,3 +1,206 @@
-from django.test import TestCase
+from django.contrib.auth import get_user_model
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from datetime import timedelta
+from unittest import mock
+import fakeredis
+import hashlib
+import hmac
+import json
+import time
 
-# Create your tests here.
+import core.redis_client
+from payments import providers
+from .models import Payment, PaymentStatus, PaymentType, RefundBatchStatus, RefundStatus, WebhookEvent
+from .refunds import create_refund_batch, finish_refund_batch, process_refunds
+from .webhooks import apply_webhook_event, complete_payment, fail_payment
+
+User = get_user_model()
+
+WEBHOOK_SECRET = 'whsec_test'
+WEBHOOK_URL = '/api/v1/payments/webhook/stripe/'
+
+
+def stripe_signature(body, secret=WEBHOOK_SECRET, timestamp=None):
+    timestamp = int(time.time()) if timestamp is None else timestamp
+    digest = hmac.new(secret.encode(), f'{timestamp}.'.encode() + body, hashlib.sha256).hexdigest()
+    return f't={timestamp},v1={digest}'
+
+
+def intent_event(payment_id, event_type='payment_intent.succeeded', event_id='evt_1'):
+    return json.dumps({
+        'id': event_id,
+        'type': event_type,
+        'data': {'object': {'id': 'pi_1', 'metadata': {'payment_id': payment_id}}},
+    }).encode()
+
+
+@override_settings(
+    PAYMENTS_FAKE_PROVIDER=False,
+    PAYMENT_PROVIDERS={'stripe': {'base_url': 'http://stripe.invalid', 'webhook_secret': WEBHOOK_SECRET}}
+)
+class StripeWebhookTests(TestCase):
+    def setUp(self):
+        core.redis_client._connection = fakeredis.FakeRedis()
+        providers._adapters.clear()
+        self.addCleanup(providers._adapters.clear)
+
+        enqueue = mock.patch('payments.views.process_webhook_event.apply_async')
+        enqueue.start()
+        self.addCleanup(enqueue.stop)
+
+        user = User.objects.create_user('buyer', 'buyer@example.com', 'secret-pass-1')
+        self.payment = Payment.objects.create(
+            user=user,
+            payment_id='pay_1',
+            provider='stripe',
+            payment_type=PaymentType.ONE_TIME,
+            amount=100
+        )
+
+    def post(self, body, signature=None):
+        headers = {'HTTP_STRIPE_SIGNATURE': signature} if signature is not None else {}
+        return self.client.post(WEBHOOK_URL, body, content_type='application/json', **headers)
+
+    def test_unsigned_webhook_is_rejected(self):
+        response = self.post(intent_event('pay_1'))
+
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(WebhookEvent.objects.exists())
+
+    def test_wrong_secret_is_rejected(self):
+        body = intent_event('pay_1')
+        response = self.post(body, stripe_signature(body, secret='whsec_other'))
+
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(WebhookEvent.objects.exists())
+
+    def test_stale_signature_is_rejected(self):
+        body = intent_event('pay_1')
+        response = self.post(body, stripe_signature(body, timestamp=int(time.time()) - 3600))
+
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(WebhookEvent.objects.exists())
+
+    def test_signed_webhook_completes_pending_payment(self):
+        body = intent_event('pay_1')
+        response = self.post(body, stripe_signature(body))
+
+        self.assertEqual(response.status_code, 200)
+        apply_webhook_event(WebhookEvent.objects.get(provider='stripe', event_id='evt_1'))
+
+        self.payment.refresh_from_db()
+        self.assertEqual(self.payment.status, PaymentStatus.COMPLETED)
+        self.assertEqual(self.payment.provider_payment_id, 'pi_1')
+        self.assertIsNotNone(self.payment.paid_at)
+
+    def test_replayed_event_is_stored_once(self):
+        body = intent_event('pay_1')
+        self.post(body, stripe_signature(body))
+        self.post(body, stripe_signature(body))
+
+        self.assertEqual(WebhookEvent.objects.filter(event_id='evt_1').count(), 1)
+
+
+class PaymentStatusTransitionTests(TestCase):
+    def setUp(self):
+        core.redis_client._connection = fakeredis.FakeRedis()
+        user = User.objects.create_user('buyer', 'buyer@example.com', 'secret-pass-1')
+        self.payment = Payment.objects.create(
+            user=user,
+            payment_id='pay_1',
+            provider='stripe',
+            payment_type=PaymentType.ONE_TIME,
+            amount=100,
+            provider_payment_id='cs_1'
+        )
+
+    def test_complete_pending_payment(self):
+        self.assertIsNotNone(complete_payment('pay_1', 'pi_1'))
+
+        self.payment.refresh_from_db()
+        self.assertEqual(self.payment.status, PaymentStatus.COMPLETED)
+        self.assertEqual(self.payment.provider_payment_id, 'pi_1')
+
+    def test_complete_keeps_provider_id_when_event_has_none(self):
+        complete_payment('pay_1')
+
+        self.payment.refresh_from_db()
+        self.assertEqual(self.payment.provider_payment_id, 'cs_1')
+
+    def test_late_success_does_not_revive_failed_payment(self):
+        fail_payment('pay_1')
+
+        self.assertIsNone(complete_payment('pay_1', 'pi_1'))
+        self.payment.refresh_from_db()
+        self.assertEqual(self.payment.status, PaymentStatus.FAILED)
+        self.assertEqual(self.payment.provider_payment_id, 'cs_1')
+
+    def test_failure_does_not_override_completed_payment(self):
+        complete_payment('pay_1', 'pi_1')
+
+        self.assertEqual(fail_payment('pay_1'), 0)
+        self.payment.refresh_from_db()
+        self.assertEqual(self.payment.status, PaymentStatus.COMPLETED)
+
+    def test_completing_twice_runs_once(self):
+        self.assertIsNotNone(complete_payment('pay_1', 'pi_1'))
+        self.assertIsNone(complete_payment('pay_1', 'pi_2'))
+
+        self.payment.refresh_from_db()
+        self.assertEqual(self.payment.provider_payment_id, 'pi_1')
+
+
+@override_settings(PAYMENTS_FAKE_PROVIDER=True, PAYMENTS_FAKE_PROVIDER_URL='')
+class RefundBatchTests(TestCase):
+    def setUp(self):
+        providers._adapters.clear()
+        self.addCleanup(providers._adapters.clear)
+
+        user = User.objects.create_user('buyer', 'buyer@example.com', 'secret-pass-1')
+        for index in range(3):
+            Payment.objects.create(
+                user=user,
+                payment_id=f'pay_{index}',
+                provider='stripe',
+                payment_type=PaymentType.ONE_TIME,
+                amount=100,
+                status=PaymentStatus.COMPLETED
+            )
+
+    def test_batch_refunds_every_payment(self):
+        batch = create_refund_batch(Payment.objects.all(), 'Outage')
+        process_refunds(batch.id, list(batch.refunds.values_list('id', flat=True)))
+        finish_refund_batch(batch.id)
+
+        batch.refresh_from_db()
+        self.assertEqual(batch.status, RefundBatchStatus.COMPLETED)
+        self.assertEqual((batch.total, batch.succeeded, batch.failed), (3, 3, 0))
+        self.assertFalse(Payment.objects.exclude(status=PaymentStatus.REFUNDED).exists())
+
+    def test_failed_refund_can_be_retried_in_a_new_batch(self):
+        first = create_refund_batch(Payment.objects.all(), 'Outage')
+        first.refunds.filter(payment__payment_id='pay_0').update(status=RefundStatus.FAILED)
+
+        second = create_refund_batch(Payment.objects.all(), 'Retry')
+
+        self.assertEqual(list(second.refunds.values_list('payment__payment_id', flat=True)), ['pay_0'])
+        self.assertNotEqual(second.refunds.get().refund_id, first.refunds.get(payment__payment_id='pay_0').refund_id)
+
+    def test_batch_stays_open_while_a_refund_is_unresolved(self):
+        batch = create_refund_batch(Payment.objects.all(), 'Outage')
+        stuck = batch.refunds.first()
+        batch.refunds.filter(id=stuck.id).update(status=RefundStatus.PROCESSING, claimed_at=timezone.now())
+        process_refunds(batch.id, list(batch.refunds.values_list('id', flat=True)))
+
+        counts = finish_refund_batch(batch.id)
+        batch.refresh_from_db()
+        self.assertEqual(counts['unresolved'], 1)
+        self.assertNotEqual(batch.status, RefundBatchStatus.COMPLETED)
+
+        # Once stale, the provider is asked and the batch can close
+        batch.refunds.filter(id=stuck.id).update(claimed_at=timezone.now() - timedelta(hours=1))
+        finish_refund_batch(batch.id)
+        batch.refresh_from_db()
+        self.assertEqual(batch.status, RefundBatchStatus.COMPLETED)
+        self.assertEqual(batch.succeeded, 3)
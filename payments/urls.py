@@ -1,15 +1,22 @@
 from django.urls import path
 from .views import (
-    CreatePaymentView, PaymentStatusView, WebhookView,
-    PaymentMethodListView, InvoiceDetailView
+    CreatePaymentView, PaymentStatusView, PaymentHistoryView, WebhookView,
+    PaymentMethodListView, InvoiceDetailView, invoice_pdf_download_view, revenue_analytics_view,
+    payment_status_ticket_view, payment_status_stream_view, payment_status_wait_view
 )
 
 app_name = 'payments'
 
 urlpatterns = [
     path('create/', CreatePaymentView.as_view(), name='create'),
+    path('history/', PaymentHistoryView.as_view(), name='history'),
     path('status/<str:payment_id>/', PaymentStatusView.as_view(), name='status'),
+    path('status/<str:payment_id>/ticket/', payment_status_ticket_view, name='status_ticket'),
+    path('status/<str:payment_id>/stream/', payment_status_stream_view, name='status_stream'),
+    path('status/<str:payment_id>/wait/', payment_status_wait_view, name='status_wait'),
     path('webhook/<str:provider>/', WebhookView.as_view(), name='webhook'),
     path('methods/', PaymentMethodListView.as_view(), name='methods'),
     path('invoice/<str:invoice_number>/', InvoiceDetailView.as_view(), name='invoice'),
+    path('invoice-pdf/<str:token>/', invoice_pdf_download_view, name='invoice_pdf'),
+    path('analytics/revenue/', revenue_analytics_view, name='revenue_analytics'),
 ]
\ No newline at end of file
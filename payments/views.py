@@ -6,15 +6,34 @@ from django.shortcuts import get_object_or_404
 from django.views.decorators.csrf import csrf_exempt
 from django.utils.decorators import method_decorator
 from django.conf import settings
-from django.http import HttpResponse
+from django.http import FileResponse, Http404, HttpResponse, JsonResponse, StreamingHttpResponse
+from django.core import signing
+from django.views.decorators.http import require_GET
+from asgiref.sync import sync_to_async
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.exceptions import InvalidToken
+from django.utils import timezone
+from datetime import date, timedelta
 import uuid
 import json
+import logging
 
+from accounts.authentication import CachedJWTAuthentication
+from accounts.permissions import IsAdminUser
 from .models import Payment, PaymentMethod, Invoice, PaymentStatus, PaymentProvider
 from .serializers import (
     PaymentSerializer, PaymentMethodSerializer,
     CreatePaymentSerializer, InvoiceSerializer
 )
+from .analytics import revenue_report
+from .events import issue_stream_ticket, payment_status_changes, read_stream_ticket
+from .pagination import PaymentHistoryPagination
+from .providers import get_provider, ProviderError
+from .storage import invoice_storage, load_signed_name
+from .tasks import process_webhook_event, request_invoice_pdf
+from .webhooks import parse_webhook, record_webhook_event
+
+logger = logging.getLogger(__name__)
 
 
 class CreatePaymentView(generics.CreateAPIView):
@@ -39,96 +58,201 @@ class CreatePaymentView(generics.CreateAPIView):
             currency=validated_data['currency'],
             description=validated_data.get('description', ''),
             subscription_id_id=validated_data.get('subscription_id'),
-            workflow_id_id=validated_data.get('workflow_id'),
+            metadata={'workflow_id': validated_data.get('workflow_id')},
             status=PaymentStatus.PENDING
         )
 
-        provider = validated_data['provider']
+        x_forwarded_for = request.META.get('HTTP_X_FORWARDED_FOR')
+        checkout_data = dict(validated_data)
+        checkout_data['client_ip'] = x_forwarded_for.split(',')[0] if x_forwarded_for else request.META.get('REMOTE_ADDR')
 
-        if provider == PaymentProvider.STRIPE:
-            payment_url = self._create_stripe_payment(payment, validated_data)
-        elif provider == PaymentProvider.IYZICO:
-            payment_url = self._create_iyzico_payment(payment, validated_data)
-        elif provider == PaymentProvider.PAYTR:
-            payment_url = self._create_paytr_payment(payment, validated_data)
-        else:
+        try:
+            checkout = get_provider(payment.provider).create_checkout(payment, checkout_data)
+        except ProviderError as e:
+            logger.error(f"Checkout creation failed for payment {payment.payment_id}: {str(e)}")
+            payment.status = PaymentStatus.FAILED
+            payment.provider_response = {'error': str(e)}
+            payment.save(update_fields=['status', 'provider_response', 'updated_at'])
             return Response({
-                'error': 'Unsupported payment provider'
-            }, status=status.HTTP_400_BAD_REQUEST)
+                'error': 'Payment provider is unavailable, please try again'
+            }, status=status.HTTP_502_BAD_GATEWAY)
+
+        payment.provider_payment_id = checkout.provider_payment_id
+        payment.provider_response = checkout.response
+        payment.save(update_fields=['provider_payment_id', 'provider_response', 'updated_at'])
 
         return Response({
             'payment': PaymentSerializer(payment).data,
-            'payment_url': payment_url,
+            'payment_url': checkout.url,
             'message': 'Payment created successfully'
         }, status=status.HTTP_201_CREATED)
 
-    def _create_stripe_payment(self, payment, data):
-        return f"https://checkout.stripe.com/pay/{payment.payment_id}"
 
-    def _create_iyzico_payment(self, payment, data):
-        return f"https://sandbox-api.iyzipay.com/payment/form/{payment.payment_id}"
+class PaymentStatusView(generics.RetrieveAPIView):
+    serializer_class = PaymentSerializer
+    permission_classes = [permissions.IsAuthenticated]
+    lookup_field = 'payment_id'
 
-    def _create_paytr_payment(self, payment, data):
-        return f"https://www.paytr.com/odeme/{payment.payment_id}"
+    def get_queryset(self):
+        return Payment.objects.filter(user=self.request.user)
 
 
-class PaymentStatusView(generics.RetrieveAPIView):
+class PaymentHistoryView(generics.ListAPIView):
     serializer_class = PaymentSerializer
     permission_classes = [permissions.IsAuthenticated]
-    lookup_field = 'payment_id'
+    pagination_class = PaymentHistoryPagination
+    filterset_fields = ['status', 'payment_type', 'provider']
 
     def get_queryset(self):
         return Payment.objects.filter(user=self.request.user)
 
 
+@api_view(['POST'])
+@permission_classes([permissions.IsAuthenticated])
+def payment_status_ticket_view(request, payment_id):
+    # EventSource cannot set headers; it passes this ticket instead of the
+    # access token, which would otherwise end up in access logs and history
+    get_object_or_404(Payment, payment_id=payment_id, user=request.user)
+    return Response({
+        'ticket': issue_stream_ticket(request.user.id, payment_id),
+        'expires_in': settings.PAYMENT_STATUS_TICKET_TTL
+    })
+
+
+def _authenticate_stream_request(request, payment_id):
+    """The id of the user behind the Authorization header or a ?ticket= for this payment."""
+    if request.GET.get('ticket'):
+        return read_stream_ticket(request.GET['ticket'], payment_id)
+
+    try:
+        result = CachedJWTAuthentication().authenticate(request)
+    except (InvalidToken, AuthenticationFailed):
+        return None
+    return result[0].id if result is not None else None
+
+
+@sync_to_async
+def _get_stream_payment(request, payment_id):
+    user_id = _authenticate_stream_request(request, payment_id)
+    if user_id is None:
+        return None, JsonResponse({'error': 'Authentication required'}, status=401)
+    if not Payment.objects.filter(payment_id=payment_id, user_id=user_id).exists():
+        return None, JsonResponse({'error': 'Payment not found'}, status=404)
+    return payment_id, None
+
+
+def _sse(event, data):
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+async def payment_status_stream_view(request, payment_id):
+    """Server-sent events with the payment's status until it settles or the stream times out."""
+    if request.method != 'GET':
+        return JsonResponse({'error': 'Method not allowed'}, status=405)
+
+    payment_id, error = await _get_stream_payment(request, payment_id)
+    if error is not None:
+        return error
+
+    async def events():
+        yield f"retry: {settings.PAYMENT_STATUS_RETRY_MS}\n\n"
+        status = None
+        async for status_change in payment_status_changes(payment_id, settings.PAYMENT_STATUS_STREAM_TIMEOUT):
+            if status_change is None:
+                yield ": keepalive\n\n"
+            else:
+                status = status_change
+                yield _sse('status', {'payment_id': payment_id, 'status': status})
+        if status == PaymentStatus.PENDING:
+            # The client reconnects after `retry` ms, or falls back to the long-poll endpoint
+            yield _sse('timeout', {'payment_id': payment_id, 'status': status})
+
+    response = StreamingHttpResponse(events(), content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no'
+    return response
+
+
+async def payment_status_wait_view(request, payment_id):
+    """
+    Long-poll fallback: answers as soon as the status differs from ?status=
+    (default pending), or with the unchanged status after ?timeout= seconds.
+    """
+    if request.method != 'GET':
+        return JsonResponse({'error': 'Method not allowed'}, status=405)
+
+    payment_id, error = await _get_stream_payment(request, payment_id)
+    if error is not None:
+        return error
+
+    known_status = request.GET.get('status', PaymentStatus.PENDING)
+    try:
+        timeout = min(float(request.GET.get('timeout', settings.PAYMENT_STATUS_LONG_POLL_TIMEOUT)),
+                      settings.PAYMENT_STATUS_LONG_POLL_TIMEOUT)
+    except ValueError:
+        return JsonResponse({'error': 'timeout must be a number of seconds'}, status=400)
+
+    status = None
+    changes = payment_status_changes(payment_id, timeout)
+    try:
+        async for status_change in changes:
+            if status_change is not None:
+                status = status_change
+                if status != known_status:
+                    break
+    finally:
+        await changes.aclose()
+
+    return JsonResponse({'payment_id': payment_id, 'status': status, 'changed': status != known_status})
+
+
+@api_view(['GET'])
+@permission_classes([IsAdminUser])
+def revenue_analytics_view(request):
+    today = timezone.localdate()
+    try:
+        end = date.fromisoformat(request.query_params['end']) if 'end' in request.query_params else today
+        start = date.fromisoformat(request.query_params['start']) if 'start' in request.query_params else end - timedelta(days=29)
+    except ValueError:
+        return Response({'error': 'start and end must be YYYY-MM-DD dates'}, status=status.HTTP_400_BAD_REQUEST)
+
+    if start > end or (end - start).days > 366:
+        return Response({'error': 'Date range must be between 1 and 367 days'}, status=status.HTTP_400_BAD_REQUEST)
+
+    report = revenue_report(
+        start, end,
+        provider=request.query_params.get('provider'),
+        currency=request.query_params.get('currency')
+    )
+    return Response({'start': start, 'end': end, **report})
+
+
 @method_decorator(csrf_exempt, name='dispatch')
 class WebhookView(APIView):
     permission_classes = [permissions.AllowAny]
+    authentication_classes = []
 
     def post(self, request, provider, *args, **kwargs):
-        if provider == 'stripe':
-            return self._handle_stripe_webhook(request)
-        elif provider == 'iyzico':
-            return self._handle_iyzico_webhook(request)
-        elif provider == 'paytr':
-            return self._handle_paytr_webhook(request)
-        else:
+        if provider not in PaymentProvider.values:
             return Response({'error': 'Unknown provider'}, status=400)
 
-    def _handle_stripe_webhook(self, request):
-        payload = request.body
         try:
-            data = json.loads(payload)
-
-            if data.get('type') == 'payment_intent.succeeded':
-                payment_id = data['data']['object']['metadata'].get('payment_id')
-                if payment_id:
-                    try:
-                        payment = Payment.objects.get(payment_id=payment_id)
-                        payment.status = PaymentStatus.COMPLETED
-                        payment.provider_payment_id = data['data']['object']['id']
-                        payment.provider_response = data
-                        payment.save()
-
-                        self._handle_successful_payment(payment)
-                    except Payment.DoesNotExist:
-                        pass
-
-            return Response({'status': 'success'})
-        except json.JSONDecodeError:
-            return Response({'error': 'Invalid JSON'}, status=400)
-
-    def _handle_iyzico_webhook(self, request):
-        return Response({'status': 'success'})
+            event_id, event_type, payload = parse_webhook(provider, request)
+        except ValueError as e:
+            return Response({'error': str(e)}, status=400)
 
-    def _handle_paytr_webhook(self, request):
-        return Response({'status': 'success'})
+        record_webhook_event(provider, event_id, event_type, payload)
 
-    def _handle_successful_payment(self, payment):
-        if payment.payment_type == 'subscription' and payment.subscription_id:
-            subscription = payment.subscription_id
-            subscription.status = 'active'
-            subscription.save()
+        try:
+            process_webhook_event.apply_async((provider, event_id), retry=False)
+        except Exception as e:
+            # The event is stored; the periodic sweep will pick it up
+            logger.warning(f"Could not enqueue webhook event {provider}/{event_id}: {str(e)}")
+
+        # PayTR treats anything but a plain "OK" body as a failed delivery
+        if provider == PaymentProvider.PAYTR:
+            return HttpResponse('OK')
+        return Response({'status': 'success'})
 
 
 class PaymentMethodListView(generics.ListCreateAPIView):
@@ -145,6 +269,27 @@ class InvoiceDetailView(generics.RetrieveAPIView):
     lookup_field = 'invoice_number'
 
     def get_queryset(self):
-        return Invoice.objects.filter(payment__user=self.request.user)
+        return Invoice.objects.filter(payment__user=self.request.user).select_related('payment')
+
+    def retrieve(self, request, *args, **kwargs):
+        invoice = self.get_object()
+        # download_url stays null until the worker has rendered the PDF
+        if not invoice.pdf_file:
+            request_invoice_pdf(invoice.id, dedupe=True)
+        return Response(self.get_serializer(invoice).data)
+
+
+@require_GET
+def invoice_pdf_download_view(request, token):
+    """Serves a locally stored invoice PDF to whoever holds an unexpired signed link."""
+    try:
+        name = load_signed_name(token)
+    except signing.BadSignature:
+        return JsonResponse({'error': 'Download link is invalid or has expired'}, status=403)
+
+    storage = invoice_storage()
+    if not storage.exists(name):
+        raise Http404
+    return FileResponse(storage.open(name, 'rb'), content_type='application/pdf', filename='invoice.pdf')
 
 
@@ -0,0 +1,131 @@
+from django.db import transaction
+from django.utils import timezone
+import hashlib
+import json
+import logging
+
+from .events import publish_payment_status
+from .models import Invoice, Payment, PaymentStatus, PaymentType, WebhookEvent
+from .providers import get_provider
+
+logger = logging.getLogger(__name__)
+
+
+def _verify(provider, body, payload, request):
+    # Unsigned or forged callbacks never reach the inbox
+    if not get_provider(provider).verify_webhook(body, payload, request.headers):
+        raise ValueError('Invalid signature')
+
+
+def parse_webhook(provider, request):
+    """
+    Extract (event_id, event_type, payload) from a provider callback.
+    Raises ValueError for payloads that cannot be stored.
+    """
+    body = request.body
+    fallback_id = hashlib.sha256(body).hexdigest()
+
+    if provider == 'paytr':
+        # PayTR posts form data; one callback per order status
+        payload = request.POST.dict()
+        _verify(provider, body, payload, request)
+        merchant_oid = payload.get('merchant_oid')
+        event_id = f"{merchant_oid}:{payload.get('status')}" if merchant_oid else fallback_id
+        return event_id, payload.get('status', ''), payload
+
+    try:
+        payload = json.loads(body)
+    except json.JSONDecodeError:
+        raise ValueError('Invalid JSON')
+
+    if not isinstance(payload, dict):
+        raise ValueError('Invalid JSON')
+
+    if provider == 'stripe':
+        _verify(provider, body, payload, request)
+        return payload.get('id') or fallback_id, payload.get('type', ''), payload
+
+    if provider == 'iyzico':
+        _verify(provider, body, payload, request)
+        return payload.get('iyziReferenceCode') or fallback_id, payload.get('iyziEventType', ''), payload
+
+    raise ValueError('Unknown provider')
+
+
+def record_webhook_event(provider, event_id, event_type, payload):
+    # A single INSERT; provider retries of the same event are dropped by the unique constraint
+    WebhookEvent.objects.bulk_create([
+        WebhookEvent(
+            provider=provider,
+            event_id=event_id,
+            event_type=event_type,
+            payload=payload
+        )
+    ], ignore_conflicts=True)
+
+
+def handle_successful_payment(payment):
+    if payment.payment_type == PaymentType.SUBSCRIPTION and payment.subscription_id:
+        subscription = payment.subscription_id
+        subscription.status = 'active'
+        subscription.save(update_fields=['status', 'updated_at'])
+
+    invoice_id = Invoice.objects.filter(payment=payment).values_list('id', flat=True).first()
+    if invoice_id:
+        from .tasks import request_invoice_pdf
+        request_invoice_pdf(invoice_id)
+
+
+def complete_payment(payment_id, provider_payment_id='', provider_response=None):
+    """
+    Mark a payment completed and run its side effects exactly once.
+    Returns the payment, or None if it was unknown or no longer pending;
+    late or replayed events never revive a failed, cancelled or refunded payment.
+    """
+    now = timezone.now()
+    fields = {
+        'status': PaymentStatus.COMPLETED,
+        'provider_response': provider_response or {},
+        'paid_at': now,
+        'updated_at': now,
+    }
+    if provider_payment_id:
+        fields['provider_payment_id'] = provider_payment_id
+
+    with transaction.atomic():
+        updated = Payment.objects.filter(
+            payment_id=payment_id,
+            status=PaymentStatus.PENDING
+        ).update(**fields)
+        if not updated:
+            return None
+
+        payment = Payment.objects.select_related('subscription_id').get(payment_id=payment_id)
+        handle_successful_payment(payment)
+        publish_payment_status(payment_id, PaymentStatus.COMPLETED)
+    return payment
+
+
+def fail_payment(payment_id, provider_response=None):
+    updated = Payment.objects.filter(
+        payment_id=payment_id,
+        status=PaymentStatus.PENDING
+    ).update(
+        status=PaymentStatus.FAILED,
+        provider_response=provider_response or {},
+        updated_at=timezone.now()
+    )
+    if updated:
+        publish_payment_status(payment_id, PaymentStatus.FAILED)
+    return updated
+
+
+def apply_webhook_event(event):
+    payment_event = get_provider(event.provider).parse_event(event.payload)
+    if payment_event is None:
+        return
+
+    if payment_event.status == PaymentStatus.COMPLETED:
+        complete_payment(payment_event.payment_id, payment_event.provider_payment_id, event.payload)
+    elif payment_event.status == PaymentStatus.FAILED:
+        fail_payment(payment_event.payment_id, event.payload)
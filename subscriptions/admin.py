@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import Service, ServicePlan, UserServiceSubscription, UsageLog
+from .models import Service, ServicePlan, UserServiceSubscription, UsageLog, OrganizationQuota, RenewalRun
 
 
 @admin.register(Service)
@@ -33,3 +33,30 @@ class UsageLogAdmin(admin.ModelAdmin):
     search_fields = ['subscription__user__email', 'description']
     raw_id_fields = ['subscription']
     readonly_fields = ['created_at']
+
+
+class OrganizationQuotaInline(admin.TabularInline):
+    model = OrganizationQuota
+    extra = 0
+    fields = ['service', 'usage_limit', 'current_usage', 'usage_percentage', 'period', 'last_synced_at']
+    readonly_fields = ['current_usage', 'usage_percentage', 'period', 'last_synced_at']
+
+
+@admin.register(OrganizationQuota)
+class OrganizationQuotaAdmin(admin.ModelAdmin):
+    list_display = ['organization', 'service', 'usage_limit', 'current_usage', 'usage_percentage', 'period', 'last_synced_at']
+    list_filter = ['service', 'period', 'organization']
+    search_fields = ['organization__name']
+    raw_id_fields = ['organization']
+    readonly_fields = ['current_usage', 'period', 'last_synced_at', 'created_at', 'updated_at']
+    list_select_related = ['organization', 'service']
+
+
+@admin.register(RenewalRun)
+class RenewalRunAdmin(admin.ModelAdmin):
+    list_display = ['id', 'status', 'window_end', 'processed', 'renewed', 'failed', 'skipped', 'throughput', 'started_at', 'finished_at']
+    list_filter = ['status', 'started_at']
+    readonly_fields = [
+        'status', 'window_end', 'cursor_end_date', 'cursor_id', 'processed', 'renewed', 'failed',
+        'skipped', 'duration_seconds', 'throughput', 'error_message', 'started_at', 'finished_at'
+    ]
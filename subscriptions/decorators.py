@@ -2,6 +2,8 @@ from functools import wraps
 from rest_framework.response import Response
 from rest_framework import status
 from .models import UserServiceSubscription, ServiceType, UsageLog
+from .quotas import consume_organization_quota
+from .registry import get_catalog
 
 
 def require_service_access(service_type: str, increment_usage=True):
@@ -15,21 +17,42 @@ def require_service_access(service_type: str, increment_usage=True):
                     'error': 'Authentication required'
                 }, status=status.HTTP_401_UNAUTHORIZED)
 
+            catalog = get_catalog()
+            service = catalog.get_service_by_type(service_type)
+
             if user.role == 'corporate':
+                if user.organization_id and service is not None:
+                    allowed, used = consume_organization_quota(
+                        user.organization_id,
+                        service.id,
+                        amount=1 if increment_usage else 0
+                    )
+                    if not allowed:
+                        return Response({
+                            'error': 'Your organization has reached its usage limit for this service',
+                            'usage_limit_reached': True,
+                            'organization_quota': True,
+                            'service_type': service_type,
+                            'current_usage': used
+                        }, status=status.HTTP_429_TOO_MANY_REQUESTS)
                 return view_func(request, *args, **kwargs)
 
-            try:
-                subscription = UserServiceSubscription.objects.select_related('service', 'plan').get(
+            subscription = None
+            if service is not None:
+                subscription = UserServiceSubscription.objects.filter(
                     user=user,
-                    service__service_type=service_type
-                )
-            except UserServiceSubscription.DoesNotExist:
+                    service_id=service.id
+                ).first()
+
+            if subscription is None:
                 return Response({
                     'error': f'You do not have an active subscription for this service',
                     'requires_subscription': True,
                     'service_type': service_type
                 }, status=status.HTTP_403_FORBIDDEN)
 
+            catalog.attach(subscription)
+
             if not subscription.can_use_service():
                 if not subscription.is_active:
                     return Response({
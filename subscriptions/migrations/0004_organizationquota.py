@@ -0,0 +1,34 @@
+# Generated by Django 5.2.18 on 2026-10-19 14:19
+
+import django.db.models.deletion
+import subscriptions.models
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0004_organization'),
+        ('subscriptions', '0003_delete_subscription_delete_subscriptionhistory_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='OrganizationQuota',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('usage_limit', models.IntegerField(help_text='Monthly usage pool shared by all members (-1 for unlimited)')),
+                ('current_usage', models.IntegerField(default=0)),
+                ('period', models.DateField(default=subscriptions.models.current_usage_period, help_text='First day of the month current_usage belongs to')),
+                ('last_synced_at', models.DateTimeField(blank=True, null=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('organization', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='quotas', to='accounts.organization')),
+                ('service', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='subscriptions.service')),
+            ],
+            options={
+                'ordering': ['organization', 'service'],
+                'unique_together': {('organization', 'service')},
+            },
+        ),
+    ]
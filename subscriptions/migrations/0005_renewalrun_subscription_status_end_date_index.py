@@ -0,0 +1,40 @@
+# Generated by Django 5.2.18 on 2026-10-19 14:21
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('subscriptions', '0004_organizationquota'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RenewalRun',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('status', models.CharField(choices=[('running', 'Running'), ('completed', 'Completed'), ('failed', 'Failed')], default='running', max_length=20)),
+                ('window_end', models.DateTimeField(help_text='Subscriptions ending before this time are renewed')),
+                ('cursor_end_date', models.DateTimeField(blank=True, null=True)),
+                ('cursor_id', models.BigIntegerField(default=0)),
+                ('processed', models.IntegerField(default=0)),
+                ('renewed', models.IntegerField(default=0)),
+                ('failed', models.IntegerField(default=0)),
+                ('skipped', models.IntegerField(default=0)),
+                ('duration_seconds', models.FloatField(default=0)),
+                ('error_message', models.TextField(blank=True)),
+                ('started_at', models.DateTimeField(auto_now_add=True)),
+                ('finished_at', models.DateTimeField(blank=True, null=True)),
+            ],
+            options={
+                'ordering': ['-started_at'],
+            },
+        ),
+        migrations.AddIndex(
+            model_name='userservicesubscription',
+            index=models.Index(fields=['status', 'end_date'], name='subscriptio_status_6c0afe_idx'),
+        ),
+    ]
@@ -120,6 +120,9 @@ class UserServiceSubscription(models.Model):
     class Meta:
         unique_together = ['user', 'service']
         ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['status', 'end_date']),
+        ]
 
 
 class UsageLog(models.Model):
@@ -134,3 +137,70 @@ class UsageLog(models.Model):
 
     class Meta:
         ordering = ['-created_at']
+
+
+def current_usage_period():
+    return timezone.localdate().replace(day=1)
+
+
+class OrganizationQuota(models.Model):
+    organization = models.ForeignKey('accounts.Organization', on_delete=models.CASCADE, related_name='quotas')
+    service = models.ForeignKey(Service, on_delete=models.CASCADE)
+    usage_limit = models.IntegerField(help_text="Monthly usage pool shared by all members (-1 for unlimited)")
+    current_usage = models.IntegerField(default=0)
+    period = models.DateField(default=current_usage_period, help_text="First day of the month current_usage belongs to")
+    last_synced_at = models.DateTimeField(null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.organization.name} - {self.service.name}"
+
+    @property
+    def usage_remaining(self):
+        if self.usage_limit == -1:
+            return None
+        return max(0, self.usage_limit - self.current_usage)
+
+    @property
+    def usage_percentage(self):
+        if self.usage_limit <= 0:
+            return 0
+        return int((self.current_usage / self.usage_limit) * 100)
+
+    class Meta:
+        unique_together = ['organization', 'service']
+        ordering = ['organization', 'service']
+
+
+class RenewalRunStatus(models.TextChoices):
+    RUNNING = 'running', 'Running'
+    COMPLETED = 'completed', 'Completed'
+    FAILED = 'failed', 'Failed'
+
+
+class RenewalRun(models.Model):
+    status = models.CharField(max_length=20, choices=RenewalRunStatus.choices, default=RenewalRunStatus.RUNNING)
+    window_end = models.DateTimeField(help_text="Subscriptions ending before this time are renewed")
+    cursor_end_date = models.DateTimeField(null=True, blank=True)
+    cursor_id = models.BigIntegerField(default=0)
+    processed = models.IntegerField(default=0)
+    renewed = models.IntegerField(default=0)
+    failed = models.IntegerField(default=0)
+    skipped = models.IntegerField(default=0)
+    duration_seconds = models.FloatField(default=0)
+    error_message = models.TextField(blank=True)
+    started_at = models.DateTimeField(auto_now_add=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    def __str__(self):
+        return f"Renewal run {self.id} - {self.status}"
+
+    @property
+    def throughput(self):
+        if not self.duration_seconds:
+            return 0
+        return round(self.processed / self.duration_seconds, 2)
+
+    class Meta:
+        ordering = ['-started_at']
@@ -0,0 +1,138 @@
+from datetime import timedelta
+from django.utils import timezone
+from redis.exceptions import RedisError
+import logging
+
+from core.redis_client import get_redis_connection
+from .models import OrganizationQuota, current_usage_period
+
+logger = logging.getLogger(__name__)
+
+KEY_FORMAT = 'quota:org:{organization_id}:{service_id}:{period:%Y%m}'
+KEY_TTL = timedelta(days=62)
+
+# Returns {allowed, used}. {-1, 0} means the pool is not loaded into Redis yet.
+# A zero amount only checks whether the pool still has room.
+CONSUME_SCRIPT = """
+local limit = redis.call('HGET', KEYS[1], 'limit')
+if not limit then
+    return {-1, 0}
+end
+limit = tonumber(limit)
+local amount = tonumber(ARGV[1])
+
+local used = redis.call('HINCRBY', KEYS[1], 'used', amount)
+if limit >= 0 and (used > limit or (amount == 0 and used >= limit)) then
+    if amount > 0 then
+        used = redis.call('HINCRBY', KEYS[1], 'used', -amount)
+    end
+    return {0, used}
+end
+return {1, used}
+"""
+
+_script = None
+
+
+def _get_script():
+    global _script
+    if _script is None:
+        _script = get_redis_connection().register_script(CONSUME_SCRIPT)
+    return _script
+
+
+def quota_key(organization_id, service_id, period=None):
+    return KEY_FORMAT.format(
+        organization_id=organization_id,
+        service_id=service_id,
+        period=period or current_usage_period()
+    )
+
+
+def _seed_pool(key, organization_id, service_id, period):
+    quota = OrganizationQuota.objects.filter(
+        organization_id=organization_id,
+        service_id=service_id
+    ).only('usage_limit', 'current_usage', 'period').first()
+
+    # Organizations without a configured pool are metered but not capped
+    limit = quota.usage_limit if quota else -1
+    used = quota.current_usage if quota and quota.period == period else 0
+
+    pipe = get_redis_connection().pipeline()
+    pipe.hsetnx(key, 'limit', limit)
+    pipe.hsetnx(key, 'used', used)
+    pipe.expire(key, KEY_TTL)
+    pipe.execute()
+
+
+def consume_organization_quota(organization_id, service_id, amount=1):
+    """
+    Atomically draws `amount` from the organization's monthly pool for a
+    service. Returns (allowed, used); used is None if Redis is down.
+    """
+    period = current_usage_period()
+    key = quota_key(organization_id, service_id, period)
+
+    try:
+        allowed, used = _get_script()(keys=[key], args=[amount])
+        if allowed == -1:
+            _seed_pool(key, organization_id, service_id, period)
+            allowed, used = _get_script()(keys=[key], args=[amount])
+    except RedisError as e:
+        logger.warning(f"Organization quota unavailable, allowing request: {str(e)}")
+        return True, None
+
+    return bool(allowed), used
+
+
+def update_pool_limit(quota):
+    key = quota_key(quota.organization_id, quota.service_id)
+    try:
+        conn = get_redis_connection()
+        if conn.exists(key):
+            conn.hset(key, 'limit', quota.usage_limit)
+    except RedisError as e:
+        logger.warning(f"Could not update organization quota limit: {str(e)}")
+
+
+def clear_pool_limit(quota):
+    # Dropping the limit field makes the next draw re-seed from the database,
+    # which finds no quota row and leaves the pool metered but uncapped.
+    key = quota_key(quota.organization_id, quota.service_id)
+    try:
+        get_redis_connection().hdel(key, 'limit')
+    except RedisError as e:
+        logger.warning(f"Could not clear organization quota limit: {str(e)}")
+
+
+def persist_pool_usage():
+    period = current_usage_period()
+    quotas = list(OrganizationQuota.objects.all())
+    if not quotas:
+        return 0
+
+    pipe = get_redis_connection().pipeline(transaction=False)
+    for quota in quotas:
+        pipe.hget(quota_key(quota.organization_id, quota.service_id, period), 'used')
+    values = pipe.execute()
+
+    now = timezone.now()
+    changed = []
+    for quota, used in zip(quotas, values):
+        if used is not None:
+            quota.current_usage = int(used)
+        elif quota.period != period:
+            quota.current_usage = 0
+        else:
+            continue
+        quota.period = period
+        quota.last_synced_at = now
+        changed.append(quota)
+
+    OrganizationQuota.objects.bulk_update(
+        changed,
+        ['current_usage', 'period', 'last_synced_at'],
+        batch_size=500
+    )
+    return len(changed)
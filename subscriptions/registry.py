@@ -0,0 +1,133 @@
+from dataclasses import dataclass
+from types import MappingProxyType
+from typing import Mapping, Optional, Tuple
+from django.conf import settings
+from redis.exceptions import RedisError
+import logging
+import threading
+import time
+
+from core.redis_client import get_redis_connection
+from .models import Service, ServicePlan
+
+logger = logging.getLogger(__name__)
+
+VERSION_KEY = 'subscriptions:catalog:version'
+
+
+@dataclass(frozen=True)
+class ServiceCatalog:
+    """
+    Read-only snapshot of all services and plans. The model instances are
+    shared between requests and must never be mutated or saved.
+    """
+    version: Optional[int]
+    loaded_at: float
+    services: Mapping[int, Service]
+    services_by_type: Mapping[str, Service]
+    plans: Mapping[int, ServicePlan]
+    plans_by_service: Mapping[int, Tuple[ServicePlan, ...]]
+
+    def get_service(self, service_id, active_only=True):
+        service = self.services.get(service_id)
+        if service is None or (active_only and not service.is_active):
+            return None
+        return service
+
+    def get_service_by_type(self, service_type):
+        return self.services_by_type.get(service_type)
+
+    def get_plan(self, plan_id, service_id=None, active_only=True):
+        plan = self.plans.get(plan_id)
+        if plan is None or (active_only and not plan.is_active):
+            return None
+        if service_id is not None and plan.service_id != service_id:
+            return None
+        return plan
+
+    def active_services(self):
+        return [service for service in self.services.values() if service.is_active]
+
+    def active_plans(self, service_id):
+        return [plan for plan in self.plans_by_service.get(service_id, ()) if plan.is_active]
+
+    def attach(self, subscription):
+        # Populate the FK caches so serializers and can_use_service() don't query.
+        # Rows newer than this snapshot are left to the regular lazy lookup.
+        service = self.services.get(subscription.service_id)
+        if service is not None:
+            subscription.service = service
+        plan = self.plans.get(subscription.plan_id)
+        if plan is not None:
+            subscription.plan = plan
+        return subscription
+
+
+_lock = threading.Lock()
+_catalog = None
+_last_check = 0.0
+
+
+def _read_version():
+    try:
+        value = get_redis_connection().get(VERSION_KEY)
+    except RedisError as e:
+        logger.warning(f"Could not read service catalog version: {str(e)}")
+        return None
+    return int(value) if value is not None else 0
+
+
+def _load(version):
+    services = {service.id: service for service in Service.objects.all()}
+    plans = {}
+    plans_by_service = {}
+    for plan in ServicePlan.objects.all():
+        plan.service = services[plan.service_id]
+        plans[plan.id] = plan
+        plans_by_service.setdefault(plan.service_id, []).append(plan)
+
+    return ServiceCatalog(
+        version=version,
+        loaded_at=time.monotonic(),
+        services=MappingProxyType(services),
+        services_by_type=MappingProxyType({s.service_type: s for s in services.values()}),
+        plans=MappingProxyType(plans),
+        plans_by_service=MappingProxyType({k: tuple(v) for k, v in plans_by_service.items()}),
+    )
+
+
+def get_catalog() -> ServiceCatalog:
+    global _catalog, _last_check
+
+    catalog = _catalog
+    now = time.monotonic()
+    if catalog is not None and now - _last_check < settings.SERVICE_CATALOG_CHECK_INTERVAL:
+        return catalog
+
+    with _lock:
+        if _catalog is not None and now - _last_check < settings.SERVICE_CATALOG_CHECK_INTERVAL:
+            return _catalog
+
+        version = _read_version()
+        _last_check = now
+
+        stale = (
+            _catalog is None
+            or (version is not None and version != _catalog.version)
+            or (version is None and now - _catalog.loaded_at > settings.SERVICE_CATALOG_MAX_AGE)
+        )
+        if stale:
+            _catalog = _load(version)
+        return _catalog
+
+
+def invalidate_catalog():
+    global _catalog
+
+    with _lock:
+        _catalog = None
+
+    try:
+        get_redis_connection().incr(VERSION_KEY)
+    except RedisError as e:
+        logger.warning(f"Could not bump service catalog version: {str(e)}")
@@ -0,0 +1,218 @@
+from collections import Counter, deque
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+from django.conf import settings
+from django.db import connections, transaction
+from django.db.models import Q
+from django.utils import timezone
+import logging
+import time
+
+from payments.models import Payment, PaymentStatus, PaymentType
+from payments.providers import get_provider, ChargeResult, ProviderError
+from .models import (
+    UserServiceSubscription, SubscriptionStatus, BillingCycle, RenewalRun, RenewalRunStatus
+)
+from .registry import get_catalog
+
+logger = logging.getLogger(__name__)
+
+RENEWED = 'renewed'
+FAILED = 'failed'
+SKIPPED = 'skipped'
+
+
+def due_subscriptions(window_end):
+    return UserServiceSubscription.objects.filter(
+        status=SubscriptionStatus.ACTIVE,
+        end_date__lte=window_end,
+        auto_renew=True
+    )
+
+
+def renewal_period(billing_cycle):
+    return timedelta(days=365) if billing_cycle == BillingCycle.YEARLY else timedelta(days=30)
+
+
+def _claim_renewal_payment(subscription_id, window_end, provider_name):
+    """The PENDING payment for the subscription's current period, or None if there is nothing to charge."""
+    with transaction.atomic():
+        subscription = due_subscriptions(window_end).select_for_update(
+            skip_locked=True
+        ).filter(id=subscription_id).first()
+
+        # Renewed by a concurrent run, cancelled, or locked by another worker
+        if subscription is None:
+            return None
+
+        get_catalog().attach(subscription)
+
+        # One payment per subscription period, so a resumed run never charges twice
+        payment, created = Payment.objects.get_or_create(
+            payment_id=f'renewal-{subscription.id}-{subscription.end_date:%Y%m%d}',
+            defaults={
+                'user_id': subscription.user_id,
+                'provider': provider_name,
+                'payment_type': PaymentType.SUBSCRIPTION,
+                'amount': subscription.plan.get_price(subscription.billing_cycle),
+                'description': f'Auto-renewal of {subscription.service.name} - {subscription.plan.name}',
+                'subscription_id': subscription,
+                'status': PaymentStatus.PENDING
+            }
+        )
+
+    # A period whose charge already failed or went through is never charged again
+    if payment.status != PaymentStatus.PENDING:
+        return None
+    return payment
+
+
+def renew_subscription(subscription_id, window_end, provider_name):
+    # The PENDING payment is committed before the provider call, and no row
+    # lock is held while it runs; providers dedupe retries on the payment id
+    payment = _claim_renewal_payment(subscription_id, window_end, provider_name)
+    if payment is None:
+        return SKIPPED
+
+    try:
+        result = get_provider(payment.provider).charge(payment)
+    except ProviderError as e:
+        result = ChargeResult(success=False, error=str(e))
+
+    now = timezone.now()
+    with transaction.atomic():
+        pending = Payment.objects.filter(id=payment.id, status=PaymentStatus.PENDING)
+        if not result.success:
+            pending.update(
+                status=PaymentStatus.FAILED,
+                provider_response=result.response or {'error': result.error},
+                updated_at=now
+            )
+            return FAILED
+
+        if not pending.update(
+            status=PaymentStatus.COMPLETED,
+            provider_payment_id=result.provider_payment_id,
+            provider_response=result.response,
+            paid_at=now,
+            updated_at=now
+        ):
+            return SKIPPED
+
+        subscription = UserServiceSubscription.objects.select_for_update().get(id=subscription_id)
+        subscription.end_date += renewal_period(subscription.billing_cycle)
+        subscription.current_usage = 0
+        subscription.last_usage_reset = now.date()
+        subscription.save(update_fields=['end_date', 'current_usage', 'last_usage_reset', 'updated_at'])
+
+    return RENEWED
+
+
+def _last_providers(subscription_ids):
+    rows = Payment.objects.filter(
+        subscription_id__in=subscription_ids,
+        status=PaymentStatus.COMPLETED
+    ).order_by('subscription_id', 'created_at').values_list('subscription_id', 'provider')
+    # Later rows overwrite earlier ones, leaving the most recent provider
+    return dict(rows)
+
+
+def _process_chunk(subscription_ids, window_end):
+    outcomes = Counter()
+    try:
+        providers = _last_providers(subscription_ids)
+        for subscription_id in subscription_ids:
+            provider_name = providers.get(subscription_id, settings.RENEWAL_DEFAULT_PROVIDER)
+            try:
+                outcomes[renew_subscription(subscription_id, window_end, provider_name)] += 1
+            except Exception as e:
+                logger.error(f"Renewal of subscription {subscription_id} failed: {str(e)}")
+                outcomes[FAILED] += 1
+    finally:
+        connections.close_all()
+    return outcomes
+
+
+def _iter_chunks(run, chunk_size):
+    end_date, last_id = run.cursor_end_date, run.cursor_id
+    while True:
+        queryset = due_subscriptions(run.window_end)
+        if end_date is not None:
+            queryset = queryset.filter(Q(end_date__gt=end_date) | Q(end_date=end_date, id__gt=last_id))
+
+        chunk = list(queryset.order_by('end_date', 'id').values_list('id', 'end_date')[:chunk_size])
+        if not chunk:
+            return
+        yield chunk
+        last_id, end_date = chunk[-1]
+
+
+def _collect(run, pending, elapsed, block):
+    # Only advance the cursor over the contiguous prefix of finished chunks,
+    # so a crash never skips a chunk that was still in flight
+    while pending and (block or pending[0][0].done()):
+        future, (last_id, last_end_date) = pending.popleft()
+        outcomes = future.result()
+        block = False
+
+        run.renewed += outcomes[RENEWED]
+        run.failed += outcomes[FAILED]
+        run.skipped += outcomes[SKIPPED]
+        run.processed += sum(outcomes.values())
+        run.cursor_id = last_id
+        run.cursor_end_date = last_end_date
+        run.duration_seconds = elapsed()
+        run.save(update_fields=[
+            'renewed', 'failed', 'skipped', 'processed',
+            'cursor_id', 'cursor_end_date', 'duration_seconds'
+        ])
+
+
+def run_renewals(window_end=None, chunk_size=None, max_workers=None):
+    """
+    Renew every auto-renewing subscription ending before `window_end`.
+    An interrupted run is resumed from its cursor on the next call.
+    """
+    chunk_size = chunk_size or settings.RENEWAL_CHUNK_SIZE
+    max_workers = max_workers or settings.RENEWAL_MAX_WORKERS
+
+    run = RenewalRun.objects.filter(status=RenewalRunStatus.RUNNING).order_by('started_at').first()
+    if run is None:
+        run = RenewalRun.objects.create(
+            window_end=window_end or timezone.now() + timedelta(hours=settings.RENEWAL_WINDOW_HOURS)
+        )
+    else:
+        logger.info(f"Resuming renewal run {run.id} after subscription {run.cursor_id}")
+
+    started, previous_duration = time.monotonic(), run.duration_seconds
+
+    def elapsed():
+        return previous_duration + (time.monotonic() - started)
+
+    pending = deque()
+
+    try:
+        with ThreadPoolExecutor(max_workers=max_workers) as pool:
+            for chunk in _iter_chunks(run, chunk_size):
+                future = pool.submit(_process_chunk, [subscription_id for subscription_id, _ in chunk], run.window_end)
+                pending.append((future, chunk[-1]))
+                _collect(run, pending, elapsed, block=len(pending) >= max_workers * 2)
+
+            while pending:
+                _collect(run, pending, elapsed, block=True)
+    except Exception as e:
+        # Leave the run RUNNING so the next invocation resumes from the cursor
+        run.error_message = str(e)
+        run.save(update_fields=['error_message'])
+        raise
+
+    run.status = RenewalRunStatus.COMPLETED
+    run.finished_at = timezone.now()
+    run.save(update_fields=['status', 'finished_at'])
+
+    logger.info(
+        f"Renewal run {run.id} processed {run.processed} subscriptions "
+        f"(renewed {run.renewed}, failed {run.failed}, skipped {run.skipped}) "
+        f"in {run.duration_seconds:.1f}s, {run.throughput}/s"
+    )
+    return run
@@ -1,5 +1,6 @@
 from rest_framework import serializers
 from .models import Service, ServicePlan, UserServiceSubscription, UsageLog, BillingCycle
+from .registry import get_catalog
 
 
 class ServiceSerializer(serializers.ModelSerializer):
@@ -48,12 +49,14 @@ class CreateSubscriptionSerializer(serializers.Serializer):
     payment_method_id = serializers.CharField(required=False)
 
     def validate(self, attrs):
-        try:
-            service = Service.objects.get(id=attrs['service_id'], is_active=True)
-            plan = ServicePlan.objects.get(id=attrs['plan_id'], service=service, is_active=True)
-        except Service.DoesNotExist:
+        catalog = get_catalog()
+
+        service = catalog.get_service(attrs['service_id'])
+        if service is None:
             raise serializers.ValidationError("Invalid or inactive service")
-        except ServicePlan.DoesNotExist:
+
+        plan = catalog.get_plan(attrs['plan_id'], service_id=service.id)
+        if plan is None:
             raise serializers.ValidationError("Invalid or inactive plan for this service")
 
-        return attrs
\ No newline at end of file
+        return attrs
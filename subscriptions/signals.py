@@ -0,0 +1,32 @@
+from django.db import transaction
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+
+from .models import Service, ServicePlan, OrganizationQuota, UserServiceSubscription
+from .quotas import update_pool_limit, clear_pool_limit
+from .registry import invalidate_catalog
+from .throttling import invalidate_plan_type
+
+
+@receiver(post_save, sender=Service)
+@receiver(post_delete, sender=Service)
+@receiver(post_save, sender=ServicePlan)
+@receiver(post_delete, sender=ServicePlan)
+def service_catalog_changed(sender, **kwargs):
+    transaction.on_commit(invalidate_catalog)
+
+
+@receiver(post_save, sender=OrganizationQuota)
+def organization_quota_changed(sender, instance, **kwargs):
+    transaction.on_commit(lambda: update_pool_limit(instance))
+
+
+@receiver(post_delete, sender=OrganizationQuota)
+def organization_quota_deleted(sender, instance, **kwargs):
+    transaction.on_commit(lambda: clear_pool_limit(instance))
+
+
+@receiver(post_save, sender=UserServiceSubscription)
+@receiver(post_delete, sender=UserServiceSubscription)
+def subscription_plan_changed(sender, instance, **kwargs):
+    transaction.on_commit(lambda: invalidate_plan_type(instance.user_id, instance.service_id))
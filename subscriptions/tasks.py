@@ -0,0 +1,27 @@
+from celery import shared_task
+import logging
+
+from .quotas import persist_pool_usage
+from .renewals import run_renewals
+
+logger = logging.getLogger(__name__)
+
+
+@shared_task
+def persist_organization_usage():
+    updated = persist_pool_usage()
+    logger.info(f"Persisted usage for {updated} organization quotas")
+    return updated
+
+
+@shared_task
+def run_auto_renewals():
+    run = run_renewals()
+    return {
+        'run_id': run.id,
+        'processed': run.processed,
+        'renewed': run.renewed,
+        'failed': run.failed,
+        'skipped': run.skipped,
+        'throughput': run.throughput
+    }
@@ -0,0 +1,160 @@
+from django.conf import settings
+from django.utils import timezone
+from rest_framework.throttling import SimpleRateThrottle
+from redis.exceptions import RedisError
+import logging
+import uuid
+
+from accounts.models import UserRole
+from core.redis_client import get_redis_connection
+from .models import UserServiceSubscription, SubscriptionStatus
+from .registry import get_catalog
+
+logger = logging.getLogger(__name__)
+
+# Sliding window log kept in a sorted set scored by Redis server time (ms).
+# The caller's plan type is read from its cache key in the same call, so an
+# allowed or throttled request costs a single round trip. ARGV carries the
+# member, a plan that overrides the cached one, then (plan, limit, window_ms)
+# triples. Returns {allowed, retry_after_ms}; {-1, 0} means the plan type is
+# not cached yet.
+SLIDING_WINDOW_SCRIPT = """
+local plan = ARGV[2]
+if plan == '' then
+    plan = redis.call('GET', KEYS[1])
+    if not plan then
+        return {-1, 0}
+    end
+end
+
+local limit, window
+for i = 3, #ARGV, 3 do
+    if ARGV[i] == plan then
+        limit = tonumber(ARGV[i + 1])
+        window = tonumber(ARGV[i + 2])
+    end
+end
+if not limit then
+    return {1, 0}
+end
+
+local key = KEYS[2]
+local t = redis.call('TIME')
+local now = tonumber(t[1]) * 1000 + math.floor(tonumber(t[2]) / 1000)
+
+redis.call('ZREMRANGEBYSCORE', key, 0, now - window)
+if redis.call('ZCARD', key) < limit then
+    redis.call('ZADD', key, now, ARGV[1])
+    redis.call('PEXPIRE', key, window)
+    return {1, 0}
+end
+
+local oldest = redis.call('ZRANGE', key, 0, 0, 'WITHSCORES')
+return {0, tonumber(oldest[2]) + window - now}
+"""
+
+PLAN_TYPE_KEY = 'throttle:plan_type:{service_id}:{user_id}'
+
+_script = None
+
+
+def _get_script():
+    global _script
+    if _script is None:
+        _script = get_redis_connection().register_script(SLIDING_WINDOW_SCRIPT)
+    return _script
+
+
+def plan_type_key(service_id, user_id):
+    return PLAN_TYPE_KEY.format(service_id=service_id, user_id=user_id)
+
+
+def cache_plan_type(user_id, service_id, default_plan):
+    """Look up the user's active plan for a service and cache it until it can change."""
+    subscription = UserServiceSubscription.objects.filter(
+        user_id=user_id,
+        service_id=service_id,
+        status=SubscriptionStatus.ACTIVE,
+        end_date__gt=timezone.now()
+    ).values('plan__plan_type', 'end_date').first()
+
+    ttl = settings.THROTTLE_PLAN_CACHE_TTL
+    if subscription is None:
+        plan_type = default_plan
+    else:
+        plan_type = subscription['plan__plan_type']
+        # Expire with the subscription so lapsed plans fall back to the default rate
+        ttl = max(1, min(ttl, int((subscription['end_date'] - timezone.now()).total_seconds())))
+
+    get_redis_connection().set(plan_type_key(service_id, user_id), plan_type, ex=ttl)
+
+
+def invalidate_plan_type(user_id, service_id):
+    try:
+        get_redis_connection().delete(plan_type_key(service_id, user_id))
+    except RedisError as e:
+        logger.warning(f"Could not invalidate cached plan of user {user_id}: {str(e)}")
+
+
+class ServicePlanRateThrottle(SimpleRateThrottle):
+    """
+    Burst limit whose rate depends on the caller's active plan for the view's
+    `service_type` (plan_basic, plan_pro, plan_enterprise, plan_corporate).
+    """
+    cache_format = 'throttle:plan:%(scope)s:%(ident)s'
+    default_plan = 'default'
+
+    def __init__(self):
+        self.wait_ms = 0
+
+    def get_cache_key(self, request, view):
+        return self.cache_format % {
+            'scope': getattr(view, 'service_type', None) or 'global',
+            'ident': request.user.pk
+        }
+
+    def get_rate_args(self):
+        args = []
+        for scope, rate in self.THROTTLE_RATES.items():
+            if scope.startswith('plan_') and rate is not None:
+                num_requests, duration = self.parse_rate(rate)
+                args += [scope[len('plan_'):], num_requests, int(duration * 1000)]
+        return args
+
+    def allow_request(self, request, view):
+        user = request.user
+        if not user or not user.is_authenticated:
+            return True
+
+        service = None
+        service_type = getattr(view, 'service_type', None)
+        if service_type:
+            service = get_catalog().get_service_by_type(service_type)
+
+        # Corporate users and views outside any service never need a lookup
+        if user.role == UserRole.CORPORATE:
+            plan_override = 'corporate'
+        elif service is None:
+            plan_override = self.default_plan
+        else:
+            plan_override = ''
+
+        plan_key = plan_type_key(service.id if service else 0, user.pk)
+        keys = [plan_key, self.get_cache_key(request, view)]
+        args = [uuid.uuid4().hex, plan_override] + self.get_rate_args()
+
+        try:
+            allowed, retry_after_ms = _get_script()(keys=keys, args=args)
+            if allowed == -1:
+                cache_plan_type(user.pk, service.id, self.default_plan)
+                allowed, retry_after_ms = _get_script()(keys=keys, args=args)
+        except RedisError as e:
+            # Fail open: burst limiting must never take the API down with Redis
+            logger.warning(f"Plan throttle unavailable, allowing request: {str(e)}")
+            return True
+
+        self.wait_ms = int(retry_after_ms)
+        return allowed != 0
+
+    def wait(self):
+        return max(self.wait_ms, 0) / 1000
@@ -1,7 +1,8 @@
 from django.urls import path
 from .views import (
     ServiceListView, service_plans_view, user_subscriptions_view,
-    create_subscription_view, cancel_subscription_view, check_service_access_view
+    create_subscription_view, cancel_subscription_view, check_service_access_view,
+    check_all_service_access_view
 )
 
 app_name = 'subscriptions'
@@ -12,5 +13,6 @@ urlpatterns = [
     path('my-subscriptions/', user_subscriptions_view, name='my_subscriptions'),
     path('create/', create_subscription_view, name='create'),
     path('cancel/<int:subscription_id>/', cancel_subscription_view, name='cancel'),
+    path('check-access/', check_all_service_access_view, name='check_access_all'),
     path('check-access/<str:service_type>/', check_service_access_view, name='check_access'),
 ]
\ No newline at end of file
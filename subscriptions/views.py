@@ -1,32 +1,42 @@
 from rest_framework import generics, permissions, status
 from rest_framework.decorators import api_view, permission_classes
 from rest_framework.response import Response
+from django.core.serializers.json import DjangoJSONEncoder
 from django.utils import timezone
+from django.utils.cache import patch_cache_control
+from django.utils.http import parse_etags, quote_etag
 from datetime import timedelta
-from .models import Service, ServicePlan, UserServiceSubscription, SubscriptionStatus, UsageLog
+import hashlib
+import json
+from .models import (
+    Service, ServicePlan, ServiceType, UserServiceSubscription, SubscriptionStatus, UsageLog
+)
 from .serializers import (
     ServiceSerializer, ServicePlanSerializer,
     UserServiceSubscriptionSerializer, CreateSubscriptionSerializer, UsageLogSerializer
 )
+from .registry import get_catalog
 
 
 class ServiceListView(generics.ListAPIView):
-    queryset = Service.objects.filter(is_active=True)
     serializer_class = ServiceSerializer
     permission_classes = [permissions.AllowAny]
 
+    def get_queryset(self):
+        return get_catalog().active_services()
+
 
 @api_view(['GET'])
 @permission_classes([permissions.AllowAny])
 def service_plans_view(request, service_id):
-    try:
-        service = Service.objects.get(id=service_id, is_active=True)
-    except Service.DoesNotExist:
+    catalog = get_catalog()
+    service = catalog.get_service(service_id)
+    if service is None:
         return Response({
             'error': 'Service not found'
         }, status=status.HTTP_404_NOT_FOUND)
 
-    plans = ServicePlan.objects.filter(service=service, is_active=True)
+    plans = catalog.active_plans(service.id)
     serializer = ServicePlanSerializer(plans, many=True)
 
     return Response({
@@ -38,9 +48,11 @@ def service_plans_view(request, service_id):
 @api_view(['GET'])
 @permission_classes([permissions.IsAuthenticated])
 def user_subscriptions_view(request):
-    subscriptions = UserServiceSubscription.objects.filter(
-        user=request.user
-    ).select_related('service', 'plan')
+    catalog = get_catalog()
+    subscriptions = [
+        catalog.attach(subscription)
+        for subscription in UserServiceSubscription.objects.filter(user=request.user)
+    ]
 
     serializer = UserServiceSubscriptionSerializer(subscriptions, many=True)
     return Response({
@@ -59,10 +71,10 @@ def create_subscription_view(request):
     plan_id = serializer.validated_data['plan_id']
     billing_cycle = serializer.validated_data['billing_cycle']
 
-    try:
-        service = Service.objects.get(id=service_id, is_active=True)
-        plan = ServicePlan.objects.get(id=plan_id, service=service, is_active=True)
-    except (Service.DoesNotExist, ServicePlan.DoesNotExist):
+    catalog = get_catalog()
+    service = catalog.get_service(service_id)
+    plan = catalog.get_plan(plan_id, service_id=service_id)
+    if service is None or plan is None:
         return Response({
             'error': 'Invalid service or plan'
         }, status=status.HTTP_400_BAD_REQUEST)
@@ -98,10 +110,10 @@ def create_subscription_view(request):
 @permission_classes([permissions.IsAuthenticated])
 def cancel_subscription_view(request, subscription_id):
     try:
-        subscription = UserServiceSubscription.objects.get(
+        subscription = get_catalog().attach(UserServiceSubscription.objects.get(
             id=subscription_id,
             user=request.user
-        )
+        ))
     except UserServiceSubscription.DoesNotExist:
         return Response({
             'error': 'Subscription not found'
@@ -131,19 +143,79 @@ def check_service_access_view(request, service_type):
             'is_corporate': True
         })
 
-    try:
-        subscription = UserServiceSubscription.objects.select_related('service', 'plan').get(
+    catalog = get_catalog()
+    service = catalog.get_service_by_type(service_type)
+
+    subscription = None
+    if service is not None:
+        subscription = UserServiceSubscription.objects.filter(
             user=request.user,
-            service__service_type=service_type
-        )
-    except UserServiceSubscription.DoesNotExist:
+            service_id=service.id
+        ).first()
+
+    if subscription is None:
         return Response({
             'has_access': False,
             'requires_subscription': True,
             'service_type': service_type
         })
 
+    catalog.attach(subscription)
+
     return Response({
         'has_access': subscription.can_use_service(),
         'subscription': UserServiceSubscriptionSerializer(subscription).data
     })
+
+
+@api_view(['GET'])
+@permission_classes([permissions.IsAuthenticated])
+def check_all_service_access_view(request):
+    is_corporate = request.user.role == 'corporate'
+    catalog = get_catalog()
+
+    subscriptions = {}
+    if not is_corporate:
+        for subscription in UserServiceSubscription.objects.filter(user=request.user):
+            subscriptions[subscription.service_id] = catalog.attach(subscription)
+
+    services = {}
+    for service_type in ServiceType.values:
+        service = catalog.get_service_by_type(service_type)
+        subscription = subscriptions.get(service.id) if service is not None else None
+
+        if is_corporate:
+            services[service_type] = {
+                'has_access': True,
+                'is_corporate': True
+            }
+        elif subscription is None:
+            services[service_type] = {
+                'has_access': False,
+                'requires_subscription': True
+            }
+        else:
+            services[service_type] = {
+                'has_access': subscription.can_use_service(),
+                'current_usage': subscription.current_usage,
+                'usage_limit': subscription.plan.usage_limit,
+                'usage_remaining': subscription.usage_remaining,
+                'subscription': UserServiceSubscriptionSerializer(subscription).data
+            }
+
+    data = {
+        'is_corporate': is_corporate,
+        'services': services
+    }
+
+    payload = json.dumps(data, sort_keys=True, cls=DjangoJSONEncoder)
+    etag = quote_etag(hashlib.md5(payload.encode()).hexdigest())
+
+    if etag in parse_etags(request.META.get('HTTP_IF_NONE_MATCH', '')):
+        response = Response(status=status.HTTP_304_NOT_MODIFIED)
+    else:
+        response = Response(data)
+
+    response['ETag'] = etag
+    patch_cache_control(response, private=True, no_cache=True)
+    return response
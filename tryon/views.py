@@ -16,13 +16,18 @@ from .serializers import (
 from .services import FalAITryOnService
 from core.models import DemoInvitation, DemoUsageLog
 from subscriptions.decorators import require_service_access
+from subscriptions.throttling import ServicePlanRateThrottle
 
 logger = logging.getLogger(__name__)
 
 
-@method_decorator(require_service_access('tryon', increment_usage=True), name='dispatch')
+# Guard create() rather than dispatch() so usage is only charged once
+# authentication and ServicePlanRateThrottle have let the request through.
+@method_decorator(require_service_access('tryon', increment_usage=True), name='create')
 class TryOnRequestCreateView(generics.CreateAPIView):
     permission_classes = [permissions.IsAuthenticated]
+    throttle_classes = [ServicePlanRateThrottle]
+    service_type = 'tryon'
 
     def get_serializer_class(self):
         content_type = self.request.content_type
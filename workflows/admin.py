@@ -1,6 +1,9 @@
 from django.contrib import admin
-from .models import WorkflowCategory, Workflow, PurchasedWorkflow, WorkflowExecution, WorkflowRating
+from django.db import transaction
+from .models import WorkflowCategory, Workflow, PurchasedWorkflow, WorkflowExecution, WorkflowRating, Tag
 from .forms import WorkflowAdminForm
+from .ratings import apply_rating_change
+from .tags import delete_tags
 
 
 @admin.register(WorkflowCategory)
@@ -17,7 +20,7 @@ class WorkflowAdmin(admin.ModelAdmin):
     list_display = ['title', 'category', 'price', 'status', 'view_count', 'purchase_count', 'is_featured']
     list_filter = ['status', 'category', 'is_featured', 'created_at']
     search_fields = ['title', 'description', 'tags']
-    readonly_fields = ['view_count', 'purchase_count', 'rating_average', 'rating_count']
+    readonly_fields = ['view_count', 'purchase_count', 'rating_average', 'rating_count', 'rating_histogram']
 
     fieldsets = (
         ('Temel Bilgiler', {
@@ -34,12 +37,28 @@ class WorkflowAdmin(admin.ModelAdmin):
             'fields': ('is_featured',)
         }),
         ('İstatistikler', {
-            'fields': ('view_count', 'purchase_count', 'rating_average', 'rating_count'),
+            'fields': ('view_count', 'purchase_count', 'rating_average', 'rating_count', 'rating_histogram'),
             'classes': ('collapse',)
         }),
     )
 
 
+@admin.register(Tag)
+class TagAdmin(admin.ModelAdmin):
+    list_display = ['name', 'created_at']
+    search_fields = ['name']
+
+    def get_readonly_fields(self, request, obj=None):
+        # Workflow.tags holds names; rename by editing the workflows instead
+        return ['name'] if obj else []
+
+    def delete_model(self, request, obj):
+        delete_tags([obj])
+
+    def delete_queryset(self, request, queryset):
+        delete_tags(list(queryset))
+
+
 @admin.register(PurchasedWorkflow)
 class PurchasedWorkflowAdmin(admin.ModelAdmin):
     list_display = ['user', 'workflow', 'purchase_price', 'purchased_at']
@@ -50,10 +69,11 @@ class PurchasedWorkflowAdmin(admin.ModelAdmin):
 
 @admin.register(WorkflowExecution)
 class WorkflowExecutionAdmin(admin.ModelAdmin):
-    list_display = ['workflow', 'user', 'execution_id', 'status', 'started_at']
+    list_display = ['workflow', 'user', 'execution_id', 'status', 'attempts', 'started_at', 'finished_at']
     list_filter = ['status', 'started_at']
     search_fields = ['user__email', 'workflow__title', 'execution_id']
     raw_id_fields = ['user', 'workflow']
+    readonly_fields = ['attempts', 'started_at', 'finished_at', 'result', 'error_message']
 
 
 @admin.register(WorkflowRating)
@@ -62,3 +82,15 @@ class WorkflowRatingAdmin(admin.ModelAdmin):
     list_filter = ['rating', 'created_at']
     search_fields = ['user__email', 'workflow__title']
     raw_id_fields = ['user', 'workflow']
+
+    def get_readonly_fields(self, request, obj=None):
+        # Moving a rating between workflows would need two aggregate updates
+        return ['user', 'workflow'] if obj else []
+
+    def save_model(self, request, obj, form, change):
+        # Same locking as rate_workflow_view so the aggregates stay in step
+        with transaction.atomic():
+            Workflow.objects.select_for_update().only('id').get(id=obj.workflow_id)
+            previous = WorkflowRating.objects.filter(id=obj.id).values_list('rating', flat=True).first() if change else None
+            super().save_model(request, obj, form, change)
+            apply_rating_change(obj.workflow_id, previous, obj.rating)
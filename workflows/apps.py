@@ -1,6 +1,12 @@
 from django.apps import AppConfig
+from django.db.models.signals import post_migrate
 
 
 class WorkflowsConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'workflows'
+
+    def ready(self):
+        from . import signals  # noqa: F401
+        from .search import ensure_sqlite_search_index
+        post_migrate.connect(ensure_sqlite_search_index, sender=self)
@@ -0,0 +1,113 @@
+from collections import Counter
+from datetime import timedelta
+from django.conf import settings
+from django.db.models import Case, F, IntegerField, Value, When
+from django.utils import timezone
+from redis.exceptions import RedisError
+import logging
+import threading
+import time
+
+from core.redis_client import get_redis_connection
+from .models import Workflow
+
+logger = logging.getLogger(__name__)
+
+PENDING_KEY = 'workflows:counters:pending'
+VIEWS_DAY_KEY = 'workflows:views:{day:%Y%m%d}'
+VIEWS_DAY_TTL = timedelta(days=15)
+
+VIEW = 'view_count'
+PURCHASE = 'purchase_count'
+
+# Used while Redis is unreachable; flushed from the request path
+_local = Counter()
+_local_lock = threading.Lock()
+_local_flushed_at = time.monotonic()
+
+
+def _increment(workflow_id, field, amount=1):
+    try:
+        pipe = get_redis_connection().pipeline(transaction=False)
+        pipe.hincrby(PENDING_KEY, f'{workflow_id}:{field}', amount)
+        if field == VIEW:
+            # Per-day views feed the trending score (workflows.trending)
+            day_key = VIEWS_DAY_KEY.format(day=timezone.now())
+            pipe.hincrby(day_key, workflow_id, amount)
+            pipe.expire(day_key, VIEWS_DAY_TTL)
+        pipe.execute()
+        return
+    except RedisError as e:
+        logger.warning(f"Workflow counters unavailable, buffering in process: {str(e)}")
+
+    global _local_flushed_at
+    with _local_lock:
+        _local[(workflow_id, field)] += amount
+        due = (
+            sum(_local.values()) >= settings.WORKFLOW_COUNTER_LOCAL_FLUSH_SIZE
+            or time.monotonic() - _local_flushed_at >= settings.WORKFLOW_COUNTER_FLUSH_INTERVAL
+        )
+        if not due:
+            return
+        deltas = dict(_local)
+        _local.clear()
+        _local_flushed_at = time.monotonic()
+    apply_deltas(deltas)
+
+
+def record_view(workflow_id):
+    _increment(workflow_id, VIEW)
+
+
+def record_purchase(workflow_id):
+    _increment(workflow_id, PURCHASE)
+
+
+def apply_deltas(deltas):
+    """
+    Add {(workflow_id, field): amount} to the stored counters in a single
+    UPDATE. Returns the number of workflows touched.
+    """
+    per_field = {VIEW: {}, PURCHASE: {}}
+    for (workflow_id, field), amount in deltas.items():
+        if amount:
+            per_field[field][workflow_id] = amount
+
+    workflow_ids = set(per_field[VIEW]) | set(per_field[PURCHASE])
+    if not workflow_ids:
+        return 0
+
+    updates = {}
+    for field, amounts in per_field.items():
+        if amounts:
+            updates[field] = F(field) + Case(
+                *[When(id=workflow_id, then=Value(amount)) for workflow_id, amount in amounts.items()],
+                default=Value(0),
+                output_field=IntegerField()
+            )
+    # Skips auto_now on updated_at: a view is not an edit
+    return Workflow.objects.filter(id__in=workflow_ids).update(**updates)
+
+
+def flush_counters():
+    """Move buffered Redis deltas into the database."""
+    conn = get_redis_connection()
+    pipe = conn.pipeline()
+    pipe.hgetall(PENDING_KEY)
+    pipe.delete(PENDING_KEY)
+    raw, _ = pipe.execute()
+
+    deltas = {}
+    for key, value in raw.items():
+        workflow_id, field = key.decode().split(':', 1)
+        deltas[(int(workflow_id), field)] = int(value)
+
+    try:
+        return apply_deltas(deltas)
+    except Exception:
+        # Put the deltas back so the next flush retries them
+        pipe = conn.pipeline()
+        for (workflow_id, field), amount in deltas.items():
+            pipe.hincrby(PENDING_KEY, f'{workflow_id}:{field}', amount)
+        pipe.execute()
+        raise
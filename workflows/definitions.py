@@ -0,0 +1,65 @@
+from datetime import timedelta
+from django.conf import settings
+from django.utils import timezone
+from functools import lru_cache
+import hashlib
+import json
+import zlib
+
+COMPRESSION_LEVEL = 6
+
+
+def canonical_json(data):
+    # Key order and whitespace must not change the hash of an identical definition
+    return json.dumps(data, sort_keys=True, separators=(',', ':'), ensure_ascii=False).encode()
+
+
+def definition_hash(data):
+    return hashlib.sha256(canonical_json(data)).hexdigest()
+
+
+def store_definition(data):
+    """Store `data` once per distinct content and return its hash."""
+    from .models import WorkflowDefinition
+
+    raw = canonical_json(data)
+    digest = hashlib.sha256(raw).hexdigest()
+    WorkflowDefinition.objects.bulk_create([
+        WorkflowDefinition(hash=digest, data=zlib.compress(raw, COMPRESSION_LEVEL), size=len(raw))
+    ], ignore_conflicts=True)
+    return digest
+
+
+@lru_cache(maxsize=256)
+def _load_raw(digest):
+    # Content-addressed rows never change, so per-process caching is always safe.
+    # A miss raises instead of returning None: lru_cache doesn't keep exceptions,
+    # so a row that is not committed yet is found on the next call.
+    from .models import WorkflowDefinition
+
+    compressed = WorkflowDefinition.objects.filter(hash=digest).values_list('data', flat=True).first()
+    if compressed is None:
+        raise WorkflowDefinition.DoesNotExist(digest)
+    return zlib.decompress(compressed)
+
+
+def load_definition(digest):
+    from .models import WorkflowDefinition
+
+    try:
+        return json.loads(_load_raw(digest))
+    except WorkflowDefinition.DoesNotExist:
+        return {}
+
+
+def delete_orphaned_definitions(older_than=None):
+    """Delete definitions no workflow references any more; returns how many."""
+    from .models import WorkflowDefinition
+
+    if older_than is None:
+        older_than = timedelta(hours=settings.WORKFLOW_DEFINITION_ORPHAN_HOURS)
+    deleted, _ = WorkflowDefinition.objects.filter(
+        workflows__isnull=True,
+        created_at__lt=timezone.now() - older_than
+    ).delete()
+    return deleted
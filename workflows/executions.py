@@ -0,0 +1,184 @@
+from datetime import timedelta
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+from requests.adapters import HTTPAdapter
+import logging
+import requests
+import threading
+import uuid
+
+from .models import ExecutionStatus, WorkflowExecution
+
+logger = logging.getLogger(__name__)
+
+User = get_user_model()
+
+ACTIVE_STATUSES = [ExecutionStatus.PENDING, ExecutionStatus.RUNNING]
+
+_session = None
+_session_lock = threading.Lock()
+
+
+class ExecutionError(Exception):
+    def __init__(self, message, retryable=False):
+        super().__init__(message)
+        self.retryable = retryable
+
+
+def get_session():
+    """One pooled requests.Session per process; retries are left to Celery."""
+    global _session
+    if _session is None:
+        with _session_lock:
+            if _session is None:
+                session = requests.Session()
+                adapter = HTTPAdapter(pool_connections=1, pool_maxsize=settings.N8N_POOL_SIZE)
+                session.mount('https://', adapter)
+                session.mount('http://', adapter)
+                _session = session
+    return _session
+
+
+def dispatch_to_n8n(execution):
+    """Run the workflow's n8n JSON with the execution's input and return n8n's result."""
+    if not settings.N8N_URL:
+        return {'id': f'stub-{execution.execution_id}', 'finished': True, 'stub': True}
+
+    headers = {'X-N8N-API-KEY': settings.N8N_API_KEY} if settings.N8N_API_KEY else {}
+    try:
+        response = get_session().post(
+            f"{settings.N8N_URL.rstrip('/')}{settings.N8N_EXECUTE_PATH}",
+            json={
+                'workflowData': execution.workflow.n8n_workflow_data,
+                'runData': execution.execution_data,
+                'executionId': execution.execution_id,
+            },
+            headers=headers,
+            timeout=(3.05, settings.WORKFLOW_EXECUTION_TIMEOUT),
+        )
+    except requests.Timeout as e:
+        # n8n may still be running it, so a retry could repeat its side effects
+        raise ExecutionError(f'n8n did not answer within {settings.WORKFLOW_EXECUTION_TIMEOUT}s') from e
+    except requests.RequestException as e:
+        raise ExecutionError(f'Could not reach n8n: {str(e)}', retryable=True) from e
+
+    if response.status_code == 429 or response.status_code >= 500:
+        raise ExecutionError(f'n8n answered HTTP {response.status_code}', retryable=True)
+    if response.status_code >= 400:
+        raise ExecutionError(f'n8n rejected the workflow (HTTP {response.status_code}): {response.text[:500]}')
+
+    try:
+        data = response.json()
+    except ValueError:
+        raise ExecutionError('n8n returned invalid JSON')
+    data = data.get('data', data) if isinstance(data, dict) else {}
+
+    if data.get('finished') is False:
+        raise ExecutionError(str(data.get('error') or 'n8n reported the execution as failed'))
+    return data
+
+
+def start_execution(user, workflow, execution_data):
+    """
+    Queue an execution for `user`. Returns None when the user already has
+    WORKFLOW_EXECUTION_MAX_CONCURRENT_PER_USER executions pending or running.
+    """
+    from .tasks import execute_workflow
+
+    with transaction.atomic():
+        # Serializes submissions per user so concurrent requests cannot overshoot the cap
+        User.objects.select_for_update().filter(id=user.id).values_list('id', flat=True).first()
+
+        active = WorkflowExecution.objects.filter(user=user, status__in=ACTIVE_STATUSES).count()
+        if active >= settings.WORKFLOW_EXECUTION_MAX_CONCURRENT_PER_USER:
+            return None
+
+        execution = WorkflowExecution.objects.create(
+            user=user,
+            workflow=workflow,
+            execution_id=str(uuid.uuid4()),
+            status=ExecutionStatus.PENDING,
+            execution_data=execution_data
+        )
+        transaction.on_commit(lambda: execute_workflow.delay(execution.execution_id))
+    return execution
+
+
+def _transition(execution_id, from_status, to_status, **fields):
+    return WorkflowExecution.objects.filter(
+        execution_id=execution_id,
+        status=from_status
+    ).update(status=to_status, **fields)
+
+
+def fail_execution(execution_id, error_message, from_status=ExecutionStatus.RUNNING):
+    return _transition(
+        execution_id, from_status, ExecutionStatus.FAILED,
+        error_message=error_message, finished_at=timezone.now()
+    )
+
+
+def run_execution(execution_id):
+    """
+    Claim a pending execution and run it. Returns the final status, or None
+    if another worker already claimed it. Retryable errors put the execution
+    back to pending and are re-raised for the caller to schedule a retry.
+    """
+    claimed = _transition(
+        execution_id, ExecutionStatus.PENDING, ExecutionStatus.RUNNING,
+        started_at=timezone.now(), attempts=F('attempts') + 1
+    )
+    if not claimed:
+        return None
+
+    execution = WorkflowExecution.objects.select_related('workflow').get(execution_id=execution_id)
+    try:
+        result = dispatch_to_n8n(execution)
+    except ExecutionError as e:
+        if e.retryable:
+            _transition(execution_id, ExecutionStatus.RUNNING, ExecutionStatus.PENDING, error_message=str(e))
+            raise
+        logger.warning(f"Execution {execution_id} failed: {str(e)}")
+        fail_execution(execution_id, str(e))
+        return ExecutionStatus.FAILED
+
+    _transition(
+        execution_id, ExecutionStatus.RUNNING, ExecutionStatus.SUCCEEDED,
+        result=result, error_message='', finished_at=timezone.now()
+    )
+    return ExecutionStatus.SUCCEEDED
+
+
+def sweep_stale_executions():
+    """
+    Fail executions whose worker died mid-run and re-queue pending ones
+    whose task was lost. Returns (failed, requeued).
+    """
+    from .tasks import execute_workflow
+
+    now = timezone.now()
+    running_cutoff = now - timedelta(seconds=settings.WORKFLOW_EXECUTION_TIMEOUT * 2)
+    failed = WorkflowExecution.objects.filter(
+        status=ExecutionStatus.RUNNING,
+        started_at__lt=running_cutoff
+    ).update(
+        status=ExecutionStatus.FAILED,
+        error_message='Execution timed out',
+        finished_at=now
+    )
+
+    # Longer than the whole retry schedule, so executions waiting on a retry are left alone
+    pending_cutoff = now - timedelta(
+        seconds=settings.WORKFLOW_EXECUTION_RETRY_BACKOFF * 2 ** (settings.WORKFLOW_EXECUTION_MAX_RETRIES + 1) + 300
+    )
+    execution_ids = list(WorkflowExecution.objects.filter(
+        status=ExecutionStatus.PENDING,
+        created_at__lt=pending_cutoff
+    ).values_list('execution_id', flat=True)[:500])
+    for execution_id in execution_ids:
+        execute_workflow.delay(execution_id)
+
+    return failed, len(execution_ids)
@@ -0,0 +1,100 @@
+from collections import Counter
+from django.conf import settings
+from django.db.models import Case, CharField, Count, Value, When
+from redis.exceptions import RedisError
+import hashlib
+import json
+import logging
+
+from core.redis_client import get_redis_connection
+from .models import WorkflowTag
+
+logger = logging.getLogger(__name__)
+
+VERSION_KEY = 'workflows:facets:version'
+CACHE_KEY = 'workflows:facets:{version}:{signature}'
+
+# Query parameters that change the page or its order but not the counts
+IGNORED_PARAMS = {'page', 'page_size', 'ordering'}
+
+
+def price_buckets():
+    """[(label, lower, upper)] with upper None for the open-ended last bucket."""
+    bounds = [0] + sorted(settings.WORKFLOW_FACET_PRICE_BUCKETS)
+    buckets = [(f'{lower}-{upper}', lower, upper) for lower, upper in zip(bounds, bounds[1:])]
+    buckets.append((f'{bounds[-1]}+', bounds[-1], None))
+    return buckets
+
+
+def facet_signature(query_params):
+    state = sorted(
+        (key, sorted(query_params.getlist(key)))
+        for key in query_params
+        if key not in IGNORED_PARAMS
+    )
+    return hashlib.sha1(json.dumps(state).encode()).hexdigest()
+
+
+def _tag_counts(queryset):
+    return WorkflowTag.objects.filter(
+        workflow__in=queryset.order_by().values('id')
+    ).values_list('tag__name').annotate(count=Count('id')).order_by('-count', 'tag__name')[
+        :settings.WORKFLOW_FACET_TAG_LIMIT
+    ]
+
+
+def compute_facets(queryset):
+    """Counts per category, price bucket, featured flag and tag for `queryset`."""
+    buckets = price_buckets()
+    rows = queryset.order_by().annotate(price_bucket=Case(
+        *[When(price__lt=upper, then=Value(label)) for label, _, upper in buckets if upper is not None],
+        default=Value(buckets[-1][0]),
+        output_field=CharField()
+    )).values('category_id', 'category__name', 'price_bucket', 'is_featured').annotate(count=Count('id'))
+
+    # One grouped query over the facet combinations, rolled up per facet here
+    total = 0
+    categories, prices, featured = {}, Counter(), Counter()
+    for row in rows:
+        total += row['count']
+        category = categories.setdefault(row['category_id'], {
+            'id': row['category_id'], 'name': row['category__name'], 'count': 0
+        })
+        category['count'] += row['count']
+        prices[row['price_bucket']] += row['count']
+        featured[row['is_featured']] += row['count']
+
+    return {
+        'total': total,
+        'categories': sorted(categories.values(), key=lambda category: -category['count']),
+        'price': [{'bucket': label, 'count': prices[label]} for label, _, _ in buckets],
+        'featured': {'true': featured[True], 'false': featured[False]},
+        'tags': [{'tag': tag, 'count': count} for tag, count in _tag_counts(queryset)],
+    }
+
+
+def get_facets(queryset, signature):
+    try:
+        conn = get_redis_connection()
+        key = CACHE_KEY.format(version=int(conn.get(VERSION_KEY) or 0), signature=signature)
+        cached = conn.get(key)
+        if cached is not None:
+            return json.loads(cached)
+    except RedisError as e:
+        logger.warning(f"Facet cache unavailable, computing directly: {str(e)}")
+        return compute_facets(queryset)
+
+    facets = compute_facets(queryset)
+    try:
+        conn.set(key, json.dumps(facets), ex=settings.WORKFLOW_FACETS_CACHE_TTL)
+    except RedisError as e:
+        logger.warning(f"Could not cache facets: {str(e)}")
+    return facets
+
+
+def invalidate_facets():
+    # Old entries are orphaned by the new version and expire on their own
+    try:
+        get_redis_connection().incr(VERSION_KEY)
+    except RedisError as e:
+        logger.warning(f"Could not bump facet cache version: {str(e)}")
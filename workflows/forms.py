@@ -1,5 +1,6 @@
 from django import forms
 from .models import Workflow
+from .tags import normalize_tags
 import json
 
 
@@ -22,7 +23,7 @@ class WorkflowAdminForm(forms.ModelForm):
 
     class Meta:
         model = Workflow
-        exclude = ['preview_images', 'tags', 'n8n_workflow_data']
+        exclude = ['preview_images', 'tags']
 
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
@@ -67,11 +68,7 @@ class WorkflowAdminForm(forms.ModelForm):
             instance.preview_images = []
 
         tags_text = self.cleaned_data.get('tags_text')
-        if tags_text:
-            tags = [tag.strip() for tag in tags_text.split(',') if tag.strip()]
-            instance.tags = tags
-        else:
-            instance.tags = []
+        instance.tags = normalize_tags(tags_text)
 
         n8n_workflow_json = self.cleaned_data.get('n8n_workflow_json')
         if n8n_workflow_json:
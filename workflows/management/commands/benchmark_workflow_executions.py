@@ -0,0 +1,69 @@
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+import time
+import uuid
+
+from workflows.executions import ExecutionError, run_execution
+from workflows.models import ExecutionStatus, Workflow, WorkflowExecution, WorkflowStatus
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    help = 'Run executions against the configured n8n (e.g. run_fake_n8n) and report throughput'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--count', type=int, default=500)
+        parser.add_argument('--workers', type=int, default=8, help='Stands in for the executions queue concurrency')
+        parser.add_argument('--workflow', type=int, help='Workflow id; defaults to the first active one')
+        parser.add_argument('--keep', action='store_true', help='Keep the scratch user and its executions')
+
+    def handle(self, *args, **options):
+        workflows = Workflow.objects.filter(status=WorkflowStatus.ACTIVE)
+        if options['workflow']:
+            workflows = workflows.filter(id=options['workflow'])
+        workflow = workflows.order_by('id').first()
+        if workflow is None:
+            raise CommandError('No active workflow to execute')
+
+        suffix = uuid.uuid4().hex[:8]
+        user = User.objects.create_user(
+            username=f'execution-benchmark-{suffix}',
+            email=f'execution-benchmark-{suffix}@example.invalid'
+        )
+        executions = WorkflowExecution.objects.bulk_create([
+            WorkflowExecution(
+                user=user,
+                workflow=workflow,
+                execution_id=str(uuid.uuid4()),
+                status=ExecutionStatus.PENDING,
+                execution_data={'benchmark': index}
+            )
+            for index in range(options['count'])
+        ])
+
+        def worker(execution_id):
+            try:
+                return run_execution(execution_id)
+            except ExecutionError:
+                return 'retryable error'
+            finally:
+                connections.close_all()
+
+        started = time.monotonic()
+        with ThreadPoolExecutor(max_workers=options['workers']) as pool:
+            outcomes = Counter(pool.map(worker, [execution.execution_id for execution in executions]))
+        elapsed = time.monotonic() - started
+
+        self.stdout.write(
+            f"{options['count']} executions of '{workflow.title}' with {options['workers']} workers "
+            f"in {elapsed:.2f}s ({options['count'] / elapsed:.0f}/s)"
+        )
+        for outcome, count in sorted(outcomes.items(), key=lambda item: str(item[0])):
+            self.stdout.write(f"  {outcome}: {count}")
+
+        if not options['keep']:
+            user.delete()
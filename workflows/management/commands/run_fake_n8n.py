@@ -0,0 +1,73 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import json
+import random
+import time
+import uuid
+
+
+class FakeN8nHandler(BaseHTTPRequestHandler):
+    latency = 0.0
+    failure_rate = 0.0
+    error_rate = 0.0
+
+    def do_POST(self):
+        time.sleep(self.latency)
+
+        try:
+            body = json.loads(self.rfile.read(int(self.headers.get('Content-Length', 0))) or b'{}')
+        except json.JSONDecodeError:
+            return self._send(400, {'message': 'Invalid JSON'})
+
+        if self.path != settings.N8N_EXECUTE_PATH:
+            return self._send(404, {'message': 'Not found'})
+        if random.random() < self.failure_rate:
+            return self._send(503, {'message': 'Simulated outage'})
+
+        nodes = len((body.get('workflowData') or {}).get('nodes', []))
+        if random.random() < self.error_rate:
+            return self._send(200, {'data': {
+                'id': uuid.uuid4().hex, 'finished': False, 'error': 'Simulated node error'
+            }})
+        return self._send(200, {'data': {
+            'id': uuid.uuid4().hex, 'finished': True, 'mode': 'manual', 'nodesExecuted': nodes
+        }})
+
+    def _send(self, status_code, data):
+        content = json.dumps(data).encode()
+        self.send_response(status_code)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(content)))
+        self.end_headers()
+        self.wfile.write(content)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class Command(BaseCommand):
+    help = 'Run a local fake n8n for development and execution benchmarks'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--host', default='127.0.0.1')
+        parser.add_argument('--port', type=int, default=5679)
+        parser.add_argument('--latency-ms', type=int, default=0, help='Delay added to every response')
+        parser.add_argument('--failure-rate', type=float, default=0.0, help='Share of requests answered with 503')
+        parser.add_argument('--error-rate', type=float, default=0.0, help='Share of executions reported as failed')
+
+    def handle(self, *args, **options):
+        FakeN8nHandler.latency = options['latency_ms'] / 1000
+        FakeN8nHandler.failure_rate = options['failure_rate']
+        FakeN8nHandler.error_rate = options['error_rate']
+
+        server = ThreadingHTTPServer((options['host'], options['port']), FakeN8nHandler)
+        self.stdout.write(self.style.SUCCESS(
+            f"Fake n8n listening on http://{options['host']}:{options['port']} (set N8N_URL to use it)"
+        ))
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            server.server_close()
@@ -0,0 +1,67 @@
+# Generated by Django 5.2.18 on 2026-10-19 14:39
+
+import django.contrib.postgres.indexes
+import django.contrib.postgres.search
+from django.db import migrations
+
+from core.migration_operations import AddIndexConcurrentlyIfSupported
+
+CREATE_TRIGGER_SQL = """
+CREATE OR REPLACE FUNCTION workflows_workflow_search_vector_update() RETURNS trigger AS $$
+BEGIN
+    NEW.search_vector :=
+        setweight(to_tsvector('simple', coalesce(NEW.title, '')), 'A') ||
+        setweight(to_tsvector('simple', coalesce((
+            SELECT string_agg(tag, ' ')
+            FROM jsonb_array_elements_text(
+                CASE WHEN jsonb_typeof(NEW.tags) = 'array' THEN NEW.tags ELSE '[]'::jsonb END
+            ) AS tag
+        ), '')), 'B') ||
+        setweight(to_tsvector('simple', coalesce(NEW.description, '')), 'C');
+    RETURN NEW;
+END
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER workflows_workflow_search_vector_trigger
+BEFORE INSERT OR UPDATE OF title, description, tags ON workflows_workflow
+FOR EACH ROW EXECUTE FUNCTION workflows_workflow_search_vector_update();
+
+UPDATE workflows_workflow SET title = title;
+"""
+
+DROP_TRIGGER_SQL = """
+DROP TRIGGER IF EXISTS workflows_workflow_search_vector_trigger ON workflows_workflow;
+DROP FUNCTION IF EXISTS workflows_workflow_search_vector_update();
+"""
+
+
+def create_search_trigger(apps, schema_editor):
+    # SQLite uses an FTS5 table instead, created by workflows.search on post_migrate
+    if schema_editor.connection.vendor == 'postgresql':
+        schema_editor.execute(CREATE_TRIGGER_SQL)
+
+
+def drop_search_trigger(apps, schema_editor):
+    if schema_editor.connection.vendor == 'postgresql':
+        schema_editor.execute(DROP_TRIGGER_SQL)
+
+
+class Migration(migrations.Migration):
+    atomic = False
+
+    dependencies = [
+        ('workflows', '0002_remove_workflow_seller'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='workflow',
+            name='search_vector',
+            field=django.contrib.postgres.search.SearchVectorField(editable=False, null=True),
+        ),
+        migrations.RunPython(create_search_trigger, drop_search_trigger),
+        AddIndexConcurrentlyIfSupported(
+            model_name='workflow',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['search_vector'], name='workflows_w_search__2aff86_gin'),
+        ),
+    ]
@@ -0,0 +1,64 @@
+# Generated by Django 5.2.18 on 2026-10-19 14:42
+
+from django.db import migrations, models
+from django.db.models import Count, Q, Sum
+
+
+def backfill_rating_aggregates(apps, schema_editor):
+    Workflow = apps.get_model('workflows', 'Workflow')
+    WorkflowRating = apps.get_model('workflows', 'WorkflowRating')
+
+    rows = WorkflowRating.objects.values('workflow_id').annotate(
+        total=Sum('rating'),
+        count=Count('id'),
+        **{f'rating_{stars}_count': Count('id', filter=Q(rating=stars)) for stars in range(1, 6)}
+    )
+    for row in rows.iterator():
+        workflow_id, total, count = row.pop('workflow_id'), row.pop('total'), row.pop('count')
+        Workflow.objects.filter(id=workflow_id).update(
+            rating_sum=total,
+            rating_count=count,
+            rating_average=round(total / count, 2),
+            **row
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('workflows', '0003_workflow_search_vector'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='workflow',
+            name='rating_1_count',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='workflow',
+            name='rating_2_count',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='workflow',
+            name='rating_3_count',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='workflow',
+            name='rating_4_count',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='workflow',
+            name='rating_5_count',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='workflow',
+            name='rating_sum',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.RunPython(backfill_rating_aggregates, migrations.RunPython.noop),
+    ]
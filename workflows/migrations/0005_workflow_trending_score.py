@@ -0,0 +1,25 @@
+# Generated by Django 5.2.18 on 2026-10-19 14:44
+
+from django.db import migrations, models
+
+from core.migration_operations import AddIndexConcurrentlyIfSupported
+
+
+class Migration(migrations.Migration):
+    atomic = False
+
+    dependencies = [
+        ('workflows', '0004_workflow_rating_aggregates'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='workflow',
+            name='trending_score',
+            field=models.FloatField(default=0, editable=False),
+        ),
+        AddIndexConcurrentlyIfSupported(
+            model_name='workflow',
+            index=models.Index(fields=['status', '-trending_score', '-id'], name='workflows_w_status_05ecd8_idx'),
+        ),
+    ]
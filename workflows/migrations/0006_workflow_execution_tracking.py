@@ -0,0 +1,50 @@
+# Generated by Django 5.2.18 on 2026-10-19 14:46
+
+from django.conf import settings
+from django.db import migrations, models
+
+from core.migration_operations import AddIndexConcurrentlyIfSupported
+
+
+class Migration(migrations.Migration):
+    atomic = False
+
+    dependencies = [
+        ('workflows', '0005_workflow_trending_score'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AlterModelOptions(
+            name='workflowexecution',
+            options={'ordering': ['-created_at']},
+        ),
+        migrations.AddField(
+            model_name='workflowexecution',
+            name='attempts',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='workflowexecution',
+            name='result',
+            field=models.JSONField(blank=True, default=dict),
+        ),
+        migrations.AlterField(
+            model_name='workflowexecution',
+            name='started_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AlterField(
+            model_name='workflowexecution',
+            name='status',
+            field=models.CharField(choices=[('pending', 'Pending'), ('running', 'Running'), ('succeeded', 'Succeeded'), ('failed', 'Failed')], default='pending', max_length=50),
+        ),
+        AddIndexConcurrentlyIfSupported(
+            model_name='workflowexecution',
+            index=models.Index(fields=['user', 'status'], name='workflows_w_user_id_8d4a06_idx'),
+        ),
+        AddIndexConcurrentlyIfSupported(
+            model_name='workflowexecution',
+            index=models.Index(fields=['status', 'created_at'], name='workflows_w_status_2a79d2_idx'),
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.2.18 on 2026-10-19 14:48
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('workflows', '0006_workflow_execution_tracking'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='WorkflowNeighbors',
+            fields=[
+                ('workflow', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='neighbors', serialize=False, to='workflows.workflow')),
+                ('neighbor_ids', models.JSONField(default=list)),
+                ('scores', models.JSONField(default=list)),
+                ('computed_at', models.DateTimeField()),
+            ],
+        ),
+    ]
@@ -0,0 +1,83 @@
+# Generated by Django 5.2.18 on 2026-10-19 14:50
+
+import django.db.models.deletion
+from django.db import migrations, models, transaction
+
+BATCH_SIZE = 500
+MAX_TAG_LENGTH = 50
+
+
+# Copied from workflows.tags so later changes there cannot alter this migration
+def _normalize_tags(values):
+    tags = []
+    for value in values:
+        tag = ' '.join(str(value).replace('#', ' ').split()).lower()[:MAX_TAG_LENGTH]
+        if tag and tag not in tags:
+            tags.append(tag)
+    return tags
+
+
+def backfill_workflow_tags(apps, schema_editor):
+    Workflow = apps.get_model('workflows', 'Workflow')
+    Tag = apps.get_model('workflows', 'Tag')
+    WorkflowTag = apps.get_model('workflows', 'WorkflowTag')
+
+    # Keyset batches, each committed on its own, so large catalogs are not locked for the whole run
+    last_id = 0
+    while True:
+        workflows = list(Workflow.objects.filter(id__gt=last_id).order_by('id').only('id', 'tags')[:BATCH_SIZE])
+        if not workflows:
+            return
+        last_id = workflows[-1].id
+
+        with transaction.atomic():
+            changed = []
+            for workflow in workflows:
+                tags = _normalize_tags(workflow.tags if isinstance(workflow.tags, list) else [])
+                if tags != workflow.tags:
+                    workflow.tags = tags
+                    changed.append(workflow)
+            Workflow.objects.bulk_update(changed, ['tags'])
+
+            names = {name for workflow in workflows for name in workflow.tags}
+            Tag.objects.bulk_create([Tag(name=name) for name in names], ignore_conflicts=True)
+            tag_ids = dict(Tag.objects.filter(name__in=names).values_list('name', 'id'))
+            WorkflowTag.objects.bulk_create([
+                WorkflowTag(workflow_id=workflow.id, tag_id=tag_ids[name])
+                for workflow in workflows
+                for name in workflow.tags
+            ], ignore_conflicts=True)
+
+
+class Migration(migrations.Migration):
+    atomic = False
+
+    dependencies = [
+        ('workflows', '0007_workflowneighbors'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Tag',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=50, unique=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'ordering': ['name'],
+            },
+        ),
+        migrations.CreateModel(
+            name='WorkflowTag',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('tag', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='workflow_links', to='workflows.tag')),
+                ('workflow', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='tag_links', to='workflows.workflow')),
+            ],
+            options={
+                'unique_together': {('tag', 'workflow')},
+            },
+        ),
+        migrations.RunPython(backfill_workflow_tags, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,87 @@
+# Generated by Django 5.2.18 on 2026-10-19 14:52
+
+import django.db.models.deletion
+import hashlib
+import json
+import zlib
+from django.db import migrations, models, transaction
+
+BATCH_SIZE = 200
+
+
+def _canonical_json(data):
+    return json.dumps(data, sort_keys=True, separators=(',', ':'), ensure_ascii=False).encode()
+
+
+def move_definitions_to_blobs(apps, schema_editor):
+    Workflow = apps.get_model('workflows', 'Workflow')
+    WorkflowDefinition = apps.get_model('workflows', 'WorkflowDefinition')
+
+    last_id = 0
+    while True:
+        workflows = list(
+            Workflow.objects.filter(id__gt=last_id).order_by('id').only('id', 'n8n_workflow_data')[:BATCH_SIZE]
+        )
+        if not workflows:
+            return
+        last_id = workflows[-1].id
+
+        with transaction.atomic():
+            blobs = {}
+            for workflow in workflows:
+                raw = _canonical_json(workflow.n8n_workflow_data or {})
+                workflow.definition_id = hashlib.sha256(raw).hexdigest()
+                blobs[workflow.definition_id] = raw
+
+            WorkflowDefinition.objects.bulk_create([
+                WorkflowDefinition(hash=digest, data=zlib.compress(raw, 6), size=len(raw))
+                for digest, raw in blobs.items()
+            ], ignore_conflicts=True)
+            Workflow.objects.bulk_update(workflows, ['definition'])
+
+
+def move_definitions_inline(apps, schema_editor):
+    Workflow = apps.get_model('workflows', 'Workflow')
+    WorkflowDefinition = apps.get_model('workflows', 'WorkflowDefinition')
+
+    for workflow in Workflow.objects.exclude(definition=None).only('id', 'definition').iterator():
+        compressed = WorkflowDefinition.objects.filter(hash=workflow.definition_id).values_list('data', flat=True).first()
+        Workflow.objects.filter(id=workflow.id).update(
+            n8n_workflow_data=json.loads(zlib.decompress(compressed)) if compressed is not None else {}
+        )
+
+
+class Migration(migrations.Migration):
+    atomic = False
+
+    dependencies = [
+        ('workflows', '0008_workflow_tags'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='WorkflowDefinition',
+            fields=[
+                ('hash', models.CharField(max_length=64, primary_key=True, serialize=False)),
+                ('data', models.BinaryField()),
+                ('size', models.PositiveIntegerField(help_text='Uncompressed size in bytes')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+        ),
+        migrations.AddField(
+            model_name='workflow',
+            name='definition',
+            field=models.ForeignKey(editable=False, null=True, on_delete=django.db.models.deletion.PROTECT, related_name='workflows', to='workflows.workflowdefinition'),
+        ),
+        # Nullable while moving, so the field can be re-added on rollback
+        migrations.AlterField(
+            model_name='workflow',
+            name='n8n_workflow_data',
+            field=models.JSONField(help_text='N8N workflow JSON data', null=True),
+        ),
+        migrations.RunPython(move_definitions_to_blobs, move_definitions_inline),
+        migrations.RemoveField(
+            model_name='workflow',
+            name='n8n_workflow_data',
+        ),
+    ]
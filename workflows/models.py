@@ -1,5 +1,7 @@
 from django.db import models
 from django.contrib.auth import get_user_model
+from django.contrib.postgres.indexes import GinIndex
+from django.contrib.postgres.search import SearchVectorField
 
 User = get_user_model()
 
@@ -23,12 +25,33 @@ class WorkflowStatus(models.TextChoices):
     ARCHIVED = 'archived', 'Archived'
 
 
+class ExecutionStatus(models.TextChoices):
+    PENDING = 'pending', 'Pending'
+    RUNNING = 'running', 'Running'
+    SUCCEEDED = 'succeeded', 'Succeeded'
+    FAILED = 'failed', 'Failed'
+
+
+class WorkflowDefinition(models.Model):
+    """Content-addressed, zlib-compressed n8n workflow JSON, shared by identical versions."""
+    hash = models.CharField(max_length=64, primary_key=True)
+    data = models.BinaryField()
+    size = models.PositiveIntegerField(help_text="Uncompressed size in bytes")
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return self.hash
+
+
 class Workflow(models.Model):
     title = models.CharField(max_length=200)
     description = models.TextField()
     category = models.ForeignKey(WorkflowCategory, on_delete=models.SET_NULL, null=True)
     price = models.DecimalField(max_digits=10, decimal_places=2)
-    n8n_workflow_data = models.JSONField(help_text="N8N workflow JSON data")
+    # N8N workflow JSON, read and written through the n8n_workflow_data property
+    definition = models.ForeignKey(
+        WorkflowDefinition, on_delete=models.PROTECT, null=True, editable=False, related_name='workflows'
+    )
     preview_images = models.JSONField(default=list, help_text="List of preview image URLs")
     tags = models.JSONField(default=list, help_text="List of tags")
     status = models.CharField(max_length=20, choices=WorkflowStatus.choices, default=WorkflowStatus.DRAFT)
@@ -37,11 +60,52 @@ class Workflow(models.Model):
     purchase_count = models.IntegerField(default=0)
     rating_average = models.DecimalField(max_digits=3, decimal_places=2, default=0)
     rating_count = models.IntegerField(default=0)
+    # Maintained incrementally by workflows.ratings.apply_rating_change
+    rating_sum = models.IntegerField(default=0)
+    rating_1_count = models.IntegerField(default=0)
+    rating_2_count = models.IntegerField(default=0)
+    rating_3_count = models.IntegerField(default=0)
+    rating_4_count = models.IntegerField(default=0)
+    rating_5_count = models.IntegerField(default=0)
+    # Time-decayed popularity, recomputed periodically by workflows.trending
+    trending_score = models.FloatField(default=0, editable=False)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    # Maintained by a database trigger on PostgreSQL; see workflows.search
+    search_vector = SearchVectorField(null=True, editable=False)
+
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            GinIndex(fields=['search_vector']),
+            models.Index(fields=['status', '-trending_score', '-id']),
+        ]
+
+    _n8n_workflow_data = None
+    _definition_changed = False
+
+    @property
+    def n8n_workflow_data(self):
+        # Loaded on first access only, so list queries never read the blob
+        if self._n8n_workflow_data is None and self.definition_id:
+            from .definitions import load_definition
+            self._n8n_workflow_data = load_definition(self.definition_id)
+        return self._n8n_workflow_data if self._n8n_workflow_data is not None else {}
+
+    @n8n_workflow_data.setter
+    def n8n_workflow_data(self, value):
+        self._n8n_workflow_data = value
+        self._definition_changed = True
+
+    def save(self, *args, **kwargs):
+        from .tags import normalize_tags
+        self.tags = normalize_tags(self.tags)
+        if self._definition_changed:
+            from .definitions import store_definition
+            self.definition_id = store_definition(self._n8n_workflow_data or {})
+            self._definition_changed = False
+        super().save(*args, **kwargs)
 
     def __str__(self):
         return self.title
@@ -50,6 +114,34 @@ class Workflow(models.Model):
     def is_published(self):
         return self.status == WorkflowStatus.ACTIVE
 
+    @property
+    def rating_histogram(self):
+        return {stars: getattr(self, f'rating_{stars}_count') for stars in range(1, 6)}
+
+
+class Tag(models.Model):
+    # Normalized by workflows.tags.normalize_tag
+    name = models.CharField(max_length=50, unique=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ['name']
+
+    def __str__(self):
+        return self.name
+
+
+class WorkflowTag(models.Model):
+    """Indexed copy of Workflow.tags, kept in sync on save."""
+    workflow = models.ForeignKey(Workflow, on_delete=models.CASCADE, related_name='tag_links')
+    tag = models.ForeignKey(Tag, on_delete=models.CASCADE, related_name='workflow_links')
+
+    class Meta:
+        unique_together = ['tag', 'workflow']
+
+    def __str__(self):
+        return f"{self.workflow_id} - {self.tag_id}"
+
 
 class PurchasedWorkflow(models.Model):
     user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='purchased_workflows')
@@ -70,20 +162,39 @@ class WorkflowExecution(models.Model):
     user = models.ForeignKey(User, on_delete=models.CASCADE)
     workflow = models.ForeignKey(Workflow, on_delete=models.CASCADE)
     execution_id = models.CharField(max_length=100, unique=True)
-    status = models.CharField(max_length=50)
-    started_at = models.DateTimeField()
+    status = models.CharField(max_length=50, choices=ExecutionStatus.choices, default=ExecutionStatus.PENDING)
+    started_at = models.DateTimeField(null=True, blank=True)
     finished_at = models.DateTimeField(null=True, blank=True)
     execution_data = models.JSONField(default=dict)
+    result = models.JSONField(default=dict, blank=True)
+    attempts = models.PositiveIntegerField(default=0)
     error_message = models.TextField(blank=True)
     created_at = models.DateTimeField(auto_now_add=True)
 
     class Meta:
-        ordering = ['-started_at']
+        ordering = ['-created_at']
+        indexes = [
+            # Per-user concurrency cap counts active executions
+            models.Index(fields=['user', 'status']),
+            models.Index(fields=['status', 'created_at']),
+        ]
 
     def __str__(self):
         return f"{self.workflow.title} - {self.execution_id}"
 
 
+class WorkflowNeighbors(models.Model):
+    """Top co-purchased workflows, rebuilt by workflows.recommendations."""
+    workflow = models.OneToOneField(Workflow, on_delete=models.CASCADE, primary_key=True, related_name='neighbors')
+    # Parallel lists, best match first
+    neighbor_ids = models.JSONField(default=list)
+    scores = models.JSONField(default=list)
+    computed_at = models.DateTimeField()
+
+    def __str__(self):
+        return f"Neighbors of {self.workflow_id}"
+
+
 class WorkflowRating(models.Model):
     user = models.ForeignKey(User, on_delete=models.CASCADE)
     workflow = models.ForeignKey(Workflow, on_delete=models.CASCADE, related_name='ratings')
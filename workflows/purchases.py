@@ -0,0 +1,94 @@
+from redis.exceptions import RedisError
+import json
+import logging
+import uuid
+
+from core.redis_client import get_redis_connection
+from .models import PurchasedWorkflow
+
+logger = logging.getLogger(__name__)
+
+KEY_FORMAT = 'workflows:purchased:{user_id}'
+KEY_TTL = 3600
+
+# Same compare-and-set as accounts.authentication: the set is only stored
+# under the version it was read under, so a purchase that commits while a
+# miss reads the database invalidates it instead of being hidden for KEY_TTL.
+STORE_SCRIPT = """
+local version = redis.call('HGET', KEYS[1], 'version')
+if not version then
+    if ARGV[1] ~= '' then
+        return false
+    end
+    redis.call('HSET', KEYS[1], 'version', ARGV[4])
+elseif version ~= ARGV[1] then
+    return false
+end
+redis.call('HSET', KEYS[1], 'data', ARGV[2])
+redis.call('EXPIRE', KEYS[1], ARGV[3])
+return 1
+"""
+
+_script = None
+
+
+def _get_script():
+    global _script
+    if _script is None:
+        _script = get_redis_connection().register_script(STORE_SCRIPT)
+    return _script
+
+
+def _query_purchased_ids(user_id):
+    return frozenset(PurchasedWorkflow.objects.filter(
+        user_id=user_id, is_active=True
+    ).values_list('workflow_id', flat=True))
+
+
+def load_purchased_ids(user_id):
+    """Ids of the workflows `user_id` actively owns; one query on a cache miss."""
+    key = KEY_FORMAT.format(user_id=user_id)
+    try:
+        version, cached = get_redis_connection().hmget(key, 'version', 'data')
+    except RedisError as e:
+        logger.warning(f"Purchased workflow cache unavailable: {str(e)}")
+        return _query_purchased_ids(user_id)
+
+    if cached is not None:
+        return frozenset(json.loads(cached))
+
+    ids = _query_purchased_ids(user_id)
+    try:
+        _get_script()(keys=[key], args=[
+            version.decode() if version is not None else '',
+            json.dumps(sorted(ids)),
+            KEY_TTL,
+            uuid.uuid4().hex
+        ])
+    except RedisError as e:
+        logger.warning(f"Could not cache purchased workflows: {str(e)}")
+    return ids
+
+
+def purchased_workflow_ids(request):
+    """The request user's purchased workflow ids, resolved once per request."""
+    if request is None or not request.user.is_authenticated:
+        return frozenset()
+
+    ids = getattr(request, '_purchased_workflow_ids', None)
+    if ids is None:
+        ids = load_purchased_ids(request.user.id)
+        request._purchased_workflow_ids = ids
+    return ids
+
+
+def invalidate_purchased_ids(user_id):
+    try:
+        pipe = get_redis_connection().pipeline()
+        key = KEY_FORMAT.format(user_id=user_id)
+        pipe.hset(key, 'version', uuid.uuid4().hex)
+        pipe.hdel(key, 'data')
+        pipe.expire(key, KEY_TTL)
+        pipe.execute()
+    except RedisError as e:
+        logger.warning(f"Could not invalidate purchased workflows of user {user_id}: {str(e)}")
@@ -0,0 +1,41 @@
+from django.db.models import DecimalField, F, FloatField, Value
+from django.db.models.functions import Cast, Coalesce, NullIf
+
+from .models import Workflow
+
+
+def histogram_field(stars):
+    return f'rating_{stars}_count'
+
+
+def apply_rating_change(workflow_id, old_rating=None, new_rating=None):
+    """
+    Fold one rating change into the workflow's stored aggregates with a
+    single UPDATE. old_rating is None for a new rating, new_rating is None
+    for a deleted one. Must run in the transaction that writes the rating.
+    """
+    if old_rating == new_rating:
+        return 0
+
+    sum_delta = (new_rating or 0) - (old_rating or 0)
+    count_delta = (new_rating is not None) - (old_rating is not None)
+
+    updates = {
+        'rating_sum': F('rating_sum') + sum_delta,
+        'rating_count': F('rating_count') + count_delta,
+        # SET expressions see the row before this UPDATE, so apply the deltas here too
+        'rating_average': Cast(
+            Coalesce(
+                Cast(F('rating_sum') + sum_delta, FloatField()) / NullIf(F('rating_count') + count_delta, 0),
+                Value(0.0)
+            ),
+            DecimalField(max_digits=3, decimal_places=2)
+        ),
+    }
+    if old_rating is not None:
+        updates[histogram_field(old_rating)] = F(histogram_field(old_rating)) - 1
+    if new_rating is not None:
+        updates[histogram_field(new_rating)] = F(histogram_field(new_rating)) + 1
+
+    return Workflow.objects.filter(id=workflow_id).update(**updates)
+
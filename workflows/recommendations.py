@@ -0,0 +1,93 @@
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+import logging
+import numpy as np
+import scipy.sparse as sp
+import time
+
+from .models import PurchasedWorkflow, WorkflowNeighbors
+
+logger = logging.getLogger(__name__)
+
+# Workflows per block of the item-item product; bounds peak memory
+BLOCK_SIZE = 1000
+
+
+def compute_neighbors(user_ids, workflow_ids, top_k, min_copurchases=1):
+    """
+    Item-item cosine similarity over a binary user x workflow purchase
+    matrix. Takes parallel arrays of purchases and returns
+    {workflow_id: (neighbor_ids, scores)} with the top_k neighbors.
+    """
+    if not len(workflow_ids):
+        return {}
+
+    items, item_index = np.unique(workflow_ids, return_inverse=True)
+    _, user_index = np.unique(user_ids, return_inverse=True)
+
+    # Items as rows; repeated purchases collapse to a single 1
+    matrix = sp.csr_matrix(
+        (np.ones(len(item_index), dtype=np.float32), (item_index, user_index)),
+        shape=(len(items), user_index.max() + 1)
+    )
+    matrix.sum_duplicates()
+    matrix.data[:] = 1
+    buyers = np.asarray(matrix.sum(axis=1), dtype=np.float64).ravel()
+    transposed = matrix.T.tocsc()
+
+    neighbors = {}
+    for start in range(0, len(items), BLOCK_SIZE):
+        # Shared-buyer counts for this block of items against every item
+        copurchases = (matrix[start:start + BLOCK_SIZE] @ transposed).tocoo()
+        rows, cols, counts = copurchases.row + start, copurchases.col, copurchases.data
+
+        keep = (rows != cols) & (counts >= min_copurchases)
+        rows, cols, counts = rows[keep], cols[keep], counts[keep]
+        scores = counts / np.sqrt(buyers[rows] * buyers[cols])
+
+        # Group by item, best score first
+        order = np.lexsort((-scores, rows))
+        rows, cols, scores = rows[order], cols[order], scores[order]
+        if not len(rows):
+            continue
+        boundaries = np.flatnonzero(np.diff(rows)) + 1
+        for first, row_cols, row_scores in zip(
+            np.concatenate(([0], boundaries)), np.split(cols, boundaries), np.split(scores, boundaries)
+        ):
+            neighbors[int(items[rows[first]])] = (
+                items[row_cols[:top_k]].tolist(),
+                np.round(row_scores[:top_k], 4).tolist()
+            )
+    return neighbors
+
+
+def refresh_recommendations():
+    """Rebuild every workflow's neighbors from active purchases. Returns the number stored."""
+    started = time.monotonic()
+    purchases = np.array(
+        list(PurchasedWorkflow.objects.filter(is_active=True).values_list('user_id', 'workflow_id').iterator(chunk_size=10000)),
+        dtype=np.int64
+    ).reshape(-1, 2)
+    loaded = time.monotonic()
+
+    neighbors = compute_neighbors(
+        purchases[:, 0], purchases[:, 1],
+        top_k=settings.WORKFLOW_RECOMMENDATIONS_TOP_K,
+        min_copurchases=settings.WORKFLOW_RECOMMENDATIONS_MIN_COPURCHASES
+    )
+    computed = time.monotonic()
+
+    now = timezone.now()
+    with transaction.atomic():
+        WorkflowNeighbors.objects.all().delete()
+        WorkflowNeighbors.objects.bulk_create([
+            WorkflowNeighbors(workflow_id=workflow_id, neighbor_ids=ids, scores=scores, computed_at=now)
+            for workflow_id, (ids, scores) in neighbors.items()
+        ], batch_size=1000)
+
+    logger.info(
+        f"Recommendations for {len(neighbors)} workflows from {len(purchases)} purchases: "
+        f"load {loaded - started:.1f}s, compute {computed - loaded:.1f}s, store {time.monotonic() - computed:.1f}s"
+    )
+    return len(neighbors)
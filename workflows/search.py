@@ -0,0 +1,127 @@
+from django.contrib.postgres.search import SearchQuery, SearchRank
+from django.db import connection
+from django.db.models import F
+from django.db.models.expressions import RawSQL
+from rest_framework import filters
+import re
+
+# Must match the configuration used by the search_vector trigger (migration 0003)
+SEARCH_CONFIG = 'simple'
+FTS_TABLE = 'workflows_workflow_fts'
+
+
+def _fts5_query(term):
+    # Quote every word so user input cannot inject FTS5 syntax; the last word matches as a prefix
+    words = re.findall(r'\w+', term)
+    if not words:
+        return None
+    quoted = [f'"{word}"' for word in words]
+    quoted[-1] += '*'
+    return ' '.join(quoted)
+
+
+def search_workflows(queryset, term):
+    """
+    Filter `queryset` to workflows matching `term`, annotated with
+    `search_rank` (higher is better). Title matches weigh most, then
+    tags, then description.
+    """
+    if connection.vendor == 'postgresql':
+        query = SearchQuery(term, config=SEARCH_CONFIG, search_type='websearch')
+        return queryset.filter(search_vector=query).annotate(
+            search_rank=SearchRank(F('search_vector'), query)
+        )
+
+    if connection.vendor == 'sqlite':
+        match = _fts5_query(term)
+        if match is None:
+            return queryset.none()
+        # bm25() is lower for better matches; column weights follow (title, description, tags)
+        return queryset.filter(
+            id__in=RawSQL(f'SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s', [match])
+        ).annotate(search_rank=RawSQL(
+            f'SELECT -bm25({FTS_TABLE}, 10.0, 2.0, 5.0) FROM {FTS_TABLE} '
+            f'WHERE {FTS_TABLE} MATCH %s AND rowid = workflows_workflow.id',
+            [match]
+        ))
+
+    return queryset.filter(title__icontains=term)
+
+
+class WorkflowOrderingFilter(filters.OrderingFilter):
+    """
+    OrderingFilter with ?ordering=trending (hottest first, backed by the
+    status/trending_score/id index). The id tie-break keeps pages stable.
+    """
+    aliases = {
+        'trending': ['-trending_score', '-id'],
+        '-trending': ['trending_score', 'id'],
+    }
+
+    def get_ordering(self, request, queryset, view):
+        ordering = super().get_ordering(request, queryset, view)
+        if not ordering:
+            return ordering
+
+        expanded = []
+        for term in ordering:
+            expanded.extend(self.aliases.get(term, [term]))
+        return expanded
+
+
+class WorkflowSearchFilter(filters.BaseFilterBackend):
+    """
+    Ranked full-text search on ?search=. Results are ordered by relevance
+    unless the client asks for an explicit ?ordering=, so it must come
+    after OrderingFilter in `filter_backends`.
+    """
+    search_param = filters.SearchFilter.search_param
+
+    def filter_queryset(self, request, queryset, view):
+        term = request.query_params.get(self.search_param, '').strip()
+        if not term:
+            return queryset
+
+        queryset = search_workflows(queryset, term)
+        if 'search_rank' in queryset.query.annotations and not request.query_params.get(
+            filters.OrderingFilter.ordering_param
+        ):
+            queryset = queryset.order_by('-search_rank', '-id')
+        return queryset
+
+    def get_schema_operation_parameters(self, view):
+        return filters.SearchFilter().get_schema_operation_parameters(view)
+
+
+SQLITE_FTS_SQL = [
+    f"CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5("
+    f"title, description, tags, content='workflows_workflow', content_rowid='id')",
+    f"CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_ai AFTER INSERT ON workflows_workflow BEGIN "
+    f"INSERT INTO {FTS_TABLE}(rowid, title, description, tags) VALUES (new.id, new.title, new.description, new.tags); "
+    f"END",
+    f"CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_ad AFTER DELETE ON workflows_workflow BEGIN "
+    f"INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, title, description, tags) "
+    f"VALUES ('delete', old.id, old.title, old.description, old.tags); "
+    f"END",
+    f"CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_au AFTER UPDATE OF title, description, tags ON workflows_workflow BEGIN "
+    f"INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, title, description, tags) "
+    f"VALUES ('delete', old.id, old.title, old.description, old.tags); "
+    f"INSERT INTO {FTS_TABLE}(rowid, title, description, tags) VALUES (new.id, new.title, new.description, new.tags); "
+    f"END",
+    f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('rebuild')",
+]
+
+
+def ensure_sqlite_search_index(sender, using='default', **kwargs):
+    """
+    post_migrate hook for the SQLite development database. Recreated after
+    every migrate because SQLite table rebuilds drop the triggers.
+    """
+    from django.db import connections
+
+    db = connections[using]
+    if db.vendor != 'sqlite' or 'workflows_workflow' not in db.introspection.table_names():
+        return
+    with db.cursor() as cursor:
+        for statement in SQLITE_FTS_SQL:
+            cursor.execute(statement)
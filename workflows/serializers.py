@@ -3,6 +3,8 @@ from .models import (
     WorkflowCategory, Workflow, PurchasedWorkflow,
     WorkflowExecution, WorkflowRating, WorkflowStatus
 )
+from .purchases import purchased_workflow_ids
+from .tags import normalize_tags
 from accounts.serializers import UserSerializer
 
 
@@ -12,9 +14,23 @@ class WorkflowCategorySerializer(serializers.ModelSerializer):
         fields = '__all__'
 
 
-class WorkflowSerializer(serializers.ModelSerializer):
+class PurchasedFlagMixin:
+    """
+    is_purchased from the `purchased_workflow_ids` context entry, or the
+    request's memoized set, so a whole list costs at most one query.
+    """
+
+    def get_is_purchased(self, obj):
+        ids = self.context.get('purchased_workflow_ids')
+        if ids is None:
+            ids = purchased_workflow_ids(self.context.get('request'))
+        return obj.id in ids
+
+
+class WorkflowSerializer(PurchasedFlagMixin, serializers.ModelSerializer):
     category = WorkflowCategorySerializer(read_only=True)
     is_published = serializers.ReadOnlyField()
+    is_purchased = serializers.SerializerMethodField()
 
     class Meta:
         model = Workflow
@@ -22,7 +38,7 @@ class WorkflowSerializer(serializers.ModelSerializer):
             'id', 'title', 'description', 'category', 'price',
             'preview_images', 'tags', 'status', 'is_featured', 'view_count',
             'purchase_count', 'rating_average', 'rating_count', 'is_published',
-            'created_at', 'updated_at'
+            'is_purchased', 'created_at', 'updated_at'
         ]
         read_only_fields = [
             'view_count', 'purchase_count', 'rating_average', 'rating_count',
@@ -47,6 +63,7 @@ class WorkflowCreateSerializer(serializers.ModelSerializer):
         required=False,
         help_text="N8N workflow as JSON string"
     )
+    n8n_workflow_data = serializers.JSONField(help_text="N8N workflow JSON data")
 
     class Meta:
         model = Workflow
@@ -83,9 +100,7 @@ class WorkflowCreateSerializer(serializers.ModelSerializer):
             ]
 
         if tags_text:
-            validated_data['tags'] = [
-                tag.strip() for tag in tags_text.split(',') if tag.strip()
-            ]
+            validated_data['tags'] = normalize_tags(tags_text)
 
         if n8n_workflow_json:
             import json
@@ -94,10 +109,12 @@ class WorkflowCreateSerializer(serializers.ModelSerializer):
         return super().create(validated_data)
 
 
-class WorkflowDetailSerializer(serializers.ModelSerializer):
+class WorkflowDetailSerializer(PurchasedFlagMixin, serializers.ModelSerializer):
     category = WorkflowCategorySerializer(read_only=True)
     is_published = serializers.ReadOnlyField()
     is_purchased = serializers.SerializerMethodField()
+    rating_histogram = serializers.ReadOnlyField()
+    n8n_workflow_data = serializers.JSONField(read_only=True)
 
     class Meta:
         model = Workflow
@@ -105,19 +122,9 @@ class WorkflowDetailSerializer(serializers.ModelSerializer):
             'id', 'title', 'description', 'category', 'price',
             'n8n_workflow_data', 'preview_images', 'tags', 'status',
             'is_featured', 'view_count', 'purchase_count', 'rating_average',
-            'rating_count', 'is_published', 'is_purchased', 'created_at'
+            'rating_count', 'rating_histogram', 'is_published', 'is_purchased', 'created_at'
         ]
 
-    def get_is_purchased(self, obj):
-        request = self.context.get('request')
-        if request and request.user.is_authenticated:
-            return PurchasedWorkflow.objects.filter(
-                user=request.user,
-                workflow=obj,
-                is_active=True
-            ).exists()
-        return False
-
 
 class PurchasedWorkflowSerializer(serializers.ModelSerializer):
     workflow = WorkflowSerializer(read_only=True)
@@ -158,17 +165,11 @@ class ExecuteWorkflowSerializer(serializers.Serializer):
         if not request or not request.user.is_authenticated:
             raise serializers.ValidationError("Authentication required")
 
-        try:
-            workflow = Workflow.objects.get(id=value)
-            if not PurchasedWorkflow.objects.filter(
-                user=request.user,
-                workflow=workflow,
-                is_active=True
-            ).exists():
-                raise serializers.ValidationError("Workflow not purchased or access denied")
-            return value
-        except Workflow.DoesNotExist:
-            raise serializers.ValidationError("Workflow not found")
+        if value not in purchased_workflow_ids(request):
+            if not Workflow.objects.filter(id=value).exists():
+                raise serializers.ValidationError("Workflow not found")
+            raise serializers.ValidationError("Workflow not purchased or access denied")
+        return value
 
 
 class WorkflowRatingSerializer(serializers.ModelSerializer):
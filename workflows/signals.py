@@ -0,0 +1,41 @@
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .counters import record_purchase
+from .facets import invalidate_facets
+from .models import PurchasedWorkflow, Workflow, WorkflowCategory, WorkflowRating
+from .purchases import invalidate_purchased_ids
+from .ratings import apply_rating_change
+from .tags import sync_workflow_tags
+
+
+@receiver(post_save, sender=PurchasedWorkflow)
+def count_workflow_purchase(sender, instance, created, **kwargs):
+    if created:
+        transaction.on_commit(lambda: record_purchase(instance.workflow_id))
+
+
+@receiver(post_save, sender=PurchasedWorkflow)
+@receiver(post_delete, sender=PurchasedWorkflow)
+def purchases_changed(sender, instance, **kwargs):
+    transaction.on_commit(lambda: invalidate_purchased_ids(instance.user_id))
+
+
+@receiver(post_delete, sender=WorkflowRating)
+def remove_deleted_rating(sender, instance, **kwargs):
+    apply_rating_change(instance.workflow_id, old_rating=instance.rating)
+
+
+@receiver(post_save, sender=Workflow)
+@receiver(post_delete, sender=Workflow)
+@receiver(post_save, sender=WorkflowCategory)
+@receiver(post_delete, sender=WorkflowCategory)
+def catalog_changed(sender, **kwargs):
+    transaction.on_commit(invalidate_facets)
+
+
+@receiver(post_save, sender=Workflow)
+def workflow_tags_changed(sender, instance, update_fields=None, **kwargs):
+    if update_fields is None or 'tags' in update_fields:
+        sync_workflow_tags(instance)
@@ -0,0 +1,59 @@
+from django.db import transaction
+
+from .models import Tag, Workflow, WorkflowTag
+
+MAX_TAG_LENGTH = 50
+
+
+def normalize_tag(value):
+    # '#Email  Marketing ' and 'email marketing' are the same tag
+    return ' '.join(str(value).replace('#', ' ').split()).lower()[:MAX_TAG_LENGTH]
+
+
+def normalize_tags(values):
+    """Normalize a list (or comma-separated string) of tags, dropping blanks and duplicates."""
+    if isinstance(values, str):
+        values = values.split(',')
+
+    tags = []
+    for value in values or []:
+        tag = normalize_tag(value)
+        if tag and tag not in tags:
+            tags.append(tag)
+    return tags
+
+
+def sync_workflow_tags(workflow):
+    """Make the workflow's WorkflowTag rows match its (normalized) `tags` list."""
+    with transaction.atomic():
+        Tag.objects.bulk_create([Tag(name=name) for name in workflow.tags], ignore_conflicts=True)
+        tag_ids = set(Tag.objects.filter(name__in=workflow.tags).values_list('id', flat=True))
+
+        WorkflowTag.objects.filter(workflow=workflow).exclude(tag_id__in=tag_ids).delete()
+        WorkflowTag.objects.bulk_create(
+            [WorkflowTag(workflow=workflow, tag_id=tag_id) for tag_id in tag_ids],
+            ignore_conflicts=True
+        )
+
+
+def delete_tags(tags):
+    """Delete `tags` and drop them from the `tags` list of every workflow carrying them."""
+    tag_ids = [tag.id for tag in tags]
+    names = {tag.name for tag in tags}
+    with transaction.atomic():
+        workflows = Workflow.objects.select_for_update().filter(
+            id__in=WorkflowTag.objects.filter(tag_id__in=tag_ids).values('workflow_id')
+        )
+        for workflow in workflows:
+            workflow.tags = [name for name in workflow.tags if name not in names]
+            workflow.save(update_fields=['tags', 'updated_at'])
+        Tag.objects.filter(id__in=tag_ids).delete()
+
+
+def filter_by_tags(queryset, tags):
+    """Workflows carrying every tag in `tags`, resolved through the WorkflowTag index."""
+    for name in normalize_tags(tags):
+        queryset = queryset.filter(
+            id__in=WorkflowTag.objects.filter(tag__name=name).values('workflow_id')
+        )
+    return queryset
@@ -0,0 +1,60 @@
+from celery import shared_task
+from django.conf import settings
+import logging
+
+from .counters import flush_counters
+from .definitions import delete_orphaned_definitions
+from .executions import ExecutionError, fail_execution, run_execution, sweep_stale_executions
+from .models import ExecutionStatus
+from .recommendations import refresh_recommendations
+from .trending import refresh_trending_scores
+
+logger = logging.getLogger(__name__)
+
+
+@shared_task
+def flush_workflow_counters():
+    updated = flush_counters()
+    if updated:
+        logger.info(f"Flushed counters for {updated} workflows")
+    return updated
+
+
+@shared_task
+def refresh_trending_workflows():
+    updated = refresh_trending_scores()
+    logger.info(f"Updated trending scores for {updated} workflows")
+    return updated
+
+
+@shared_task(bind=True, max_retries=settings.WORKFLOW_EXECUTION_MAX_RETRIES)
+def execute_workflow(self, execution_id):
+    try:
+        return run_execution(execution_id)
+    except ExecutionError as e:
+        if self.request.retries >= self.max_retries:
+            fail_execution(execution_id, str(e), from_status=ExecutionStatus.PENDING)
+            return ExecutionStatus.FAILED
+        logger.warning(f"Execution {execution_id} will be retried: {str(e)}")
+        raise self.retry(exc=e, countdown=settings.WORKFLOW_EXECUTION_RETRY_BACKOFF * 2 ** self.request.retries)
+
+
+@shared_task
+def sweep_workflow_executions():
+    failed, requeued = sweep_stale_executions()
+    if failed or requeued:
+        logger.info(f"Failed {failed} stuck executions and re-queued {requeued} pending ones")
+    return {'failed': failed, 'requeued': requeued}
+
+
+@shared_task
+def refresh_workflow_recommendations():
+    return refresh_recommendations()
+
+
+@shared_task
+def delete_orphaned_workflow_definitions():
+    deleted = delete_orphaned_definitions()
+    if deleted:
+        logger.info(f"Deleted {deleted} orphaned workflow definitions")
+    return deleted
@@ -1,3 +1,145 @@
-from django.test import TestCase
+from decimal import Decimal
+from django.contrib.auth import get_user_model
+from django.test import SimpleTestCase, TestCase
+from unittest import mock
+import fakeredis
 
-# Create your tests here.
+import core.redis_client
+from . import purchases
+from .models import PurchasedWorkflow, Workflow
+from .purchases import KEY_FORMAT, invalidate_purchased_ids, load_purchased_ids
+from .ratings import apply_rating_change
+from .recommendations import compute_neighbors
+
+User = get_user_model()
+
+
+class ApplyRatingChangeTests(TestCase):
+    def setUp(self):
+        self.workflow = Workflow.objects.create(title='Invoice sync', description='Syncs invoices', price=10)
+
+    def aggregates(self):
+        self.workflow.refresh_from_db()
+        return (
+            self.workflow.rating_sum,
+            self.workflow.rating_count,
+            self.workflow.rating_average,
+            [getattr(self.workflow, f'rating_{stars}_count') for stars in range(1, 6)],
+        )
+
+    def test_new_ratings_are_added(self):
+        apply_rating_change(self.workflow.id, new_rating=5)
+        apply_rating_change(self.workflow.id, new_rating=2)
+
+        self.assertEqual(self.aggregates(), (7, 2, Decimal('3.50'), [0, 1, 0, 0, 1]))
+
+    def test_updated_rating_moves_between_buckets(self):
+        apply_rating_change(self.workflow.id, new_rating=5)
+        apply_rating_change(self.workflow.id, old_rating=5, new_rating=3)
+
+        self.assertEqual(self.aggregates(), (3, 1, Decimal('3.00'), [0, 0, 1, 0, 0]))
+
+    def test_unchanged_rating_is_a_no_op(self):
+        apply_rating_change(self.workflow.id, new_rating=4)
+
+        self.assertEqual(apply_rating_change(self.workflow.id, old_rating=4, new_rating=4), 0)
+        self.assertEqual(self.aggregates(), (4, 1, Decimal('4.00'), [0, 0, 0, 1, 0]))
+
+    def test_deleting_the_last_rating_resets_the_average(self):
+        apply_rating_change(self.workflow.id, new_rating=4)
+        apply_rating_change(self.workflow.id, old_rating=4)
+
+        self.assertEqual(self.aggregates(), (0, 0, Decimal('0.00'), [0, 0, 0, 0, 0]))
+
+
+class ComputeNeighborsTests(SimpleTestCase):
+    def neighbors(self, purchases, top_k, min_copurchases=1):
+        user_ids, workflow_ids = zip(*purchases) if purchases else ((), ())
+        return compute_neighbors(list(user_ids), list(workflow_ids), top_k, min_copurchases)
+
+    def test_neighbors_are_ordered_by_cosine_similarity(self):
+        # 10 and 20 share both buyers; 30 shares one of 10's two buyers and has a third
+        result = self.neighbors([(1, 10), (1, 20), (1, 30), (2, 10), (2, 20), (3, 30)], top_k=5)
+
+        self.assertEqual(result[10][0], [20, 30])
+        self.assertEqual(result[10][1], [1.0, 0.5])
+        # Equal scores, in no particular order
+        self.assertCountEqual(result[30][0], [10, 20])
+
+    def test_neighbors_are_cut_at_top_k(self):
+        purchases = [(1, 10)] + [(1, workflow_id) for workflow_id in range(20, 25)]
+        # 20 is bought together with 10 twice, the rest once
+        purchases += [(2, 10), (2, 20)]
+
+        result = self.neighbors(purchases, top_k=2)
+
+        self.assertEqual(len(result[10][0]), 2)
+        self.assertEqual(result[10][0][0], 20)
+
+    def test_min_copurchases_drops_weak_pairs(self):
+        result = self.neighbors([(1, 10), (1, 20), (2, 10), (2, 20), (3, 10), (3, 30)], top_k=5, min_copurchases=2)
+
+        self.assertEqual(result[10][0], [20])
+        self.assertNotIn(30, result)
+
+    def test_no_purchases(self):
+        self.assertEqual(self.neighbors([], top_k=5), {})
+
+    def test_repeated_purchases_count_once(self):
+        result = self.neighbors([(1, 10), (1, 10), (1, 20)], top_k=5)
+
+        self.assertEqual(result[10], ([20], [1.0]))
+
+
+class PurchasedIdsCacheTests(TestCase):
+    def setUp(self):
+        self.redis = fakeredis.FakeRedis()
+        core.redis_client._connection = self.redis
+        self.user = User.objects.create_user('buyer', 'buyer@example.com', 'secret-pass-1')
+        self.first = Workflow.objects.create(title='First', description='First workflow', price=10)
+        self.second = Workflow.objects.create(title='Second', description='Second workflow', price=10)
+
+    def purchase(self, workflow):
+        with self.captureOnCommitCallbacks(execute=True):
+            return PurchasedWorkflow.objects.create(
+                user=self.user, workflow=workflow, purchase_price=10, payment_id=f'pay_{workflow.id}'
+            )
+
+    def test_miss_is_cached(self):
+        self.purchase(self.first)
+
+        self.assertEqual(load_purchased_ids(self.user.id), {self.first.id})
+        with self.assertNumQueries(0):
+            self.assertEqual(load_purchased_ids(self.user.id), {self.first.id})
+
+    def test_purchase_invalidates_cached_set(self):
+        self.purchase(self.first)
+        load_purchased_ids(self.user.id)
+
+        self.purchase(self.second)
+
+        self.assertEqual(load_purchased_ids(self.user.id), {self.first.id, self.second.id})
+
+    def test_revoked_purchase_invalidates_cached_set(self):
+        purchase = self.purchase(self.first)
+        load_purchased_ids(self.user.id)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            purchase.is_active = False
+            purchase.save()
+
+        self.assertEqual(load_purchased_ids(self.user.id), frozenset())
+
+    def test_set_read_during_a_purchase_is_not_cached(self):
+        read = purchases._query_purchased_ids
+
+        def racing_read(user_id):
+            ids = read(user_id)
+            # A purchase commits between the query and the store
+            invalidate_purchased_ids(user_id)
+            return ids
+
+        with mock.patch('workflows.purchases._query_purchased_ids', side_effect=racing_read):
+            load_purchased_ids(self.user.id)
+
+        self.assertIsNone(self.redis.hget(KEY_FORMAT.format(user_id=self.user.id), 'data'))
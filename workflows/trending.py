@@ -0,0 +1,102 @@
+from datetime import datetime, time as datetime_time, timedelta
+from django.conf import settings
+from django.utils import timezone
+from redis.exceptions import RedisError
+import logging
+import numpy as np
+
+from core.redis_client import get_redis_connection
+from .counters import VIEWS_DAY_KEY
+from .models import PurchasedWorkflow, Workflow, WorkflowRating
+
+logger = logging.getLogger(__name__)
+
+VIEW_WEIGHT = 1.0
+PURCHASE_WEIGHT = 25.0
+# Scaled by stars / 5, so a one-star rating adds little
+RATING_WEIGHT = 10.0
+
+
+def _view_events(since, now):
+    """(workflow_ids, timestamps, weights) from the per-day view buckets."""
+    days = [since.date() + timedelta(days=offset) for offset in range((now.date() - since.date()).days + 1)]
+    try:
+        pipe = get_redis_connection().pipeline(transaction=False)
+        for day in days:
+            pipe.hgetall(VIEWS_DAY_KEY.format(day=day))
+        buckets = pipe.execute()
+    except RedisError as e:
+        logger.warning(f"Daily view counts unavailable, trending uses purchases and ratings only: {str(e)}")
+        return np.empty(0, dtype=np.int64), np.empty(0), np.empty(0)
+
+    ids, timestamps, weights = [], [], []
+    for day, bucket in zip(days, buckets):
+        if not bucket:
+            continue
+        # Views are only known per day; date them at midday, or now for today
+        midday = timezone.make_aware(datetime.combine(day, datetime_time(12)))
+        at = min(midday, now).timestamp()
+        ids.append(np.fromiter((int(workflow_id) for workflow_id in bucket.keys()), dtype=np.int64, count=len(bucket)))
+        weights.append(np.fromiter((int(count) for count in bucket.values()), dtype=np.float64, count=len(bucket)) * VIEW_WEIGHT)
+        timestamps.append(np.full(len(bucket), at))
+
+    if not ids:
+        return np.empty(0, dtype=np.int64), np.empty(0), np.empty(0)
+    return np.concatenate(ids), np.concatenate(timestamps), np.concatenate(weights)
+
+
+def _purchase_events(since):
+    rows = list(PurchasedWorkflow.objects.filter(purchased_at__gte=since).values_list('workflow_id', 'purchased_at'))
+    ids, timestamps = zip(*rows) if rows else ((), ())
+    return (
+        np.array(ids, dtype=np.int64),
+        np.array([at.timestamp() for at in timestamps], dtype=np.float64),
+        np.full(len(ids), PURCHASE_WEIGHT),
+    )
+
+
+def _rating_events(since):
+    rows = list(WorkflowRating.objects.filter(updated_at__gte=since).values_list('workflow_id', 'updated_at', 'rating'))
+    ids, timestamps, ratings = zip(*rows) if rows else ((), (), ())
+    return (
+        np.array(ids, dtype=np.int64),
+        np.array([at.timestamp() for at in timestamps], dtype=np.float64),
+        np.array(ratings, dtype=np.float64) / 5 * RATING_WEIGHT,
+    )
+
+
+def compute_trending_scores(now=None):
+    """
+    {workflow_id: score} where every view, purchase and rating in the window
+    counts with its weight halved for each half-life of age.
+    """
+    now = now or timezone.now()
+    since = now - timedelta(days=settings.WORKFLOW_TRENDING_WINDOW_DAYS)
+
+    events = [_view_events(since, now), _purchase_events(since), _rating_events(since)]
+    ids = np.concatenate([event[0] for event in events])
+    if not len(ids):
+        return {}
+    timestamps = np.concatenate([event[1] for event in events])
+    weights = np.concatenate([event[2] for event in events])
+
+    age_hours = np.maximum(now.timestamp() - timestamps, 0) / 3600
+    contributions = weights * np.exp2(-age_hours / settings.WORKFLOW_TRENDING_HALF_LIFE_HOURS)
+
+    workflow_ids, positions = np.unique(ids, return_inverse=True)
+    scores = np.round(np.bincount(positions, weights=contributions), 4)
+    return dict(zip(workflow_ids.tolist(), scores.tolist()))
+
+
+def refresh_trending_scores():
+    """Store fresh scores, writing only workflows whose score changed. Returns that count."""
+    scores = compute_trending_scores()
+    current = dict(Workflow.objects.filter(trending_score__gt=0).values_list('id', 'trending_score'))
+
+    changed = [
+        Workflow(id=workflow_id, trending_score=scores.get(workflow_id, 0))
+        for workflow_id in set(scores) | set(current)
+        if scores.get(workflow_id, 0) != current.get(workflow_id, 0)
+    ]
+    Workflow.objects.bulk_update(changed, ['trending_score'], batch_size=500)
+    return len(changed)
@@ -1,18 +1,21 @@
 from django.urls import path
 from .views import (
-    WorkflowListView, WorkflowDetailView, WorkflowCreateView,
+    WorkflowListView, WorkflowFacetsView, WorkflowDetailView, WorkflowCreateView,
     PurchaseWorkflowView, UserWorkflowsView, WorkflowExecutionView,
-    rate_workflow_view
+    WorkflowExecutionStatusView, rate_workflow_view, workflow_recommendations_view
 )
 
 app_name = 'workflows'
 
 urlpatterns = [
     path('', WorkflowListView.as_view(), name='list'),
+    path('facets/', WorkflowFacetsView.as_view(), name='facets'),
     path('<int:pk>/', WorkflowDetailView.as_view(), name='detail'),
     path('create/', WorkflowCreateView.as_view(), name='create'),
     path('purchase/', PurchaseWorkflowView.as_view(), name='purchase'),
     path('my-workflows/', UserWorkflowsView.as_view(), name='my_workflows'),
     path('execute/', WorkflowExecutionView.as_view(), name='execute'),
+    path('executions/<str:execution_id>/', WorkflowExecutionStatusView.as_view(), name='execution_status'),
     path('<int:pk>/rate/', rate_workflow_view, name='rate'),
+    path('<int:pk>/recommendations/', workflow_recommendations_view, name='recommendations'),
 ]
\ No newline at end of file
@@ -2,6 +2,7 @@ from rest_framework import generics, permissions, status, filters
 from rest_framework.decorators import api_view, permission_classes
 from rest_framework.response import Response
 from django.shortcuts import get_object_or_404
+from django.db import transaction
 from django.db.models import Q, F, Avg
 from django_filters.rest_framework import DjangoFilterBackend
 from django.utils import timezone
@@ -9,7 +10,7 @@ import uuid
 
 from .models import (
     WorkflowCategory, Workflow, PurchasedWorkflow, WorkflowExecution,
-    WorkflowRating, WorkflowStatus
+    WorkflowNeighbors, WorkflowRating, WorkflowStatus
 )
 from .serializers import (
     WorkflowSerializer, WorkflowDetailSerializer, WorkflowCreateSerializer,
@@ -17,20 +18,31 @@ from .serializers import (
     WorkflowExecutionSerializer, ExecuteWorkflowSerializer,
     WorkflowRatingSerializer, CreateRatingSerializer
 )
+from .counters import record_view
+from .executions import start_execution
+from .facets import facet_signature, get_facets
+from .ratings import apply_rating_change
+from .purchases import purchased_workflow_ids
+from .search import WorkflowOrderingFilter, WorkflowSearchFilter
+from .tags import filter_by_tags
 from accounts.permissions import IsVerifiedUser
 
 
 class WorkflowListView(generics.ListAPIView):
     serializer_class = WorkflowSerializer
     permission_classes = [permissions.AllowAny]
-    filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter]
+    filter_backends = [DjangoFilterBackend, WorkflowOrderingFilter, WorkflowSearchFilter]
     filterset_fields = ['category', 'price', 'is_featured']
-    search_fields = ['title', 'description', 'tags']
-    ordering_fields = ['created_at', 'price', 'rating_average', 'purchase_count']
+    ordering_fields = ['created_at', 'price', 'rating_average', 'purchase_count', 'trending']
     ordering = ['-created_at']
 
+    def get_serializer_context(self):
+        context = super().get_serializer_context()
+        context['purchased_workflow_ids'] = purchased_workflow_ids(self.request)
+        return context
+
     def get_queryset(self):
-        queryset = Workflow.objects.filter(status=WorkflowStatus.ACTIVE)
+        queryset = Workflow.objects.filter(status=WorkflowStatus.ACTIVE).defer('search_vector')
 
         min_price = self.request.query_params.get('min_price')
         max_price = self.request.query_params.get('max_price')
@@ -40,9 +52,22 @@ class WorkflowListView(generics.ListAPIView):
         if max_price:
             queryset = queryset.filter(price__lte=max_price)
 
+        tags = self.request.query_params.getlist('tag')
+        if tags:
+            queryset = filter_by_tags(queryset, tags)
+
         return queryset
 
 
+class WorkflowFacetsView(WorkflowListView):
+    """Sidebar counts for the list's current filters (same query parameters)."""
+    pagination_class = None
+
+    def list(self, request, *args, **kwargs):
+        queryset = self.filter_queryset(self.get_queryset())
+        return Response(get_facets(queryset, facet_signature(request.query_params)))
+
+
 class WorkflowDetailView(generics.RetrieveAPIView):
     serializer_class = WorkflowDetailSerializer
     permission_classes = [permissions.AllowAny]
@@ -52,9 +77,8 @@ class WorkflowDetailView(generics.RetrieveAPIView):
 
     def retrieve(self, request, *args, **kwargs):
         instance = self.get_object()
-
-        Workflow.objects.filter(id=instance.id).update(view_count=F('view_count') + 1)
-        instance.refresh_from_db()
+        # Buffered and written in bulk; view_count in the response lags by up to a flush interval
+        record_view(instance.id)
 
         serializer = self.get_serializer(instance)
         return Response(serializer.data)
@@ -81,10 +105,7 @@ class UserWorkflowsView(generics.ListAPIView):
         workflow_type = self.request.query_params.get('type', 'purchased')
 
         if workflow_type == 'purchased':
-            purchased_workflow_ids = PurchasedWorkflow.objects.filter(
-                user=user, is_active=True
-            ).values_list('workflow_id', flat=True)
-            return Workflow.objects.filter(id__in=purchased_workflow_ids)
+            return Workflow.objects.filter(id__in=purchased_workflow_ids(self.request))
 
         if workflow_type == 'all' and user.is_superuser:
             return Workflow.objects.all()
@@ -157,16 +178,11 @@ class WorkflowExecutionView(generics.CreateAPIView):
                 'error': 'You have reached your monthly execution limit'
             }, status=status.HTTP_403_FORBIDDEN)
 
-        execution_id = str(uuid.uuid4())
-
-        execution = WorkflowExecution.objects.create(
-            user=user,
-            workflow=workflow,
-            execution_id=execution_id,
-            status='pending',
-            started_at=timezone.now(),
-            execution_data=execution_data
-        )
+        execution = start_execution(user, workflow, execution_data)
+        if execution is None:
+            return Response({
+                'error': 'You have too many workflow executions running; wait for one to finish'
+            }, status=status.HTTP_429_TOO_MANY_REQUESTS)
 
         if hasattr(user, 'subscription'):
             user.subscription.current_execution_count += 1
@@ -174,10 +190,19 @@ class WorkflowExecutionView(generics.CreateAPIView):
 
         return Response({
             'execution': WorkflowExecutionSerializer(execution).data,
-            'message': 'Workflow execution started'
+            'message': 'Workflow execution queued'
         }, status=status.HTTP_201_CREATED)
 
 
+class WorkflowExecutionStatusView(generics.RetrieveAPIView):
+    serializer_class = WorkflowExecutionSerializer
+    permission_classes = [permissions.IsAuthenticated]
+    lookup_field = 'execution_id'
+
+    def get_queryset(self):
+        return WorkflowExecution.objects.filter(user=self.request.user).select_related('workflow__category')
+
+
 @api_view(['POST'])
 @permission_classes([permissions.IsAuthenticated])
 def rate_workflow_view(request, pk):
@@ -188,9 +213,7 @@ def rate_workflow_view(request, pk):
             'error': 'Workflow not found'
         }, status=status.HTTP_404_NOT_FOUND)
 
-    if not PurchasedWorkflow.objects.filter(
-        user=request.user, workflow=workflow, is_active=True
-    ).exists():
+    if workflow.id not in purchased_workflow_ids(request):
         return Response({
             'error': 'You must purchase this workflow to rate it'
         }, status=status.HTTP_403_FORBIDDEN)
@@ -198,20 +221,45 @@ def rate_workflow_view(request, pk):
     serializer = CreateRatingSerializer(data=request.data)
     serializer.is_valid(raise_exception=True)
 
-    rating, created = WorkflowRating.objects.update_or_create(
-        user=request.user,
-        workflow=workflow,
-        defaults=serializer.validated_data
-    )
+    with transaction.atomic():
+        # Serialize raters of this workflow; a missing rating row can't be locked,
+        # so two first ratings would otherwise both apply as new
+        Workflow.objects.select_for_update().only('id').get(id=workflow.id)
+        previous = WorkflowRating.objects.filter(
+            user=request.user, workflow=workflow
+        ).values_list('rating', flat=True).first()
 
-    workflow.rating_count = workflow.ratings.count()
-    workflow.rating_average = workflow.ratings.aggregate(
-        avg_rating=Avg('rating')
-    )['avg_rating'] or 0
-    workflow.save()
+        rating, created = WorkflowRating.objects.update_or_create(
+            user=request.user,
+            workflow=workflow,
+            defaults=serializer.validated_data
+        )
+        apply_rating_change(workflow.id, previous, rating.rating)
 
     action = 'created' if created else 'updated'
     return Response({
         'rating': WorkflowRatingSerializer(rating).data,
         'message': f'Rating {action} successfully'
     })
+
+
+@api_view(['GET'])
+@permission_classes([permissions.AllowAny])
+def workflow_recommendations_view(request, pk):
+    neighbors = WorkflowNeighbors.objects.filter(workflow_id=pk).first()
+    if neighbors is None:
+        return Response({'results': []})
+
+    workflows = Workflow.objects.filter(
+        id__in=neighbors.neighbor_ids, status=WorkflowStatus.ACTIVE
+    ).select_related('category').in_bulk()
+    scores = dict(zip(neighbors.neighbor_ids, neighbors.scores))
+
+    context = {'request': request, 'purchased_workflow_ids': purchased_workflow_ids(request)}
+    results = []
+    for workflow_id in neighbors.neighbor_ids:
+        if workflow_id in workflows:
+            data = WorkflowSerializer(workflows[workflow_id], context=context).data
+            data['score'] = scores[workflow_id]
+            results.append(data)
+    return Response({'results': results, 'computed_at': neighbors.computed_at})